@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+""" Compares cell-by-cell validation with the vectorized kernels of Numeric
+    and String, with and without Numba, including Numeric parsing texts with
+    a NumberFormat.
+
+    Run from the top level directory:
+
+        python -m benchmarks.column_kernels
+"""
+from __future__ import print_function, unicode_literals
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from table_cleaner import kernels
+from table_cleaner.validators import ColumnVerdicts, Int8, Float32, \
+        Float64, String
+from table_cleaner.numeric import NumberFormat
+
+rows = 1000000
+
+
+def main():
+    random_state = np.random.RandomState(0)
+    numbers = pd.Series(random_state.normal(0, 100, rows))
+    texts = pd.Series(random_state.choice(["", "a", "abc", "abcdefgh"], rows))
+    european = pd.Series(["%i.%03i,%02i" % (n // 1000, n % 1000, n % 100)
+                          for n in random_state.randint(1000, 10 ** 6, rows)],
+                         dtype=object)
+    cases = [("Int8", Int8(min_value=-100, max_value=100), numbers),
+             ("Float32", Float32(min_value=-250.0), numbers),
+             ("String", String(min_length=1, max_length=5), texts),
+             ("Locale", Float64(number_format=NumberFormat(
+                 decimal=",", thousands=".")), european)]
+    for name, validator, column in cases:
+        per_cell = timeit.timeit(
+                lambda: ColumnVerdicts.from_cells(validator, column.values),
+                number=1)
+        timings = []
+        for use_numba in (False, True):
+            kernels.use_numba = use_numba
+            validator.validate_column(column[:10])  # compile
+            timings.append(timeit.timeit(
+                    lambda: validator.validate_column(column), number=1))
+        print("%-8s cells %8.3fs  numpy %8.3fs  numba %8.3fs"
+              % (name, per_cell, timings[0], timings[1]))
+
+
+if __name__ == '__main__':
+    main()
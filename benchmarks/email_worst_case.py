@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+""" Times both Email engines on hostile inputs of growing length.
+
+    Run from the top level directory:
+
+        python -m benchmarks.email_worst_case
+"""
+from __future__ import print_function, unicode_literals
+import timeit
+
+from table_cleaner.email import Email
+
+
+def hostile_inputs(n):
+    """ Inputs that make the domain and user regular expressions backtrack:
+        long runs of label characters that fail only at the very end. """
+    label = "a-" * 124 + "a"
+    return {
+        "long label": "you@" + "a" * n + "!",
+        "hyphen run": "you@" + "a-" * (n // 2) + "!",
+        "many labels": "you@" + (label + ".") * (n // 250) + "a" * 10 + "-",
+        "dotted user": "a." * (n // 2) + "@example.com",
+        "quoted user": '"' + "\\a" * (n // 2) + "@example.com",
+    }
+
+
+def main():
+    engines = [Email(engine=engine, max_length=-1) for engine in Email.engines]
+    engines.append(Email(engine="scanner"))
+    names = ["regex", "scanner", "scanner, capped"]
+
+    print("%-12s %8s " % ("input", "length") +
+          " ".join("%16s" % name for name in names))
+    for n in (1000, 10000, 100000):
+        for kind, value in sorted(hostile_inputs(n).items()):
+            timings = []
+            for validator in engines:
+                t = min(timeit.repeat(lambda: list(validator.validate(value)),
+                                      number=5, repeat=3)) / 5
+                timings.append("%14.1fus" % (t * 1e6,))
+            print("%-12s %8i " % (kind, len(value)) + " ".join(timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+""" Measures how long importing table_cleaner takes in a fresh interpreter.
+
+    Run from the top level directory:
+
+        python -m benchmarks.import_time
+"""
+from __future__ import print_function, unicode_literals
+import subprocess
+import sys
+import timeit
+
+statements = [
+    ("python itself", "pass"),
+    ("import table_cleaner", "import table_cleaner"),
+    ("validators", "from table_cleaner import Email, Int, Bool"),
+    ("Cleaner", "from table_cleaner import Cleaner"),
+    ("MarkupFrame", "from table_cleaner import MarkupFrame"),
+]
+
+
+def time_import(statement, repeat=5):
+    """ Best wall time of running statement in a new interpreter. """
+    command = [sys.executable, "-c", statement]
+    return min(timeit.repeat(lambda: subprocess.check_call(command),
+                             number=1, repeat=repeat))
+
+
+def main():
+    for name, statement in statements:
+        print("%-22s %8.1fms" % (name, time_import(statement) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-from distutils.core import setup
+from setuptools import setup
 
 setup(name='table-cleaner',
       version='0.1',
@@ -8,6 +8,9 @@ setup(name='table-cleaner',
       author='Andreas Klostermann',
       author_email='andreas.klostermann@gmail.com',
       packages=['table_cleaner'],
+      entry_points={
+          'console_scripts': ['table-cleaner = table_cleaner.cli:main'],
+      },
      )
 
 
@@ -1,8 +1,50 @@
 from __future__ import unicode_literals
-from .cleaner import Cleaner
-import table_cleaner.validators
-from .validators import *
+import importlib
+import sys
 
-from .table_markup import MarkupCell, MarkupFrame
+# The public names of the package and the submodules defining them. They are
+# imported on first access, so that "import table_cleaner" stays cheap and
+# does not pull in pandas before it is needed.
+_validator_names = ["Verdict", "Validator", "ColumnVerdicts", "String",
+                    "Numeric", "Int", "Int8", "Int16", "Int32", "Int64",
+                    "Float16", "Float32", "Float64", "Float128", "Uint8",
+                    "Uint16", "Uint32", "Uint64", "Complex64", "Complex128",
+                    "Complex256", "Bool", "Regex", "RegexSet", "Email",
+                    "Choice", "Chain", "All", "Any"]
 
-__all__ = validators.all_names + ["Cleaner", "MarkupFrame"]
+_lazy_names = dict([(name, "validators") for name in _validator_names] +
+                   [("Cleaner", "cleaner"),
+                    ("NullDefault", "cleaner"),
+                    ("MarkupCell", "table_markup"),
+                    ("MarkupFrame", "table_markup")])
+
+_submodules = ["bool", "choice", "cleaner", "cli", "combinators",
+               "csv_reader", "dask_support", "diff", "email", "failures",
+               "inference", "kernels", "memory_map", "memory_report", "numeric",
+               "regular_expression", "sql", "storage", "string", "summary",
+               "table_markup", "utils", "validator", "validators",
+               "verdict_store"]
+
+__all__ = _validator_names + ["Cleaner", "MarkupFrame"]
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module("." + name, __name__)
+    if name not in _lazy_names:
+        raise AttributeError("module %r has no attribute %r"
+                             % (__name__, name))
+    module = importlib.import_module("." + _lazy_names[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_names) | set(_submodules))
+
+
+if sys.version_info < (3, 7):
+    # Module level __getattr__ needs Python 3.7, import everything up front.
+    for _name in _lazy_names:
+        __getattr__(_name)
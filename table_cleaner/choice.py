@@ -0,0 +1,60 @@
+from __future__ import unicode_literals
+import numpy as np
+
+from .validator import Validator, Verdict, ColumnVerdicts
+
+__all__ = ["Choice"]
+
+
+class Choice(Validator):
+    """ Validates that values are one of a fixed set of choices.
+
+        As with Series.isin, a NaN value is a choice if any choice is NaN,
+        whichever NaN object it is. """
+
+    def __init__(self, choices):
+        choices = list(choices)
+        if len(choices) == 0:
+            raise ValueError("'choices' argument needs at least one element.")
+        self.choices = choices
+        self.choice_set = frozenset(choices)
+        self.nan_choice = any(_is_nan(choice) for choice in choices)
+
+    def validate(self, obj):
+        try:
+            if _is_nan(obj):
+                valid = self.nan_choice
+            else:
+                valid = obj in self.choice_set
+        except TypeError:
+            # Unhashable values are never a choice
+            valid = False
+        if not valid:
+            yield Verdict(obj, False, "invalid choice",
+                          "%s is not one of the allowed values" % (repr(obj),))
+            return
+        yield Verdict(obj, True)
+
+    def validate_column(self, column):
+        """ Looks up all cells at once with Series.isin. """
+        if type(self).validate is not Choice.validate:
+            return ColumnVerdicts.from_cells(self, column.values)
+        values = column.values
+        valid = column.isin(self.choices).values
+        if self.nan_choice:
+            # isin misses NaNs of other float types in object columns
+            if values.dtype.kind == "f":
+                valid = valid | np.isnan(values)
+            elif values.dtype.kind == "O":
+                valid = valid | np.fromiter((_is_nan(v) for v in values),
+                                            dtype=bool, count=len(values))
+        descriptions = np.empty(len(values), dtype=object)
+        for i in np.flatnonzero(~valid):
+            descriptions[i] = "%s is not one of the allowed values" \
+                    % (repr(values[i]),)
+        return ColumnVerdicts.one_per_cell(values, valid, "invalid choice",
+                                           descriptions)
+
+
+def _is_nan(obj):
+    return isinstance(obj, (float, np.floating)) and np.isnan(obj)
@@ -1,9 +1,52 @@
 from __future__ import unicode_literals
 from .validators import *
+from .validator import ColumnVerdicts
+from .combinators import Combinator
+from .summary import ValidationSummary
+from .dask_support import is_dask_dataframe
+from .memory_map import is_windowed_source, ArrowFileWriter, ArrowFileSource
+from .verdict_store import VerdictAccumulator
+from .failures import FailureMask
+from . import storage
+from .utils import wilson_interval
 import six
 
+import contextlib
+import os
+import tempfile
+import numpy as np
 import pandas as pd
 
+# Fail-fast checks its limits after every chunk, so it needs chunks even
+# if no chunksize was given.
+default_fail_fast_chunksize = 10000
+
+# Windowed sources are read in windows of this many rows by default.
+default_window_size = 100000
+
+# Verdicts of windowed sources are spilled to disk once they take more than
+# this many bytes, unless verdict_memory_budget is given.
+default_window_verdict_budget = 64 * 2 ** 20
+
+null_policies = ("allow", "reject")
+
+
+class NullDefault(object):
+    """ Null policy replacing missing values by ``value``. The default is
+        validated once, and its verdicts apply to every missing cell. """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __repr__(self):
+        return "NullDefault(%s)" % (repr(self.value),)
+
+
+@contextlib.contextmanager
+def _no_tracking():
+    yield None
+
+
 class CleanerMetaclass(type):
     def __init__(cls, name, bases, nmspc):
         super(CleanerMetaclass, cls).__init__(name, bases, nmspc)
@@ -12,45 +55,698 @@ class CleanerMetaclass(type):
         else:
             cls._fields = cls._fields.copy()
 
+        reserved = getattr(cls, "result_names", ())
         for k,v in nmspc.items():
             if k in ['__init__','__qualname__', '__module__']:
                 continue
+            # Only validators are fields, methods and options are not.
+            if isinstance(v, type) or not hasattr(v, "validate"):
+                continue
             cls._fields[k] = v
+            # Fields named like an option, a method or a result are only
+            # kept in _fields, so the class attribute does not hide these.
+            if k in reserved or k.startswith("_") or \
+                    any(hasattr(base, k) and k not in getattr(base, "_fields",
+                                                              {})
+                        for base in bases):
+                delattr(cls, k)
 
 
 class Cleaner(six.with_metaclass(CleanerMetaclass, object)):
-    def __init__(self, original, verdict_counter=0):
-        output_rows = []
-        verdict_rows = []
-        verdict_index = []
+    """ Validates the columns of a DataFrame with the validators declared as
+        class attributes.
+
+        The rows are validated in chunks of ``chunksize`` rows. Validation
+        stops early ("fail-fast") after the chunk in which the number of
+        invalid rows reaches ``max_invalid_rows``, or the share of invalid
+        rows exceeds ``max_error_rate``. ``stopped_early`` tells whether this
+        happened, ``rows_validated`` how many rows were looked at.
+
+        If ``sample`` is given, only a random sample of rows is validated:
+        either a fraction (a float up to 1.0) or a number of rows. With
+        ``sample_by`` the sample is stratified by the values of that column,
+        drawing from every stratum in proportion to its size. ``estimates``
+        then holds the estimated share of rows failing every (column,
+        reason), with Wilson score intervals at the ``confidence`` level.
+
+        ``summary`` is a ValidationSummary updated chunk by chunk. It counts
+        the failing rows per (column, reason) and, if ``top_k`` or
+        ``examples`` are set, tracks the most frequent offending values and a
+        random sample of failing cells. With ``keep_verdicts`` set to False
+        the verdicts DataFrame is not built at all and ``verdicts`` is None.
+
+        ``original`` may also be a Dask DataFrame. Its partitions are then
+        validated one by one as lazy Dask tasks, and ``cleaned`` and
+        ``verdicts`` are lazy Dask DataFrames; sampling,
+        fail-fast and the summary are not available in this mode.
+
+        ``original`` may also be a memory-mapped WindowedSource, see
+        table_cleaner.memory_map. It is then read and validated in windows
+        of ``chunksize`` rows (``default_window_size`` unless given). The
+        cleaned rows of every window are written to an Arrow IPC file, at
+        ``cleaned_path`` or else in a temporary directory removed when
+        ``cleaned`` is closed, and the verdicts are spilled to disk once they
+        take more than ``verdict_memory_budget`` bytes
+        (``default_window_verdict_budget`` unless given). What stays in
+        memory is the current window with its results, the verdicts up to
+        that budget, and per validated row ``valid``, ``failures`` and the
+        row index; the summary grows with ``top_k`` and ``examples`` only.
+        Sampling is not available for such sources, and pyarrow is
+        required.
+
+        If ``cleaned_path`` is given, the cleaned rows of every chunk are
+        appended to an Arrow IPC file at that path instead of being kept in
+        memory, and ``cleaned`` is an ArrowFileSource memory-mapping it.
+
+        With ``verdict_memory_budget`` (in bytes), verdicts are built chunk
+        by chunk during the validation pass. Once they take more memory than
+        the budget they are spilled to a SQLite database in a temporary
+        directory, and ``verdicts`` is a verdict_store.SpilledVerdicts handle
+        which can be filtered by column, reason or validity and read in
+        batches. Below the budget ``verdicts`` stays a DataFrame.
+
+        With ``threads`` greater than one, the fields of every chunk are
+        validated concurrently by a pool of that many threads. This pays off
+        for vectorized validators, which release the GIL for most of their
+        work. The results are combined in field order, so the verdicts are
+        the same as without threads.
+
+        ``null_policy`` decides how missing values (None, NaN, NaT) are
+        handled, either for all fields or as a dict of per-field policies.
+        The missing cells of a column are found once with isna() and are
+        not passed to the validator: "allow" accepts them as they are,
+        "reject" gives them a "missing value" verdict, and NullDefault(value)
+        replaces them by a default value. Fields without a policy leave
+        missing values to their validator, as before.
+
+        ``failures`` is a failures.FailureMask with one bit per field for
+        every validated row, set if the field failed on that row. It is much
+        smaller than the verdicts, can select rows by the combination of
+        fields they failed, and expand_failures() gives the verdicts of the
+        selected rows on demand.
+
+        With ``profile_memory`` set, ``memory_report`` is a
+        memory_report.MemoryReport of the peak and retained memory of every
+        stage (the input, the validation pass and each field in it, the
+        cleaned and the verdicts DataFrames) and the deep size of the
+        DataFrames they produce. Fields are only accounted for one by one
+        without threads.
+
+        Nothing is validated when a Cleaner is created. The validation pass
+        runs when one of its results is first accessed: ``cleaned``,
+        ``verdicts``, ``valid`` (the validity mask of the validated rows),
+        ``failures``, the counters or the summary. The cleaned and verdicts DataFrames are
+        only built when they are accessed themselves, from the validated
+        chunks kept in between, so asking for ``invalid_rows`` alone never
+        builds them. With ``keep_results`` set to False nothing is kept for
+        them, nor written to ``cleaned_path``: a run which only needs the
+        counters, ``valid`` or ``failures`` then holds no more than these
+        after the pass, and accessing ``cleaned`` or ``verdicts`` raises a
+        ValueError.
+
+        All options can also be set as class attributes of a subclass.
+        Fields may be named like an option, a method or a result, e.g. for a
+        column "sample" or "valid". Their validators are then only kept in
+        ``_fields`` and not as class attributes, so the option keeps its
+        default and the result stays accessible. """
+
+    chunksize = None
+    max_invalid_rows = None
+    max_error_rate = None
+    sample = None
+    sample_by = None
+    random_state = None
+    confidence = 0.95
+    top_k = 0
+    examples = 0
+    keep_verdicts = True
+    keep_results = True
+    threads = 1
+    cleaned_path = None
+    null_policy = None
+    verdict_memory_budget = None
+    profile_memory = False
+
+    def __init__(self, original, verdict_counter=0, chunksize=None,
+                 max_invalid_rows=None, max_error_rate=None, sample=None,
+                 sample_by=None, random_state=None, confidence=None,
+                 top_k=None, examples=None, keep_verdicts=None,
+                 threads=None, cleaned_path=None, null_policy=None,
+                 verdict_memory_budget=None, profile_memory=None,
+                 keep_results=None):
+        if chunksize is not None:
+            self.chunksize = chunksize
+        if max_invalid_rows is not None:
+            self.max_invalid_rows = max_invalid_rows
+        if max_error_rate is not None:
+            self.max_error_rate = max_error_rate
+        if sample is not None:
+            self.sample = sample
+        if sample_by is not None:
+            self.sample_by = sample_by
+        if random_state is not None:
+            self.random_state = random_state
+        if confidence is not None:
+            self.confidence = confidence
+        if top_k is not None:
+            self.top_k = top_k
+        if examples is not None:
+            self.examples = examples
+        if keep_verdicts is not None:
+            self.keep_verdicts = keep_verdicts
+        if keep_results is not None:
+            self.keep_results = keep_results
+        if threads is not None:
+            self.threads = threads
+        if cleaned_path is not None:
+            self.cleaned_path = cleaned_path
+        if null_policy is not None:
+            self.null_policy = null_policy
+        if verdict_memory_budget is not None:
+            self.verdict_memory_budget = verdict_memory_budget
+        if profile_memory is not None:
+            self.profile_memory = profile_memory
+        self.memory_report = None
+        if self.profile_memory:
+            from .memory_report import MemoryReport
+            self.memory_report = MemoryReport()
+        for key in self._fields:
+            self.get_null_policy(key)
+
+        if is_dask_dataframe(original):
+            self.validate_dask(original, verdict_counter)
+            return
+
+        chunksize = self.chunksize
+        if chunksize is None:
+            if self.fail_fast:
+                chunksize = default_fail_fast_chunksize
+            elif is_windowed_source(original):
+                chunksize = default_window_size
+            else:
+                chunksize = max(len(original), 1)
+        if chunksize < 1:
+            raise ValueError("chunksize must be at least 1.")
+
+        random_state = self.random_state
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+
         self.original = original
+        data = original
+        if self.sample is not None:
+            if is_windowed_source(original):
+                raise ValueError("Sampling is not supported for windowed "
+                                 "sources.")
+            data = self.draw_sample(original, random_state)
+
+        # Nothing is validated yet: the results are computed on first
+        # access, see __getattr__.
+        self._data = data
+        self._chunksize = chunksize
+        self._random_state = random_state
+        self._verdict_counter = verdict_counter
+        self._cleaned_parts = None
+        self._verdict_parts = None
+        if self.memory_report is not None:
+            self.memory_report.set_bytes("input", data)
+
+    # Attributes set by the validation pass
+    pass_results = ("rows_validated", "invalid_rows", "summary",
+                    "invalid_counts", "stopped_early", "valid", "estimates",
+                    "failures")
+    # Attributes of instances, which fields must not hide, see
+    # CleanerMetaclass
+    result_names = pass_results + ("cleaned", "verdicts", "original",
+                                   "memory_report")
+
+    def __getattr__(self, name):
+        # Only called for attributes which have not been set yet.
+        if name in self.pass_results:
+            self.validate()
+        elif name in ("cleaned", "verdicts"):
+            self.validate()
+            if name not in self.__dict__:
+                if not self.keep_results:
+                    raise ValueError("%s was not kept, see keep_results."
+                                     % (name,))
+                build = self.build_cleaned if name == "cleaned" \
+                    else self.build_verdicts
+                with self.track_memory(name):
+                    setattr(self, name, build())
+                if self.memory_report is not None:
+                    self.memory_report.set_bytes(name, self.__dict__[name])
+                self.release_parts()
+        else:
+            raise AttributeError("%r object has no attribute %r"
+                                 % (type(self).__name__, name))
+        return self.__dict__[name]
 
-        for index, row in self.original.iterrows():
-            out_row = dict()
-            for key in row.index.get_values():
-                out_row[key] = None
-            keys = []
-            valid = True
-            for key, validator in six.iteritems(self._fields):
-                for verdict in validator.validate(row[key]):
-                    vrow = verdict.to_row()
-                    vrow["column"] = key
-                    vrow["counter"] = verdict_counter
-                    verdict_counter += 1
-                    verdict_rows.append(vrow)
-                    verdict_index.append(index)
-                    value = verdict.value
-                    valid &= verdict.valid
-                out_row[key] = value
-                if not valid:
+    def track_memory(self, stage, field=None):
+        """ Context manager measuring a stage if memory is profiled. """
+        if self.memory_report is None:
+            return _no_tracking()
+        return self.memory_report.track(stage, field)
+
+    @property
+    def streaming(self):
+        """ Whether cleaned and verdicts are built during the validation
+            pass, instead of keeping what they need of every chunk until
+            they are accessed.
+            This is the case for windowed sources, with cleaned_path and
+            with verdict_memory_budget. """
+        return (self.cleaned_path is not None) or \
+               (self.verdict_memory_budget is not None) or \
+               is_windowed_source(self._data)
+
+    def validate(self):
+        """ Runs the validation pass unless it has run already. It sets the
+            counters, the summary, and ``valid``, the validity mask of the
+            validated rows. Of every validated chunk, only the validated
+            values of its valid rows and, with keep_verdicts, its verdicts are
+            kept, and cleaned and verdicts are only built from them when they
+            are accessed. """
+        if "rows_validated" in self.__dict__:
+            return
+        with self.track_memory("validation"):
+            self.validation_pass()
+        if self.memory_report is not None and self.streaming and \
+                self.keep_results:
+            self.memory_report.set_bytes("cleaned", self.cleaned)
+            self.memory_report.set_bytes("verdicts", self.verdicts)
+
+    def validation_pass(self):
+        self.rows_validated = 0
+        self.invalid_rows = 0
+        self.summary = ValidationSummary(top_k=self.top_k,
+                                         examples=self.examples,
+                                         random_state=self._random_state)
+        self.invalid_counts = self.summary.counts
+        self.stopped_early = False
+
+        streaming = self.streaming
+        keep = self.keep_results
+        cleaned_parts = []
+        verdict_parts = []
+        masks = []
+        failures = []
+        verdicts = VerdictAccumulator(self.verdict_budget(),
+                                      self.row_index())
+        cleaned_frames = []
+        writer = None
+        cleaned_path = self.cleaned_path
+        temporary = keep and cleaned_path is None and \
+            is_windowed_source(self._data)
+        if temporary:
+            cleaned_path = os.path.join(
+                    tempfile.mkdtemp(prefix="table-cleaner-"), "cleaned.arrow")
+        if keep and cleaned_path is not None:
+            writer = ArrowFileWriter(cleaned_path)
+        executor = None
+        if self.threads > 1 and len(self._fields) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            executor = ThreadPoolExecutor(
+                    max_workers=min(self.threads, len(self._fields)))
+        try:
+            for chunk, results, valid, counter in \
+                    self.validate_chunks(executor):
+                masks.append(pd.Series(valid, index=chunk.index))
+                failures.append(FailureMask.from_results(chunk.index, results))
+                if not keep:
+                    continue
+                offset = self.rows_validated - len(chunk)
+                columns = self.cleaned_columns(results, valid)
+                if not streaming:
+                    cleaned_parts.append((chunk, valid, columns))
+                    if self.keep_verdicts:
+                        verdict_parts.append((
+                            [(key, result.verdicts_only())
+                             for key, result in results], counter, offset))
                     continue
-                keys.append(key)
+                if self.keep_verdicts:
+                    verdicts.append(self.verdict_frame(chunk, results,
+                                                       counter, offset))
+                cleaned = self.cleaned_frame(chunk, valid, columns)
+                if writer is None:
+                    cleaned_frames.append(cleaned)
+                else:
+                    writer.write(cleaned)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if writer is not None:
+                writer.close()
+
+        self.valid = pd.concat(masks)
+        self.failures = FailureMask.concat(failures, list(self._fields))
+        if keep and streaming:
+            self.verdicts = None
+            if self.keep_verdicts:
+                self.verdicts = verdicts.result()
+            if writer is None:
+                self.cleaned = self.concat_cleaned(cleaned_frames)
+            else:
+                self.cleaned = ArrowFileSource(cleaned_path,
+                                               temporary=temporary)
+        elif keep:
+            self._cleaned_parts = cleaned_parts
+            self._verdict_parts = verdict_parts
+
+        self.estimates = None
+        if self.sample is not None:
+            self.estimates = self.estimate_error_rates()
+
+    def validate_chunks(self, executor=None):
+        """ Validates the data chunk by chunk and yields (chunk, results,
+            validity mask, first verdict counter) for every chunk, updating
+            the counters and the summary on the way. """
+        data = self._data
+        chunksize = self._chunksize
+        verdict_counter = self._verdict_counter
+        for start in range(0, max(len(data), 1), chunksize):
+            chunk = self.read_chunk(start, start + chunksize)
+            results = self.validate_fields(chunk, executor)
+
+            valid = np.ones(len(chunk), dtype=bool)
+            for key, result in results:
+                valid &= result.valid
+
+            self.rows_validated += len(chunk)
+            self.invalid_rows += int((~valid).sum())
+            for key, result in results:
+                self.summary.update(chunk, key, result)
+            stop = self.limits_exceeded() and start + chunksize < len(data)
+            yield chunk, results, valid, verdict_counter
+
+            verdict_counter += sum(len(r.positions) for k, r in results)
+            if stop:
+                self.stopped_early = True
+                break
+
+    def read_chunk(self, start, stop):
+        if is_windowed_source(self._data):
+            return self._data.window(start, stop)
+        return self._data.iloc[start:stop]
+
+    def expand_failures(self, all_of=(), any_of=(), none_of=()):
+        """ Returns the verdicts of the failing rows selected as in
+            FailureMask.select, by validating only these rows again. The
+            verdicts are numbered from zero. """
+        failures = self.failures
+        selected = failures.select(all_of, any_of, none_of) & \
+            failures.any_failed()
+        frames = []
+        counter = 0
+        for start in range(0, max(self.rows_validated, 1), self._chunksize):
+            stop = min(start + self._chunksize, self.rows_validated)
+            rows = np.flatnonzero(selected[start:stop])
+            if len(rows) == 0:
+                continue
+            chunk = self.read_chunk(start, stop).iloc[rows]
+            results = self.validate_fields(chunk)
+            frames.append(self.verdict_frame(chunk, results, counter))
+            counter += len(frames[-1])
+        if not frames:
+            return self.verdict_frame(None, [], 0)
+        return pd.concat(frames)
+
+    def build_cleaned(self):
+        return self.concat_cleaned([self.cleaned_frame(chunk, valid, columns)
+                                    for chunk, valid, columns
+                                    in self._cleaned_parts])
+
+    def build_verdicts(self):
+        if not self.keep_verdicts:
+            return None
+        verdicts = VerdictAccumulator(self.verdict_budget(),
+                                      self.row_index())
+        for results, counter, offset in self._verdict_parts:
+            verdicts.append(self.verdict_frame(None, results, counter,
+                                               offset))
+        return verdicts.result()
+
+    def verdict_budget(self):
+        """ The memory budget of the verdicts, in bytes, or None. """
+        if self.verdict_memory_budget is None and \
+                is_windowed_source(self._data):
+            return default_window_verdict_budget
+        return self.verdict_memory_budget
+
+    def row_index(self):
+        """ The labels of the validated rows, by position. """
+        if is_windowed_source(self._data):
+            return pd.RangeIndex(len(self._data))
+        return self._data.index
+
+    def release_parts(self):
+        """ Drops what was kept of the validated chunks for cleaned and
+            verdicts once they are built or set. """
+        if "cleaned" in self.__dict__:
+            self._cleaned_parts = None
+        if "verdicts" in self.__dict__:
+            self._verdict_parts = None
+
+    def concat_cleaned(self, frames):
+        # Empty chunks have object columns, which would spoil the dtypes.
+        frames = [frame for frame in frames if len(frame)] or frames[:1]
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    def read_csv(cls, path, passthrough=(), read_options=None, **kwargs):
+        """ Reads the fields and the passthrough columns of a CSV file with
+            typed columns where possible, see csv_reader.read_csv, and
+            validates them. ``read_options`` are passed on to
+            pandas.read_csv, further keyword arguments to the Cleaner. """
+        from .csv_reader import read_csv
+        data = read_csv(cls, path, passthrough, **(read_options or {}))
+        return cls(data, **kwargs)
+
+    @classmethod
+    def from_sql(cls, connection, table, **kwargs):
+        """ Validates a database table inside the database, see
+            sql.SqlValidation. """
+        from .sql import SqlValidation
+        return SqlValidation(cls, connection, table, **kwargs)
+
+    def validate_dask(self, original, verdict_counter):
+        if self.fail_fast or (self.sample is not None) or \
+                (self.cleaned_path is not None):
+            raise ValueError("Sampling, fail-fast and cleaned_path are not "
+                             "supported for Dask DataFrames.")
+        from .dask_support import validate_dask
+        self.original = original
+        self.summary = None
+        self.failures = None
+        self.cleaned, self.verdicts = validate_dask(
+                self.__class__, original, verdict_counter,
+                options=dict(chunksize=self.chunksize,
+                             keep_verdicts=self.keep_verdicts,
+                             threads=self.threads,
+                             null_policy=self.null_policy))
+
+    @property
+    def fail_fast(self):
+        return (self.max_invalid_rows is not None) or \
+               (self.max_error_rate is not None)
+
+    def limits_exceeded(self):
+        if (self.max_invalid_rows is not None) and \
+                (self.invalid_rows >= self.max_invalid_rows):
+            return True
+        if (self.max_error_rate is not None) and (self.rows_validated > 0) and\
+                (self.invalid_rows > self.max_error_rate * self.rows_validated):
+            return True
+        return False
+
+    def draw_sample(self, data, random_state):
+        """ Returns the rows of data to validate, in their original order. """
+        n = len(data)
+        if isinstance(self.sample, (float, np.floating)):
+            if not (0.0 < self.sample <= 1.0):
+                raise ValueError("A sample fraction must be in (0, 1].")
+            fraction = self.sample
+        else:
+            if self.sample < 1:
+                raise ValueError("A sample needs at least one row.")
+            fraction = min(float(self.sample) / max(n, 1), 1.0)
+
+        if self.sample_by is None:
+            strata = [np.arange(n)]
+        else:
+            codes = pd.factorize(data[self.sample_by])[0]
+            order = np.argsort(codes, kind="mergesort")
+            boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+            strata = np.split(order, boundaries)
+
+        positions = []
+        for stratum in strata:
+            size = int(round(fraction * len(stratum)))
+            if len(stratum) > 0:
+                size = min(max(size, 1), len(stratum))
+            positions.append(random_state.choice(stratum, size,
+                                                 replace=False))
+        positions = np.sort(np.concatenate(positions)).astype(np.intp)
+        return data.iloc[positions]
+
+    @property
+    def has_stages(self):
+        """ Whether the verdicts have a "stage" column, telling which stage
+            of a combined validator produced each verdict. """
+        return any(isinstance(validator, Combinator)
+                   for validator in self._fields.values())
+
+    def validate_fields(self, data, executor=None):
+        """ Returns (key, ColumnVerdicts) for every field, in field order.
+            With an executor, the fields are validated concurrently. """
+        fields = list(six.iteritems(self._fields))
+        if executor is None:
+            return [(key, self.validate_field(data, key, validator))
+                    for key, validator in fields]
+        futures = [executor.submit(self.validate_field, data, key, validator)
+                   for key, validator in fields]
+        return [(key, future.result())
+                for (key, validator), future in zip(fields, futures)]
+
+    def get_null_policy(self, key):
+        """ Returns the null policy of a field, or None. """
+        policy = self.null_policy
+        if isinstance(policy, dict):
+            policy = policy.get(key)
+        if policy is not None and policy not in null_policies and \
+                not isinstance(policy, NullDefault):
+            raise ValueError("The null policy of %s must be one of %s or a "
+                             "NullDefault, not %s." % (repr(key),
+                             ", ".join(null_policies), repr(policy)))
+        return policy
+
+    def validate_field(self, data, key, validator):
+        # Concurrent fields cannot be told apart by tracemalloc.
+        tracked = self.threads <= 1
+        with self.track_memory("validation", key) if tracked \
+                else _no_tracking():
+            column = data[key]
+            policy = self.get_null_policy(key)
+            if policy is not None:
+                missing = column.isna().values
+                if missing.any():
+                    return self.validate_nulls(column, validator, policy,
+                                               missing)
+            return self.validate_cells(column, validator)
+
+    def validate_cells(self, column, validator):
+        if hasattr(validator, "validate_column"):
+            return validator.validate_column(column)
+        # Validators written against the older, cell-by-cell interface
+        return ColumnVerdicts.from_cells(validator, column.values)
+
+    def validate_nulls(self, column, validator, policy, missing):
+        """ Validates the present cells of a column and applies the null
+            policy to the missing ones. """
+        n_missing = int(missing.sum())
+        if policy == "allow":
+            nulls = ColumnVerdicts.one_per_cell(column.values[missing],
+                                                np.ones(n_missing, bool),
+                                                None, None)
+        elif policy == "reject":
+            nulls = ColumnVerdicts.one_per_cell(column.values[missing],
+                                                np.zeros(n_missing, bool),
+                                                "missing value",
+                                                "value is missing")
+        else:
+            default = ColumnVerdicts.from_cells(validator, [policy.value])
+            nulls = ColumnVerdicts(np.repeat(default.values, n_missing),
+                np.repeat(default.valid, n_missing),
+                np.repeat(np.arange(n_missing), len(default.positions)),
+                np.tile(default.verdict_valid, n_missing),
+                np.tile(default.reasons, n_missing),
+                np.tile(default.descriptions, n_missing))
+
+        parts = [(np.flatnonzero(missing), nulls)]
+        if not missing.all():
+            parts.append((np.flatnonzero(~missing),
+                          self.validate_cells(column[~missing], validator)))
+        return ColumnVerdicts.combine(len(column), parts)
+
+    def estimate_error_rates(self):
+        """ Returns a DataFrame with the share of validated rows failing each
+            (column, reason) and its confidence interval. """
+        rows = []
+        for (key, reason), count in six.iteritems(self.invalid_counts):
+            lower, upper = wilson_interval(count, self.rows_validated,
+                                           self.confidence)
+            rows.append(dict(column=key, reason=reason, invalid=count,
+                             rate=float(count) / self.rows_validated,
+                             lower=lower, upper=upper))
+        return pd.DataFrame(rows, columns=["column", "reason", "invalid",
+                                           "rate", "lower", "upper"])
+
+    def verdict_frame(self, data, results, verdict_counter, offset=None):
+        """ Combines the verdicts of all fields into one DataFrame. Verdicts
+            are ordered by row, then by field, and numbered in that order
+            starting at verdict_counter. They are indexed by the labels of
+            their rows, or with an offset, the position of the first row of
+            data, by the positions of their rows. """
+        columns = ["valid", "reason", "description", "column", "counter"]
+        if self.has_stages:
+            columns.append("stage")
+        if len(results) == 0:
+            return pd.DataFrame(columns=columns)
+
+        positions = np.concatenate([r.positions for k, r in results])
+        keys = np.concatenate([np.repeat(np.array([k], dtype=object),
+                                         len(r.positions))
+                               for k, r in results])
+        field_ids = np.concatenate([np.repeat(i, len(r.positions))
+                                    for i, (k, r) in enumerate(results)])
+        order = np.lexsort((field_ids, positions))
+
+        verdicts = pd.DataFrame(dict(
+            valid=np.concatenate([r.verdict_valid for k, r in results]),
+            reason=np.concatenate([r.reasons for k, r in results]),
+            description=np.concatenate([r.descriptions for k, r in results]),
+            column=keys), columns=columns[:4]).iloc[order]
+        if offset is None:
+            verdicts.index = data.index[positions[order]]
+        else:
+            verdicts.index = offset + positions[order]
+        verdicts["counter"] = verdict_counter + np.arange(len(order))
+        if self.has_stages:
+            verdicts["stage"] = np.concatenate([
+                np.full(len(r.positions), None, dtype=object)
+                if r.stages is None else r.stages
+                for k, r in results])[order]
+        return verdicts
+
+    def cleaned_columns(self, results, valid):
+        """ Returns the validated values and extra columns of the valid
+            rows, as a list of (column, values). """
+        columns = []
+        for key, result in results:
+            values = result.values
+            # Typed values of column kernels keep their dtype, everything
+            # else is boxed and inferred in cleaned_frame.
+            if not isinstance(values, np.ndarray) or values.dtype.kind == "O":
+                values = np.asarray(values, dtype=object)
+            columns.append((key, values[valid]))
+            for suffix, values in six.iteritems(result.extra):
+                columns.append((key + suffix, np.asarray(values)[valid]))
+        return columns
 
-            for key in set(self.original.columns.get_values())-set(keys):
-                out_row[key] = row[key]
-            if valid:
-                output_rows.append(out_row)
-        self.verdicts = pd.DataFrame(verdict_rows, index=verdict_index)
-        self.cleaned = pd.DataFrame(output_rows)
+    def cleaned_frame(self, data, valid, columns):
+        """ Builds the DataFrame of valid rows, with validated columns
+            replaced by the validated values, see cleaned_columns. """
+        cleaned = data[valid].copy()
+        for column, values in columns:
+            cleaned[column] = values
+        return cleaned.reset_index(drop=True).infer_objects()
 
+    def to_parquet(self, path, partition_by=None):
+        """ Writes cleaned and verdicts as Parquet files into the directory
+            path, see storage.save_results. """
+        storage.save_results(self, path, format="parquet",
+                             partition_by=partition_by)
 
+    def to_feather(self, path):
+        """ Writes cleaned and verdicts as Feather files into the directory
+            path, see storage.save_results. """
+        storage.save_results(self, path, format="feather")
@@ -0,0 +1,256 @@
+""" Command line batch validation:
+
+    table-cleaner mypackage.cleaners:OrderCleaner data/*.csv -o results -j 4
+
+    Every input file is validated in chunks with the given Cleaner subclass,
+    and its cleaned rows and verdicts are written to the output directory.
+    Files are distributed over a pool of worker processes. Each worker loads
+    the Cleaner class once, so its validators are built once per worker and
+    reused for every file and chunk.
+
+    The exit code is 0 if all rows of all files are valid, 1 if there were
+    invalid rows, and 2 if a file could not be processed. """
+from __future__ import unicode_literals, print_function
+import argparse
+import glob
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import pandas as pd
+
+input_extensions = (".csv", ".parquet", ".pq")
+output_formats = ("csv", "parquet")
+
+# The Cleaner class of a worker process, see init_worker
+_worker_cleaner = None
+_worker_options = None
+
+
+def load_object(path):
+    """ Imports an object given as "package.module:Name" or
+        "package.module.Name". """
+    if ":" in path:
+        module_name, name = path.split(":", 1)
+    else:
+        module_name, _, name = path.rpartition(".")
+    if not module_name:
+        raise ValueError("%s is not a dotted path to a Cleaner class."
+                         % (repr(path),))
+    obj = importlib.import_module(module_name)
+    for attribute in name.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+def expand_inputs(paths):
+    """ Expands directories and glob patterns into a list of input files. """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name)
+                                for name in os.listdir(path)
+                                if name.lower().endswith(input_extensions)))
+        elif glob.has_magic(path):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def read_chunks(path, chunksize):
+    """ Yields the rows of a CSV or Parquet file as DataFrames of at most
+        chunksize rows, indexed by their row number in the file. """
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype=object):
+            yield chunk
+
+
+class OutputWriter(object):
+    """ Appends DataFrames chunk by chunk to a CSV or Parquet file. Parquet
+        files are written by memory_map.ArrowFileWriter. """
+
+    def __init__(self, path, format, index):
+        self.path = path
+        self.format = format
+        self.index = index
+        self.writer = None
+        self.started = False
+        if format == "parquet":
+            from .memory_map import ArrowFileWriter
+            self.writer = ArrowFileWriter(path, format="parquet")
+
+    def write(self, frame):
+        if self.format == "csv":
+            frame.to_csv(self.path, mode="a" if self.started else "w",
+                         header=not self.started, index=self.index)
+            self.started = True
+            return
+        if self.index:
+            frame = frame.copy()
+            frame.insert(0, "index", frame.index.values)
+        self.writer.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def output_names(paths):
+    """ Returns the names of the output files of every input file: the file
+        name without extension, numbered as <name>-1, <name>-2, ... for all
+        but the first file of the same name, e.g. a/data.csv and
+        b/data.csv or data.csv and data.parquet. """
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    used = set(stems)
+    seen = set()
+    names = []
+    for stem in stems:
+        name = stem
+        number = 0
+        while name in seen or (name != stem and name in used):
+            number += 1
+            name = "%s-%i" % (stem, number)
+        seen.add(name)
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def validate_file(cleaner_class, path, output_dir, chunksize=100000,
+                  output_format="csv", name=None):
+    """ Validates one file chunk by chunk and writes <name>.cleaned and
+        <name>.verdicts into output_dir, name being the file name without
+        extension unless given. Returns a dict of statistics. """
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    stats = dict(file=path, name=name, rows=0, invalid_rows=0, verdicts=0,
+                 error=None)
+    start = time.time()
+    cleaned_writer = OutputWriter(os.path.join(output_dir, "%s.cleaned.%s"
+                                               % (name, output_format)),
+                                  output_format, index=False)
+    verdict_writer = OutputWriter(os.path.join(output_dir, "%s.verdicts.%s"
+                                               % (name, output_format)),
+                                  output_format, index=True)
+    try:
+        verdict_counter = 0
+        for chunk in read_chunks(path, chunksize):
+            cleaner = cleaner_class(chunk, verdict_counter=verdict_counter)
+            verdict_counter += len(cleaner.verdicts)
+            cleaned_writer.write(cleaner.cleaned)
+            verdict_writer.write(cleaner.verdicts)
+            stats["rows"] += len(chunk)
+            stats["invalid_rows"] += len(chunk) - len(cleaner.cleaned)
+        stats["verdicts"] = verdict_counter
+    except Exception:
+        stats["error"] = traceback.format_exc()
+    finally:
+        cleaned_writer.close()
+        verdict_writer.close()
+    stats["seconds"] = time.time() - start
+    return stats
+
+
+def init_worker(cleaner_path, options):
+    global _worker_cleaner, _worker_options
+    _worker_cleaner = load_object(cleaner_path)
+    _worker_options = options
+
+
+def _validate_in_worker(path_and_name):
+    path, name = path_and_name
+    return validate_file(_worker_cleaner, path, name=name,
+                         **_worker_options)
+
+
+def validate_files(cleaner_path, paths, output_dir, jobs=1, chunksize=100000,
+                   output_format="csv"):
+    """ Validates files with a pool of jobs worker processes and yields the
+        statistics of each file as it is finished. Files of the same name
+        get distinct output names, see output_names. """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    options = dict(output_dir=output_dir, chunksize=chunksize,
+                   output_format=output_format)
+    paths = list(zip(paths, output_names(paths)))
+    if jobs <= 1:
+        init_worker(cleaner_path, options)
+        for path in paths:
+            yield _validate_in_worker(path)
+        return
+
+    pool = multiprocessing.Pool(jobs, initializer=init_worker,
+                                initargs=(cleaner_path, options))
+    try:
+        for stats in pool.imap_unordered(_validate_in_worker, paths):
+            yield stats
+    finally:
+        pool.close()
+        pool.join()
+
+
+def format_stats(stats):
+    if stats["error"] is not None:
+        status = "error"
+    elif stats["invalid_rows"] > 0:
+        status = "invalid"
+    else:
+        status = "ok"
+    throughput = stats["rows"] / stats["seconds"] if stats["seconds"] else 0
+    name = stats["file"]
+    if stats["name"] != os.path.splitext(os.path.basename(name))[0]:
+        name += " -> %s" % (stats["name"],)
+    return "%-8s %10i %10i %10i %8.2fs %10.0f/s  %s" % (
+            status, stats["rows"], stats["invalid_rows"], stats["verdicts"],
+            stats["seconds"], throughput, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="table-cleaner",
+        description="Validate CSV and Parquet files with a Cleaner class.")
+    parser.add_argument("cleaner", help="dotted path of the Cleaner "
+                        "subclass, e.g. mypackage.cleaners:OrderCleaner")
+    parser.add_argument("inputs", nargs="+", help="input files, directories "
+                        "or glob patterns")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="directory for the cleaned and verdict files")
+    parser.add_argument("-j", "--jobs", type=int,
+                        default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=100000,
+                        help="number of rows validated at once")
+    parser.add_argument("--format", choices=output_formats, default="csv",
+                        help="format of the output files")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.inputs)
+    print("%-8s %10s %10s %10s %9s %12s  %s" % ("status", "rows", "invalid",
+          "verdicts", "time", "throughput", "file"))
+    exit_code = 0
+    for stats in validate_files(args.cleaner, paths, args.output_dir,
+                                jobs=min(args.jobs, max(len(paths), 1)),
+                                chunksize=args.chunksize,
+                                output_format=args.format):
+        print(format_stats(stats))
+        if stats["error"] is not None:
+            print(stats["error"], file=sys.stderr)
+            exit_code = 2
+        elif stats["invalid_rows"] > 0:
+            exit_code = max(exit_code, 1)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
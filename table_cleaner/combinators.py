@@ -0,0 +1,154 @@
+""" Validators combining other validators, evaluated stage by stage.
+
+    Chain(String(max_length=64), Regex(r"^[a-z.]+@"), Email())
+
+    In column mode every stage only sees the cells its result still depends
+    on: Chain and All pass the cells that are valid so far on to the next
+    stage, Any the cells that are invalid so far. Expensive stages at the
+    end therefore only run on a fraction of the column.
+
+    Every verdict is attributed to the stage which produced it, see
+    Verdict.stage and ColumnVerdicts.stages. """
+from __future__ import unicode_literals
+import numpy as np
+
+from .validator import Validator, ColumnVerdicts
+
+__all__ = ["Chain", "All", "Any"]
+
+
+def validate_column(validator, column):
+    if hasattr(validator, "validate_column"):
+        return validator.validate_column(column)
+    return ColumnVerdicts.from_cells(validator, column.values)
+
+
+class Combinator(Validator):
+    """ Abstract base class of validators made of stages. Stages are named
+        after the classes of their validators unless ``names`` are given. """
+
+    def __init__(self, *validators, **kwargs):
+        names = kwargs.pop("names", None)
+        if kwargs:
+            raise TypeError("Unexpected keyword arguments: %s"
+                            % ", ".join(sorted(kwargs)))
+        if len(validators) == 0:
+            raise ValueError("At least one validator is needed.")
+        if names is None:
+            names = [type(validator).__name__ for validator in validators]
+        if len(names) != len(validators):
+            raise ValueError("There must be one name per validator.")
+        self.validators = list(validators)
+        self.names = list(names)
+
+    @property
+    def stages(self):
+        return list(zip(self.names, self.validators))
+
+    def stage_verdicts(self, name, validator, obj):
+        verdicts = list(validator.validate(obj))
+        for verdict in verdicts:
+            verdict.stage = name
+        return verdicts
+
+    @staticmethod
+    def attribute(result, name):
+        result.stages = np.full(len(result.positions), name, dtype=object)
+        return result
+
+
+class Chain(Combinator):
+    """ Validates with one stage after the other, passing the validated
+        value of each stage on to the next. A cell fails at the first stage
+        which rejects it and gets that stage's verdicts; valid cells get the
+        verdicts of the last stage. """
+
+    # Whether a stage gets the value validated by the previous stage or the
+    # original value.
+    pass_values = True
+
+    def validate(self, obj):
+        value = obj
+        for i, (name, validator) in enumerate(self.stages):
+            verdicts = self.stage_verdicts(name, validator,
+                                           value if self.pass_values else obj)
+            if i == len(self.validators) - 1 or \
+                    not all(verdict.valid for verdict in verdicts):
+                for verdict in verdicts:
+                    yield verdict
+                return
+            if verdicts:
+                value = verdicts[-1].value
+
+    def validate_column(self, column):
+        cells = np.arange(len(column))
+        current = column
+        parts = []
+        for i, (name, validator) in enumerate(self.stages):
+            result = self.attribute(validate_column(validator, current), name)
+            if i == len(self.validators) - 1:
+                parts.append((cells, result))
+                break
+            failed = np.flatnonzero(~result.valid)
+            if len(failed):
+                parts.append((cells[failed], result.take(failed)))
+            passed = np.flatnonzero(result.valid)
+            if self.pass_values:
+                current = type(current)(np.asarray(result.values)[passed],
+                                        index=current.index[passed])
+            else:
+                current = current.iloc[passed]
+            cells = cells[passed]
+            if len(cells) == 0:
+                break
+        return ColumnVerdicts.combine(len(column), parts)
+
+
+class All(Chain):
+    """ Requires every stage to accept the original value. Stages are
+        evaluated in order and a cell fails at the first stage which rejects
+        it. Valid cells get the verdicts and the value of the last stage. """
+
+    pass_values = False
+
+
+class Any(Combinator):
+    """ Requires at least one stage to accept the value. Stages are tried in
+        order; a cell gets the verdicts and the value of the first stage
+        accepting it. Cells no stage accepts get the verdicts of all
+        stages. """
+
+    def validate(self, obj):
+        failures = []
+        for name, validator in self.stages:
+            verdicts = self.stage_verdicts(name, validator, obj)
+            if all(verdict.valid for verdict in verdicts):
+                for verdict in verdicts:
+                    yield verdict
+                return
+            failures.extend(verdicts)
+        for verdict in failures:
+            yield verdict
+
+    def validate_column(self, column):
+        pending = np.arange(len(column))
+        current = column
+        parts = []
+        rejected = []
+        for name, validator in self.stages:
+            result = self.attribute(validate_column(validator, current), name)
+            passed = np.flatnonzero(result.valid)
+            if len(passed):
+                parts.append((pending[passed], result.take(passed)))
+            failed = np.flatnonzero(~result.valid)
+            rejected.append((pending[failed], result.take(failed)))
+            pending = pending[failed]
+            current = current.iloc[failed]
+            if len(pending) == 0:
+                break
+        if len(pending):
+            # Cells no stage accepted get the failures of every stage.
+            for cells, result in rejected:
+                keep = np.flatnonzero(np.in1d(cells, pending))
+                parts.append((cells[keep], result.take(keep)))
+        return ColumnVerdicts.combine(len(column), parts)
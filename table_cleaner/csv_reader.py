@@ -0,0 +1,139 @@
+""" Reading CSV files for a Cleaner.
+
+    read_csv only parses the columns a Cleaner needs, and converts the
+    columns of numeric and Bool fields to typed columns in bulk where this
+    cannot change a verdict, instead of leaving every column as text for the
+    validators to convert cell by cell.
+
+    The CSV parser accepts more than the validators do when it parses
+    numbers itself, e.g. "1.0" or "1e3" for an integer, so the columns are
+    read as text and only converted if every text has a meaning both agree
+    on:
+
+    * Integer fields are converted to int64 (uint64 for unsigned types) if
+      every value matches [+-]?[0-9]+ ([+]?[0-9]+ for unsigned types) and
+      fits into the dtype of the validator.
+    * Floating point fields are converted to float64 if every value is
+      missing or a plain decimal number such as -1.5, .5 or 2e10, and does
+      not overflow the dtype of the validator.
+    * Bool fields are converted to booleans if every value is a text in
+      the true_values or false_values of the validator.
+
+    Columns with any other value, including missing values in integer and
+    Bool columns, stay text, so the validators report the bad values with
+    the same verdicts and descriptions as for any text column. Numeric
+    fields with a NumberFormat always stay text. """
+from __future__ import unicode_literals
+import six
+
+import numpy as np
+import pandas as pd
+
+from .bool import Bool
+from .numeric import Numeric
+
+__all__ = ["read_csv", "convert_column", "parse_dtypes"]
+
+integer_syntax = r"[+-]?[0-9]+"
+unsigned_syntax = r"\+?[0-9]+"
+float_syntax = r"[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?"
+
+
+def _text_values(values):
+    return set(value for value in values
+               if isinstance(value, six.string_types))
+
+
+def parse_dtype(validator):
+    """ The dtype a column of the validator is converted to, or None if it
+        stays text. """
+    if isinstance(validator, Numeric) and validator.number_format is None \
+            and type(validator).validate is Numeric.validate:
+        if issubclass(validator.dtype, np.unsignedinteger):
+            return np.uint64
+        if issubclass(validator.dtype, np.integer):
+            return np.int64
+        if issubclass(validator.dtype, np.floating) and \
+                np.finfo(validator.dtype).bits <= 64:
+            return np.float64
+    if isinstance(validator, Bool) and type(validator).validate is \
+            Bool.validate and True in validator.true_values and \
+            False in validator.false_values:
+        return bool
+    return None
+
+
+def parse_dtypes(cleaner_class):
+    """ Returns the dtypes the columns of the fields of cleaner_class are
+        converted to where possible. """
+    dtypes = {}
+    for key, validator in six.iteritems(cleaner_class._fields):
+        dtype = parse_dtype(validator)
+        if dtype is not None:
+            dtypes[key] = dtype
+    return dtypes
+
+
+def _matches(texts, syntax):
+    return texts.str.fullmatch(syntax, na=False).all()
+
+
+def convert_column(column, validator):
+    """ Returns the text column of a field converted to the dtype of
+        parse_dtype, or the column itself if that could change a verdict.
+    """
+    dtype = parse_dtype(validator)
+    if dtype is None or column.dtype != object:
+        return column
+    if dtype is bool:
+        true_values = _text_values(validator.true_values)
+        false_values = _text_values(validator.false_values)
+        is_true = column.isin(true_values)
+        if not (is_true | column.isin(false_values)).all():
+            return column
+        return is_true
+
+    if dtype is np.float64:
+        present = column.notna()
+        if not _matches(column[present], float_syntax):
+            return column
+        values = column.astype(np.float64)
+        with np.errstate(over="ignore"):
+            overflows = np.isinf(values.values.astype(validator.dtype)) & \
+                np.isfinite(values.values)
+        return column if overflows.any() else values
+
+    syntax = unsigned_syntax if dtype is np.uint64 else integer_syntax
+    if not _matches(column, syntax):
+        return column
+    try:
+        values = column.astype(dtype)
+    except (ValueError, OverflowError):
+        return column
+    # Compare as Python ints, uint64 and int64 bounds do not mix.
+    info = np.iinfo(validator.dtype)
+    if len(values) and not (info.min <= int(values.min()) and
+                            int(values.max()) <= info.max):
+        return column
+    return values
+
+
+def read_csv(cleaner_class, path, passthrough=(), **kwargs):
+    """ Reads the fields of cleaner_class and the passthrough columns from a
+        CSV file as text and converts the columns of the fields where
+        possible, see convert_column. Further keyword arguments are passed
+        to pandas.read_csv; columns given a dtype there are not converted.
+    """
+    fields = cleaner_class._fields
+    options = dict(usecols=list(fields) + [key for key in passthrough
+                                           if key not in fields])
+    dtype = dict((column, object) for column in options["usecols"])
+    given = kwargs.pop("dtype", None) or {}
+    dtype.update(given)
+    options.update(kwargs)
+    options["dtype"] = dtype
+    data = pd.read_csv(path, **options)
+    for key, validator in six.iteritems(fields):
+        if key not in given:
+            data[key] = convert_column(data[key], validator)
+    return data
@@ -0,0 +1,100 @@
+""" Validation of Dask DataFrames, one partition at a time. """
+from __future__ import unicode_literals
+
+import numpy as np
+import pandas as pd
+
+from .numeric import Numeric
+
+
+def is_dask_dataframe(obj):
+    """ Tells whether obj is a Dask DataFrame, without importing Dask. """
+    module = type(obj).__module__
+    return module.split(".")[0] in ("dask", "dask_expr") and \
+           hasattr(obj, "map_partitions")
+
+
+def validate_partition(cleaner_class, options, partition, dtypes):
+    """ Validates a pandas partition, numbering its verdicts from zero. The
+        cleaned columns are cast to dtypes, so that partitions without
+        valid rows or with differently typed passthrough columns match the
+        meta. """
+    cleaner = cleaner_class(partition, **options)
+    return cleaner.cleaned.astype(dtypes), cleaner.verdicts
+
+
+def cleaned_meta(cleaner, meta):
+    """ The meta of the cleaned partitions of a Cleaner created on the
+        meta of a Dask DataFrame: validated columns have the dtype of their
+        Numeric validator, or object for other validators and for fields
+        allowing missing values; passthrough columns keep their dtype. """
+    cleaned = cleaner.cleaned
+    dtypes = {}
+    for column in cleaned.columns:
+        validator = cleaner._fields.get(column)
+        if validator is None:
+            dtypes[column] = meta.dtypes[column] if column in meta.columns \
+                else np.dtype(object)
+        elif isinstance(validator, Numeric) and \
+                type(validator).validate is Numeric.validate and \
+                cleaner.get_null_policy(column) != "allow":
+            dtypes[column] = np.dtype(validator.dtype)
+        else:
+            dtypes[column] = np.dtype(object)
+    return cleaned.astype(dtypes)
+
+
+def offset_counter(verdicts, offset):
+    verdicts = verdicts.copy()
+    verdicts["counter"] += offset
+    return verdicts
+
+
+def verdict_meta(index, stages=False):
+    columns = ["valid", "reason", "description", "column", "counter"]
+    if stages:
+        columns.append("stage")
+    meta = pd.DataFrame(dict(valid=np.zeros(0, dtype=bool),
+                             reason=np.zeros(0, dtype=object),
+                             description=np.zeros(0, dtype=object),
+                             column=np.zeros(0, dtype=object),
+                             counter=np.zeros(0, dtype=np.int64),
+                             stage=np.zeros(0, dtype=object)),
+                        columns=columns)
+    meta.index = index[:0]
+    return meta
+
+
+def validate_dask(cleaner_class, original, verdict_counter=0, options=None):
+    """ Returns lazy Dask DataFrames (cleaned, verdicts) for a Dask DataFrame.
+
+        Every partition is validated once by a pandas Cleaner, even if both
+        results are computed. Verdict counters continue across partitions in
+        partition order, starting at verdict_counter, so they do not depend on
+        the scheduler. The cleaned partitions keep their own RangeIndex. """
+    import dask
+    import dask.dataframe as dd
+
+    if options is None:
+        options = {}
+    meta_cleaner = cleaner_class(original._meta, **options)
+    meta = cleaned_meta(meta_cleaner, original._meta)
+    dtypes = meta.dtypes.to_dict()
+
+    validated = [dask.delayed(validate_partition, pure=True)(
+                     cleaner_class, options, partition, dtypes)
+                 for partition in original.to_delayed()]
+
+    offsets = [verdict_counter]
+    for result in validated[:-1]:
+        offsets.append(offsets[-1] + dask.delayed(len)(result[1]))
+
+    cleaned = dd.from_delayed([result[0] for result in validated],
+                              meta=meta)
+    if not options.get("keep_verdicts", True):
+        return cleaned, None
+    verdicts = dd.from_delayed([dask.delayed(offset_counter)(result[1], offset)
+                                for result, offset in zip(validated, offsets)],
+                               meta=verdict_meta(original._meta.index,
+                                                 meta_cleaner.has_stages))
+    return cleaned, verdicts
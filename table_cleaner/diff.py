@@ -0,0 +1,231 @@
+""" Comparing the failures of two validation runs.
+
+    compare_runs tells which failures of the current run are new, which are
+    persisting from the previous run, and which failures of the previous run
+    are resolved, per column and reason:
+
+    diff = compare_runs(yesterday, today)
+    print(diff.summary)
+    diff.new        # verdicts of today's failures which yesterday had not
+
+    A failure is identified by a compact key, a 64-bit hash, and the
+    (column, reason) it failed. What is hashed depends on ``by``:
+
+    - "content" (the default): the value of the failing cell, so rows may
+      move between runs, and fixing one cell of a row leaves the failures
+      of its other cells persisting. Cells with the same value fail the same
+      way, so such a failure persists as long as any of them still fails.
+    - "index": the index label of the row, which also works for stored
+      verdicts without the data.
+    - a list of key columns, e.g. ["id"]: the values of these columns of
+      the row.
+
+    Runs are matched with sorted lookups on the hashes of every (column,
+    reason), never by merging DataFrames of Python objects. Columns are
+    hashed as they are, so both runs need to read the data the same way,
+    e.g. both with dtype=object. """
+from __future__ import unicode_literals
+import six
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .memory_map import is_windowed_source
+
+__all__ = ["compare_runs", "failure_keys", "QualityDiff"]
+
+bys = ("content", "index")
+
+
+def _check_by(by):
+    if isinstance(by, six.string_types):
+        if by not in bys:
+            raise ValueError("by must be one of %s or a list of columns, "
+                             "not %s." % (", ".join(bys), repr(by)))
+    elif len(by) == 0:
+        raise ValueError("by needs at least one key column.")
+
+
+def run_verdicts(run, data=None, by="content"):
+    """ Returns the verdicts and the data of a run, which is a Cleaner or a
+        verdicts DataFrame, e.g. from storage.load_verdicts. The rows of a
+        Cleaner over a windowed source are read window by window, and only
+        those with failures. """
+    if hasattr(run, "_fields"):
+        cleaner = run
+        if cleaner.sample is not None:
+            raise ValueError("A sampled run only validated part of its rows, "
+                             "so its failures cannot be compared.")
+        run = cleaner.verdicts
+        if data is None and by != "index" and run is not None:
+            data = cleaner._data
+            if is_windowed_source(data):
+                data = _failing_rows(cleaner, run)
+    if hasattr(run, "iter_batches"):
+        # Spilled verdicts, only the failures are needed
+        run = run.query(valid=False)
+    if run is None:
+        raise ValueError("The run has no verdicts, see keep_verdicts.")
+    return run, data
+
+
+def _failing_rows(cleaner, verdicts):
+    """ Reads the rows with invalid verdicts of a Cleaner over a windowed
+        source, whose verdicts are indexed by row positions. """
+    if hasattr(verdicts, "iter_batches"):
+        labels = verdicts.query(valid=False).index
+    else:
+        labels = verdicts.index[~np.asarray(verdicts["valid"], dtype=bool)]
+    positions = np.unique(np.asarray(labels, dtype=np.int64))
+    chunksize = cleaner._chunksize
+    frames = [cleaner.read_chunk(0, 0)]
+    for start in range(0, cleaner.rows_validated, chunksize):
+        rows = positions[(positions >= start) &
+                         (positions < start + chunksize)] - start
+        if len(rows):
+            frames.append(cleaner.read_chunk(start, start + chunksize)
+                          .iloc[rows])
+    return pd.concat(frames)
+
+
+def failure_keys(verdicts, data=None, by="content"):
+    """ Returns (hashes, columns, reasons) of the invalid verdicts, as
+        arrays. Unless by="index", the verdicts are hashed by the values of
+        their rows in data, whose index must contain the labels of the
+        verdicts: with by="content" the value of the failing cell, with a
+        list of columns the values of these columns. """
+    _check_by(by)
+    invalid = ~np.asarray(verdicts["valid"], dtype=bool)
+    labels = verdicts.index[invalid]
+    columns = np.asarray(verdicts["column"])[invalid]
+    reasons = np.asarray(verdicts["reason"])[invalid]
+    if isinstance(by, six.string_types) and by == "index":
+        hashes = pd.util.hash_pandas_object(pd.Series(labels), index=False)
+        return hashes.values, columns, reasons
+
+    if data is None:
+        raise ValueError("Hashing rows by their values needs their data.")
+    if not data.index.is_unique:
+        raise ValueError("Hashing rows by their values needs a unique "
+                         "index.")
+    positions = data.index.get_indexer(labels)
+    if (positions < 0).any():
+        raise ValueError("The data misses rows of the verdicts.")
+    if not isinstance(by, six.string_types):
+        missing = [key for key in by if key not in data.columns]
+        if missing:
+            raise ValueError("The data misses the key columns %s."
+                             % (", ".join(map(repr, missing)),))
+        row_hashes = pd.util.hash_pandas_object(data[list(by)], index=False)
+        return row_hashes.values[positions], columns, reasons
+
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    codes, names = pd.factorize(columns)
+    for code, name in enumerate(names):
+        if name not in data.columns:
+            raise ValueError("The data misses the column %s." % (repr(name),))
+        selected = codes == code
+        cells = data[name].iloc[positions[selected]]
+        hashes[selected] = pd.util.hash_pandas_object(cells,
+                                                      index=False).values
+    return hashes, columns, reasons
+
+
+def _group(columns, reasons):
+    """ Factorizes (column, reason) pairs: returns the pair number of every
+        verdict and the list of pairs. """
+    column_codes, column_values = pd.factorize(columns)
+    reason_codes, reason_values = pd.factorize(reasons)
+    n_reasons = max(len(reason_values), 1)
+    codes, uniques = pd.factorize(column_codes.astype(np.int64) * n_reasons +
+                                  reason_codes)
+    pairs = [(column_values[u // n_reasons], reason_values[u % n_reasons])
+             for u in uniques]
+    return codes, pairs
+
+
+def _positions(codes, n):
+    """ Positions of the verdicts of every pair number, in one sort. """
+    order = np.argsort(codes, kind="mergesort")
+    boundaries = np.searchsorted(codes[order], np.arange(1, n))
+    return np.split(order, boundaries)
+
+
+class QualityDiff(object):
+    """ The failures of two runs compared. ``summary`` has a row per
+        (column, reason) with the failures of both runs and how many of them
+        are new, resolved and persisting. ``new`` and ``persisting`` are the
+        invalid verdicts of the current run, ``resolved`` those of the
+        previous run, selected by the boolean masks ``new_mask`` etc. """
+
+    def __init__(self, previous, current, summary, new_mask, persisting_mask,
+                 resolved_mask):
+        self.previous = previous
+        self.current = current
+        self.summary = summary
+        self.new_mask = new_mask
+        self.persisting_mask = persisting_mask
+        self.resolved_mask = resolved_mask
+
+    def _invalid(self, verdicts):
+        return verdicts[~np.asarray(verdicts["valid"], dtype=bool)]
+
+    @property
+    def new(self):
+        return self._invalid(self.current)[self.new_mask]
+
+    @property
+    def persisting(self):
+        return self._invalid(self.current)[self.persisting_mask]
+
+    @property
+    def resolved(self):
+        return self._invalid(self.previous)[self.resolved_mask]
+
+
+def compare_runs(previous, current, previous_data=None, current_data=None,
+                 by="content"):
+    """ Compares the failures of two runs, each a Cleaner or a verdicts
+        DataFrame, matching them as described by ``by``, see failure_keys.
+        Cleaners bring their validated data along; for DataFrames it has to
+        be given unless by="index". """
+    _check_by(by)
+    previous, previous_data = run_verdicts(previous, previous_data, by)
+    current, current_data = run_verdicts(current, current_data, by)
+    before = failure_keys(previous, previous_data, by)
+    after = failure_keys(current, current_data, by)
+
+    before_codes, before_pairs = _group(before[1], before[2])
+    after_codes, after_pairs = _group(after[1], after[2])
+    pairs = list(OrderedDict.fromkeys(after_pairs + before_pairs))
+
+    before_groups = dict(zip(before_pairs,
+                             _positions(before_codes, len(before_pairs))))
+    after_groups = dict(zip(after_pairs,
+                            _positions(after_codes, len(after_pairs))))
+    empty = np.zeros(0, dtype=np.intp)
+
+    new_mask = np.zeros(len(after_codes), dtype=bool)
+    resolved_mask = np.zeros(len(before_codes), dtype=bool)
+    rows = []
+    for pair in pairs:
+        in_before = before_groups.get(pair, empty)
+        in_after = after_groups.get(pair, empty)
+        before_hashes = before[0][in_before]
+        after_hashes = after[0][in_after]
+        new = ~np.in1d(after_hashes, before_hashes)
+        resolved = ~np.in1d(before_hashes, after_hashes)
+        new_mask[in_after] = new
+        resolved_mask[in_before] = resolved
+        rows.append(OrderedDict([
+            ("column", pair[0]), ("reason", pair[1]),
+            ("before", len(before_hashes)), ("after", len(after_hashes)),
+            ("new", int(new.sum())), ("resolved", int(resolved.sum())),
+            ("persisting", int((~new).sum()))]))
+
+    summary = pd.DataFrame(rows, columns=["column", "reason", "before",
+                                          "after", "new", "resolved",
+                                          "persisting"])
+    return QualityDiff(previous, current, summary, new_mask, ~new_mask,
+                       resolved_mask)
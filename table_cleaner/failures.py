@@ -0,0 +1,140 @@
+""" Compact per-row record of the fields which failed validation.
+
+    A FailureMask holds one bit per field for every validated row: bit i is
+    set if the i-th field of the Cleaner had an invalid verdict on that row.
+    Up to 64 fields the bits of a row are one uint64; wider schemas are
+    packed into ceil(fields / 8) bytes per row. Either way it takes a few
+    bytes per row, where the verdicts DataFrame takes a row of Python
+    objects per verdict. """
+from __future__ import unicode_literals
+import six
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["FailureMask"]
+
+# Schemas up to this many fields get one uint64 per row.
+word_bits = 64
+
+
+class FailureMask(object):
+    """ Failed fields per row. ``fields`` are the field names in bit order,
+        ``index`` the labels of the validated rows and ``bits`` either a
+        uint64 array with one word per row or, for more than 64 fields, a
+        uint8 array of shape (rows, ceil(fields / 8)). """
+
+    def __init__(self, bits, fields, index):
+        self.bits = bits
+        self.fields = list(fields)
+        self.index = index
+
+    @classmethod
+    def empty(cls, fields, index):
+        n = len(index)
+        if len(fields) <= word_bits:
+            bits = np.zeros(n, dtype=np.uint64)
+        else:
+            bits = np.zeros((n, (len(fields) + 7) // 8), dtype=np.uint8)
+        return cls(bits, fields, index)
+
+    @classmethod
+    def from_results(cls, index, results):
+        """ Builds the mask of a chunk from the (key, ColumnVerdicts) pairs
+            of Cleaner.validate_fields. """
+        mask = cls.empty([key for key, result in results], index)
+        for i, (key, result) in enumerate(results):
+            word, shift = mask._word(i)
+            failed = ~np.asarray(result.valid, dtype=bool)
+            word |= failed.astype(word.dtype) << shift
+        return mask
+
+    @classmethod
+    def concat(cls, masks, fields):
+        if not masks:
+            return cls.empty(fields, pd.Index([]))
+        return cls(np.concatenate([mask.bits for mask in masks]), fields,
+                   masks[0].index.append([mask.index for mask in masks[1:]]))
+
+    def _word(self, i):
+        """ The word holding the bit of the i-th field, and its position. """
+        if self.bits.ndim == 1:
+            return self.bits, np.uint64(i)
+        return self.bits[:, i // 8], np.uint8(i % 8)
+
+    def _position(self, field):
+        try:
+            return self.fields.index(field)
+        except ValueError:
+            raise KeyError("%s is not a field." % (repr(field),))
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def failed(self, field):
+        """ Boolean array telling which rows failed the given field. """
+        word, shift = self._word(self._position(field))
+        return ((word >> shift) & 1).astype(bool)
+
+    def any_failed(self):
+        """ Boolean array telling which rows failed at least one field. """
+        if self.bits.ndim == 1:
+            return self.bits != 0
+        return self.bits.any(axis=1)
+
+    def select(self, all_of=(), any_of=(), none_of=()):
+        """ Boolean array of the rows which failed all fields of ``all_of``,
+            at least one of ``any_of`` (if given) and none of ``none_of``. """
+        selected = np.ones(len(self), dtype=bool)
+        for field in all_of:
+            selected &= self.failed(field)
+        if any_of:
+            selected &= np.logical_or.reduce([self.failed(field)
+                                              for field in any_of])
+        for field in none_of:
+            selected &= ~self.failed(field)
+        return selected
+
+    def rows(self, all_of=(), any_of=(), none_of=()):
+        """ Labels of the rows selected as in select(). """
+        return self.index[self.select(all_of, any_of, none_of)]
+
+    def filter(self, data, all_of=(), any_of=(), none_of=()):
+        """ The rows of data selected as in select(). data must be the
+            validated DataFrame, or have the same index. """
+        return data.loc[self.rows(all_of, any_of, none_of)]
+
+    def to_matrix(self):
+        """ Boolean array of shape (rows, fields). """
+        if not self.fields:
+            return np.zeros((len(self), 0), dtype=bool)
+        return np.column_stack([self.failed(field) for field in self.fields])
+
+    def combinations(self):
+        """ Series counting the rows per combination of failed fields, as
+            tuples of field names, most frequent first. Rows without
+            failures are not counted. """
+        failing = self.any_failed()
+        words, counts = np.unique(self.bits[failing], return_counts=True,
+                                  axis=0 if self.bits.ndim > 1 else None)
+        mask = FailureMask(words, self.fields, pd.RangeIndex(len(words)))
+        matrix = mask.to_matrix()
+        keys = [tuple(field for field, bit in six.moves.zip(self.fields, row)
+                      if bit)
+                for row in matrix]
+        result = pd.Series(counts, index=pd.Index(keys, tupleize_cols=False),
+                           dtype=np.int64)
+        return result.sort_values(ascending=False, kind="mergesort")
+
+    def to_frame(self):
+        """ Long DataFrame with a row per failed (row, field), indexed by
+            row label and ordered by row, then by field. """
+        matrix = self.to_matrix()
+        rows, fields = np.nonzero(matrix)
+        return pd.DataFrame(dict(column=np.asarray(self.fields,
+                                                   dtype=object)[fields]),
+                            index=self.index[rows])
@@ -0,0 +1,304 @@
+""" Inferring a Cleaner from sample data.
+
+    infer_schema looks at a bounded sample of rows and picks the narrowest
+    validator every value of a column passes, trying in this order:
+
+    * Bool, if every value is one of the default true or false spellings
+      and not just the numbers 0 and 1,
+    * Int8, Int16, Int32 or Int64 for integers, Float32 if every value is
+      exactly representable as a float32, Float64 otherwise,
+    * Email, if every value is a valid e-mail address,
+    * Choice, for columns with few distinct values which repeat,
+    * Regex, if all values have the same shape of digits, letters and
+      punctuation, e.g. ^[A-Z]{2}\\d{3,4}$,
+    * String, with the observed length bounds.
+
+    Numeric validators get the observed minimum and maximum as bounds unless
+    ``bounds`` is False. Missing values are left out, and columns which have
+    any get an "allow" null policy.
+
+    The resulting InferredSchema can be turned into a Cleaner subclass,
+    either as Python source code to edit and keep, or as a class to use right
+    away:
+
+    schema = infer_schema(pd.read_csv(path, dtype=object, chunksize=10000))
+    print(schema.to_source("VendorCleaner"))
+    VendorCleaner = schema.to_class("VendorCleaner") """
+from __future__ import unicode_literals
+import six
+
+import keyword
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import validators
+from .bool import default_true_values, default_false_values
+from .memory_map import is_windowed_source
+from .utils import force_text
+
+__all__ = ["infer_schema", "InferredSchema"]
+
+default_sample_rows = 10000
+
+integer_validators = ["Int8", "Int16", "Int32", "Int64"]
+
+# Character classes of Regex candidates
+character_classes = [(re.compile(r"\d+"), r"\d"),
+                     (re.compile(r"[A-Z]+"), r"[A-Z]"),
+                     (re.compile(r"[a-z]+"), r"[a-z]")]
+
+
+class InferredSchema(object):
+    """ The inferred validators of the columns of a table. ``fields`` maps
+        column names to (validator name, keyword arguments), in column
+        order, and ``null_policy`` holds the columns with missing values. """
+
+    def __init__(self, fields, null_policy, rows):
+        self.fields = fields
+        self.null_policy = null_policy
+        self.rows = rows
+
+    def __repr__(self):
+        return "InferredSchema(%s)" % (", ".join(
+            "%s=%s" % (name, validator)
+            for name, (validator, kwargs) in six.iteritems(self.fields)),)
+
+    def validator(self, name):
+        """ Creates the validator of a column. """
+        validator, kwargs = self.fields[name]
+        return getattr(validators, validator)(**kwargs)
+
+    def check_names(self):
+        """ Columns may be named like options of the Cleaner, except for
+            the null_policy option the class sets itself. """
+        if self.null_policy and "null_policy" in self.fields:
+            raise ValueError("A column named 'null_policy' cannot be "
+                             "declared together with the null policy of "
+                             "the columns %s; rename the column first."
+                             % (", ".join(map(repr, self.null_policy)),))
+
+    def to_class(self, name="InferredCleaner"):
+        """ Creates a Cleaner subclass with the inferred validators. """
+        from .cleaner import Cleaner
+        self.check_names()
+        namespace = OrderedDict((column, self.validator(column))
+                                for column in self.fields)
+        if self.null_policy:
+            namespace["null_policy"] = dict(self.null_policy)
+        return type(str(name), (Cleaner,), dict(namespace))
+
+    def to_source(self, name="InferredCleaner"):
+        """ Returns the Python source code of a Cleaner subclass with the
+            inferred validators. """
+        self.check_names()
+        used = sorted(set(validator for validator, kwargs
+                          in self.fields.values()))
+        lines = ["from table_cleaner.cleaner import %s"
+                 % ", ".join(["Cleaner"] + used), "", "",
+                 "class %s(Cleaner):" % (name,),
+                 '    """ Inferred from a sample of %i rows. """' % self.rows]
+        for column, (validator, kwargs) in six.iteritems(self.fields):
+            call = "%s(%s)" % (validator, ", ".join(
+                "%s=%s" % (key, _literal(value))
+                for key, value in six.iteritems(kwargs)))
+            if _is_identifier(column):
+                lines.append("    %s = %s" % (column, call))
+            else:
+                # Columns which are no Python names
+                lines.append("    locals()[%s] = %s" % (_literal(column),
+                                                        call))
+        if self.null_policy:
+            lines.append("    null_policy = %s" % _literal(self.null_policy))
+        return "\n".join(lines) + "\n"
+
+
+def _is_identifier(name):
+    return isinstance(name, six.string_types) and \
+        re.match(r"^[A-Za-z_][A-Za-z0-9_]*$", name) is not None and \
+        not keyword.iskeyword(name)
+
+
+def _literal(value):
+    """ Python source of a value, without the u prefix of Python 2. """
+    if isinstance(value, dict):
+        return "{%s}" % ", ".join("%s: %s" % (_literal(k), _literal(v))
+                                  for k, v in six.iteritems(value))
+    if isinstance(value, (list, tuple)):
+        return "[%s]" % ", ".join(_literal(v) for v in value)
+    if isinstance(value, six.text_type):
+        return repr(value).lstrip("u")
+    if isinstance(value, np.generic):
+        value = value.item()
+    return repr(value)
+
+
+def draw_rows(data, sample_rows, random_state=None):
+    """ Returns at most sample_rows rows of data: a random sample of a
+        DataFrame, the first rows of a windowed source, or the first chunks
+        of an iterable of DataFrames, e.g. pd.read_csv with a chunksize. """
+    if isinstance(data, pd.DataFrame):
+        if len(data) > sample_rows:
+            data = data.sample(sample_rows, random_state=random_state)
+        return data
+    if is_windowed_source(data):
+        return data.window(0, min(sample_rows, len(data)))
+    chunks = []
+    rows = 0
+    for chunk in data:
+        chunks.append(chunk.iloc[:sample_rows - rows])
+        rows += len(chunks[-1])
+        if rows >= sample_rows:
+            break
+    return pd.concat(chunks)
+
+
+def infer_schema(data, sample_rows=default_sample_rows, bounds=True,
+                 max_choices=20, random_state=None):
+    """ Infers the validators of all columns of data from at most
+        sample_rows rows, see draw_rows. Columns with at most max_choices
+        distinct values, each seen twice on average, become a Choice. """
+    sample = draw_rows(data, sample_rows, random_state)
+    fields = OrderedDict()
+    null_policy = OrderedDict()
+    for column in sample.columns:
+        values = sample[column]
+        missing = values.isna()
+        if missing.any():
+            null_policy[column] = "allow"
+        fields[column] = infer_validator(values[~missing], bounds=bounds,
+                                         max_choices=max_choices)
+    return InferredSchema(fields, null_policy, len(sample))
+
+
+def infer_validator(values, bounds=True, max_choices=20):
+    """ Returns (validator name, keyword arguments) for the narrowest
+        validator accepting all values, which must not be missing. """
+    if len(values) == 0:
+        return "String", OrderedDict()
+    texts = [force_text(value) for value in values.values]
+    for infer in (_infer_bool, _infer_numeric, _infer_email):
+        result = infer(values, texts, bounds)
+        if result is not None:
+            return result
+    distinct = set(texts)
+    if len(distinct) <= max_choices and len(texts) >= 2 * len(distinct):
+        choices = sorted(set(values.values), key=lambda value: (
+            type(value).__name__, value))
+        return "Choice", OrderedDict(choices=[_python(value)
+                                              for value in choices])
+    regex = _infer_regex(texts)
+    if regex is not None:
+        return "Regex", OrderedDict(regex=regex)
+    lengths = [len(text) for text in texts]
+    return "String", OrderedDict([("min_length", min(lengths)),
+                                  ("max_length", max(lengths))])
+
+
+def _python(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _accepts(validator, values):
+    return all(verdict.valid for value in values
+               for verdict in validator.validate(value))
+
+
+def _infer_bool(values, texts, bounds):
+    if values.dtype == bool:
+        return "Bool", OrderedDict()
+    vocabulary = set(force_text(value) for value in
+                     default_true_values + default_false_values)
+    distinct = set(texts)
+    if distinct.issubset(vocabulary) and not distinct.issubset(["0", "1"]):
+        return "Bool", OrderedDict()
+    return None
+
+
+def _infer_numeric(values, texts, bounds):
+    if values.dtype.kind in "iuf":
+        numbers = values.values.astype(np.float64)
+    elif values.dtype.kind == "O":
+        numbers = pd.to_numeric(values, errors="coerce").values
+        numbers = numbers.astype(np.float64)
+        if np.isnan(numbers).any():
+            return None
+    else:
+        return None
+    if not np.isfinite(numbers).all():
+        return None
+
+    if (numbers == np.trunc(numbers)).all() and \
+            _accepts(validators.Int64(), values.values):
+        integers = [int(value) for value in values.values]
+        low, high = min(integers), max(integers)
+        for name in integer_validators:
+            info = np.iinfo(getattr(validators, name).dtype)
+            if info.min <= low and high <= info.max:
+                break
+        return name, _bounds(bounds, low, high)
+
+    with np.errstate(over="ignore"):
+        name = "Float32" if (numbers.astype(np.float32) == numbers).all() \
+            else "Float64"
+    if not _accepts(getattr(validators, name)(), values.values):
+        return None
+    return name, _bounds(bounds, float(numbers.min()), float(numbers.max()))
+
+
+def _bounds(bounds, low, high):
+    if not bounds:
+        return OrderedDict()
+    return OrderedDict([("min_value", low), ("max_value", high)])
+
+
+def _infer_email(values, texts, bounds):
+    if all("@" in text for text in texts) and \
+            _accepts(validators.Email(), texts):
+        return "Email", OrderedDict()
+    return None
+
+
+def _shape(text):
+    """ Splits text into runs of digits, upper and lower case letters and
+        single other characters, as (class, run length) pairs. """
+    shape = []
+    position = 0
+    while position < len(text):
+        for regex, name in character_classes:
+            match = regex.match(text, position)
+            if match:
+                shape.append((name, match.end() - position))
+                position = match.end()
+                break
+        else:
+            shape.append((re.escape(text[position]), 1))
+            position += 1
+    return shape
+
+
+def _infer_regex(texts):
+    """ A regular expression matching all texts if they have the same
+        sequence of at least two character classes, or None. """
+    shapes = [_shape(text) for text in texts]
+    classes = set(tuple(name for name, length in shape) for shape in shapes)
+    if len(classes) != 1:
+        return None
+    classes = classes.pop()
+    if len(classes) < 2:
+        return None
+    parts = []
+    for i, name in enumerate(classes):
+        lengths = [shape[i][1] for shape in shapes]
+        low, high = min(lengths), max(lengths)
+        if high == 1:
+            parts.append(name)
+        elif low == high:
+            parts.append("%s{%i}" % (name, low))
+        else:
+            parts.append("%s{%i,%i}" % (name, low, high))
+    return "^%s$" % "".join(parts)
@@ -0,0 +1,179 @@
+""" Single-pass kernels for vectorized validation.
+
+    Every kernel checks a whole column in one loop and writes its results
+    into preallocated arrays: converted values and a result code per cell.
+    If Numba is installed, the loops are compiled on first use; otherwise, or
+    if ``use_numba`` is set to False, equivalent NumPy expressions are used.
+"""
+from __future__ import unicode_literals
+import math
+
+import numpy as np
+
+use_numba = True
+
+# Compiled loops by name, None if Numba is not installed
+_compiled = {}
+
+# Result codes
+VALID = 0
+NOT_CONVERTIBLE = 1
+OUT_OF_RANGE = 2
+TOO_LOW = 3
+TOO_HIGH = 4
+DECODING_ERROR = 5
+TOO_SHORT = 6
+TOO_LONG = 7
+
+# Target dtypes the compiled numeric kernel handles. Others, like float16
+# which Numba doesn't support, use the NumPy implementation.
+numba_numeric_dtypes = (np.int8, np.int16, np.int32, np.int64, np.uint8,
+                        np.uint16, np.uint32, np.float32, np.float64)
+
+
+def _numeric_loop(values, out, codes, to_int, check_bounds, lower, upper,
+                  check_min, min_value, check_max, max_value):
+    for i in range(values.shape[0]):
+        x = values[i]
+        if to_int:
+            if x != x:
+                codes[i] = NOT_CONVERTIBLE
+                continue
+            if check_bounds:
+                t = np.trunc(x)
+                if t < lower or t >= upper:
+                    codes[i] = OUT_OF_RANGE
+                    continue
+            out[i] = x
+        else:
+            out[i] = x
+            if math.isinf(out[i]) and not math.isinf(float(x)):
+                codes[i] = OUT_OF_RANGE
+                continue
+        if check_min and out[i] < min_value:
+            codes[i] = TOO_LOW
+        elif check_max and out[i] > max_value:
+            codes[i] = TOO_HIGH
+
+
+def _length_loop(lengths, codes, min_length, max_length):
+    for i in range(lengths.shape[0]):
+        n = lengths[i]
+        if n < 0:
+            codes[i] = DECODING_ERROR
+        elif min_length > 0 and n < min_length:
+            codes[i] = TOO_SHORT
+        elif max_length > 0 and n > max_length:
+            codes[i] = TOO_LONG
+
+
+def compiled(function):
+    """ Returns function compiled with Numba, or None if Numba is not
+        installed or switched off. Numba is imported on first use only, as
+        importing it takes a while. The compiled loops release the GIL, so
+        a Cleaner with several threads runs them in parallel. """
+    if not use_numba:
+        return None
+    name = function.__name__
+    if name not in _compiled:
+        try:
+            import numba
+        except ImportError:
+            _compiled[name] = None
+        else:
+            _compiled[name] = numba.njit(cache=True, nogil=True)(function)
+    return _compiled[name]
+
+
+def integer_bounds(dtype):
+    """ Returns the bounds [lower, upper) of an integer dtype as floats. Both
+        are powers of two and therefore exact. """
+    info = np.iinfo(dtype)
+    return float(info.min), float(info.max) + 1.0
+
+
+def _numeric_numpy(values, dtype, min_value, max_value):
+    out = np.zeros(len(values), dtype=dtype)
+    codes = np.zeros(len(values), dtype=np.int8)
+    if issubclass(dtype, np.integer):
+        source_kind = values.dtype.kind
+        if source_kind == "f":
+            nan = np.isnan(values)
+            codes[nan] = NOT_CONVERTIBLE
+            lower, upper = integer_bounds(dtype)
+            with np.errstate(invalid="ignore"):
+                truncated = np.trunc(values)
+                out_of_range = ~nan & ((truncated < lower) |
+                                       (truncated >= upper))
+        else:
+            info = np.iinfo(dtype)
+            source = np.iinfo(values.dtype)
+            out_of_range = np.zeros(len(values), dtype=bool)
+            if source.min < info.min:
+                out_of_range |= values < max(info.min, source.min)
+            if source.max > info.max:
+                out_of_range |= values > min(info.max, source.max)
+        codes[out_of_range] = OUT_OF_RANGE
+        ok = codes == VALID
+        out[ok] = values[ok]
+    else:
+        with np.errstate(over="ignore"):
+            out[:] = values
+        codes[np.isinf(out) & ~np.isinf(values.astype(np.float64))] = \
+                OUT_OF_RANGE
+
+    ok = codes == VALID
+    if min_value is not None:
+        codes[ok & (out < min_value)] = TOO_LOW
+    ok = codes == VALID
+    if max_value is not None:
+        codes[ok & (out > max_value)] = TOO_HIGH
+    return out, codes
+
+
+def numeric_codes(values, dtype, min_value=None, max_value=None):
+    """ Converts a numeric array to dtype and checks the range of the
+        results. Returns the converted values and the result codes. """
+    if values.dtype.kind == "b":
+        values = values.astype(np.uint8)
+    loop = None
+    if dtype in numba_numeric_dtypes and values.dtype.kind in "iuf" and \
+            values.dtype != np.uint64 and values.dtype != np.float16:
+        loop = compiled(_numeric_loop)
+    if loop is None:
+        return _numeric_numpy(values, dtype, min_value, max_value)
+
+    to_int = issubclass(dtype, np.integer)
+    lower, upper = 0.0, 0.0
+    check_bounds = False
+    if to_int:
+        lower, upper = integer_bounds(dtype)
+        check_bounds = values.dtype.kind == "f" or \
+            np.iinfo(values.dtype).min < np.iinfo(dtype).min or \
+            np.iinfo(values.dtype).max > np.iinfo(dtype).max
+    out = np.zeros(len(values), dtype=dtype)
+    codes = np.zeros(len(values), dtype=np.int8)
+    loop(values, out, codes, to_int, check_bounds, lower, upper,
+                  min_value is not None,
+                  0.0 if min_value is None else float(min_value),
+                  max_value is not None,
+                  0.0 if max_value is None else float(max_value))
+    return out, codes
+
+
+def length_codes(lengths, min_length=0, max_length=-1):
+    """ Checks an array of string lengths, where -1 marks strings which
+        could not be decoded. Returns the result codes. """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    codes = np.zeros(len(lengths), dtype=np.int8)
+    loop = compiled(_length_loop)
+    if loop is not None:
+        loop(lengths, codes, min_length, max_length)
+        return codes
+
+    codes[lengths < 0] = DECODING_ERROR
+    if min_length > 0:
+        codes[(codes == VALID) & (lengths < min_length)] = TOO_SHORT
+    if max_length > 0:
+        codes[(codes == VALID) & (lengths > max_length)] = TOO_LONG
+    return codes
@@ -0,0 +1,210 @@
+""" Memory-mapped inputs and outputs for tables larger than memory.
+
+    A Cleaner validates a windowed source window by window: only the rows
+    of the current window are turned into a DataFrame, the rest of the file
+    stays on disk and is paged in and out by the operating system. Sources
+    are Arrow IPC files (Feather version 2) opened with pyarrow.memory_map,
+    and NumPy arrays memory-mapped from .npy files or np.memmap column files.
+
+    The cleaned rows can be written to an Arrow IPC file with
+    ArrowFileWriter as they are produced, and memory-mapped again with
+    ArrowFileSource. """
+from __future__ import unicode_literals
+import six
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .storage import _require_pyarrow, encode_cleaned
+
+__all__ = ["WindowedSource", "ArrowFileSource", "NumpySource",
+           "ArrowFileWriter", "open_source", "is_windowed_source"]
+
+arrow_extensions = (".arrow", ".feather", ".ipc")
+
+
+class WindowedSource(object):
+    """ Abstract base class of tables which are read window by window. """
+
+    @property
+    def columns(self):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def window(self, start, stop):
+        """ Returns rows [start, stop) as a DataFrame indexed by their row
+            numbers. """
+        raise NotImplementedError()
+
+    def to_pandas(self):
+        """ Reads the whole table into memory. """
+        return self.window(0, len(self))
+
+    @property
+    def shape(self):
+        return (len(self), len(self.columns))
+
+
+class ArrowFileSource(WindowedSource):
+    """ An Arrow IPC file, memory-mapped. Windows are assembled from the
+        record batches they overlap, so only those batches are read, and
+        uncompressed batches are not even copied. A ``temporary`` file is
+        removed together with its directory when the source is closed. """
+
+    def __init__(self, path, temporary=False):
+        pa = _require_pyarrow()
+        self.path = path
+        self.temporary = temporary
+        self.mmap = pa.memory_map(path, "r")
+        self.reader = pa.ipc.open_file(self.mmap)
+        lengths = [self.reader.get_batch(i).num_rows
+                   for i in range(self.reader.num_record_batches)]
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)])\
+                         .astype(np.int64)
+
+    @property
+    def columns(self):
+        return list(self.reader.schema.names)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def window(self, start, stop):
+        import pyarrow as pa
+        stop = min(stop, len(self))
+        start = min(start, stop)
+        first = max(np.searchsorted(self.offsets, start, side="right") - 1, 0)
+        last = np.searchsorted(self.offsets, stop, side="left")
+        last = min(last, self.reader.num_record_batches)
+        batches = [self.reader.get_batch(i) for i in range(first, last)]
+        table = pa.Table.from_batches(batches, schema=self.reader.schema)
+        table = table.slice(start - self.offsets[first], stop - start)
+        frame = table.to_pandas()
+        frame.index = pd.RangeIndex(start, stop)
+        return frame
+
+    def to_arrow(self):
+        """ Returns the whole file as a pyarrow Table backed by the memory
+            map. """
+        return self.reader.read_all()
+
+    def close(self):
+        if self.mmap.closed:
+            return
+        self.mmap.close()
+        if self.temporary:
+            shutil.rmtree(os.path.dirname(self.path), ignore_errors=True)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class NumpySource(WindowedSource):
+    """ A table of one-dimensional NumPy arrays of equal length, given as an
+        ordered mapping or list of (name, array) pairs. Arrays may be paths
+        of .npy files, which are memory-mapped, or np.memmap objects of raw
+        column files. """
+
+    def __init__(self, columns):
+        if isinstance(columns, dict):
+            columns = six.iteritems(columns)
+        self.arrays = OrderedDict()
+        for name, array in columns:
+            if isinstance(array, six.string_types):
+                array = np.load(array, mmap_mode="r")
+            if array.ndim != 1:
+                raise ValueError("Column %s is not one-dimensional."
+                                 % (repr(name),))
+            self.arrays[name] = array
+        lengths = set(len(array) for array in self.arrays.values())
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length.")
+        self.length = lengths.pop() if lengths else 0
+
+    @property
+    def columns(self):
+        return list(self.arrays)
+
+    def __len__(self):
+        return self.length
+
+    def window(self, start, stop):
+        stop = min(stop, len(self))
+        start = min(start, stop)
+        return pd.DataFrame(OrderedDict(
+                (name, np.asarray(array[start:stop]))
+                for name, array in six.iteritems(self.arrays)),
+            columns=self.columns, index=pd.RangeIndex(start, stop))
+
+
+class ArrowFileWriter(object):
+    """ Appends DataFrames to an uncompressed Arrow IPC file, one record
+        batch per DataFrame, or with format="parquet" to a Parquet file, one
+        row group per DataFrame. The schema is taken from the first one with
+        rows. """
+
+    formats = ("arrow", "parquet")
+
+    def __init__(self, path, format="arrow"):
+        if format not in self.formats:
+            raise ValueError("format must be one of %s, not %s."
+                             % (", ".join(self.formats), repr(format)))
+        self.path = path
+        self.format = format
+        self.writer = None
+        self.schema = None
+        self.empty = None
+
+    def write(self, frame):
+        if self.writer is None and len(frame) == 0:
+            # Columns of empty frames have no type yet, so the schema is
+            # taken from the first rows. The file is only written from an
+            # empty frame if no rows follow.
+            if self.empty is None:
+                self.empty = frame
+            return
+        self.write_table(frame)
+
+    def write_table(self, frame):
+        pa = _require_pyarrow()
+        table = pa.Table.from_pandas(encode_cleaned(frame),
+                                     preserve_index=False)
+        if self.writer is None:
+            self.schema = table.schema
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, self.schema)
+        self.writer.write_table(table.cast(self.schema))
+
+    def close(self):
+        if self.writer is None and self.empty is not None:
+            self.write_table(self.empty)
+        if self.writer is not None:
+            self.writer.close()
+
+
+def is_windowed_source(obj):
+    return isinstance(obj, WindowedSource)
+
+
+def open_source(source):
+    """ Opens the path of an Arrow IPC file as ArrowFileSource and a mapping
+        of column names to arrays or .npy paths as NumpySource. """
+    if is_windowed_source(source):
+        return source
+    if isinstance(source, six.string_types):
+        if source.lower().endswith(arrow_extensions):
+            return ArrowFileSource(source)
+        raise ValueError("%s is not an Arrow IPC file (%s)."
+                         % (repr(source), ", ".join(arrow_extensions)))
+    return NumpySource(source)
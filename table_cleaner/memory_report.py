@@ -0,0 +1,119 @@
+""" Memory accounting of a validation run.
+
+    A MemoryReport records, for every stage of a Cleaner (the input, the
+    validation pass and each field within it, the cleaned and the verdicts
+    DataFrames), how much memory the stage allocated at its peak and how
+    much it retained when it finished, measured with tracemalloc, and the
+    deep size of the DataFrame it produced. Other steps can be measured
+    with track(), e.g. building a MarkupFrame:
+
+    cleaner = MyCleaner(data, profile_memory=True)
+    with cleaner.memory_report.track("markup"):
+        markup = MarkupFrame.from_validation(data, cleaner.verdicts)
+    print(cleaner.memory_report.to_frame())
+
+    tracemalloc is started when the first stage begins, unless it is running
+    already, and stopped when no stage is running any more. It only sees
+    memory allocated through Python, which includes NumPy arrays. Peaks are
+    measured from Python 3.9 on (tracemalloc.reset_peak) and None before. """
+from __future__ import unicode_literals
+import six
+
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+__all__ = ["MemoryReport", "frame_bytes"]
+
+
+def frame_bytes(frame):
+    """ Deep memory usage of a DataFrame, or None for anything else. """
+    if not isinstance(frame, pd.DataFrame):
+        return None
+    return int(frame.memory_usage(deep=True).sum())
+
+
+class StageRecord(object):
+    """ Memory of one stage, summed over all times it ran. """
+
+    def __init__(self, stage, field):
+        self.stage = stage
+        self.field = field
+        self.calls = 0
+        self.peak = None
+        self.retained = 0
+        self.bytes = None
+
+    def as_dict(self):
+        return OrderedDict([("stage", self.stage), ("field", self.field),
+                            ("calls", self.calls), ("peak", self.peak),
+                            ("retained", self.retained),
+                            ("bytes", self.bytes)])
+
+
+class MemoryReport(object):
+    """ Peak and retained memory per stage and per field, in bytes. """
+
+    columns = ["stage", "field", "calls", "peak", "retained", "bytes"]
+
+    def __init__(self):
+        self.records = OrderedDict()
+        # Absolute peaks of the running stages, outermost first
+        self.running = []
+        self.started_tracing = False
+
+    def record(self, stage, field=None):
+        key = (stage, field)
+        if key not in self.records:
+            self.records[key] = StageRecord(stage, field)
+        return self.records[key]
+
+    def set_bytes(self, stage, frame, field=None):
+        """ Records the deep size of the DataFrame a stage produced. """
+        self.record(stage, field).bytes = frame_bytes(frame)
+
+    @contextmanager
+    def track(self, stage, field=None):
+        """ Measures the memory allocated while the block runs. Stages may be
+            nested; the peak of an inner stage counts for the outer ones. """
+        record = self.record(stage, field)
+        if not self.running and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        can_reset = hasattr(tracemalloc, "reset_peak")
+        before, peak = tracemalloc.get_traced_memory()
+        if self.running:
+            self.running[-1] = max(self.running[-1], peak)
+        if can_reset:
+            tracemalloc.reset_peak()
+        self.running.append(before)
+        try:
+            yield record
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.running.pop())
+            if self.running:
+                # The reset hid this peak from the enclosing stage.
+                self.running[-1] = max(self.running[-1], peak)
+            record.calls += 1
+            record.retained += current - before
+            if can_reset:
+                record.peak = max(record.peak or 0, peak - before)
+            if not self.running and self.started_tracing:
+                tracemalloc.stop()
+                self.started_tracing = False
+
+    def to_frame(self):
+        """ The report as a DataFrame with a row per stage and field. """
+        return pd.DataFrame([record.as_dict()
+                             for record in self.records.values()],
+                            columns=self.columns)
+
+    def __repr__(self):
+        return "MemoryReport(%s)" % ", ".join(
+            "%s%s: peak=%s" % (record.stage,
+                               "" if record.field is None
+                               else "[%s]" % (record.field,), record.peak)
+            for record in self.records.values())
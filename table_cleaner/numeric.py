@@ -1,11 +1,34 @@
 from __future__ import unicode_literals
+import re
+import sys
 import numpy as np
-from .validator import Validator, Verdict
+from .validator import Validator, Verdict, ColumnVerdicts
+from . import kernels
 import six
 
-numeric_dtypes = sum([values for key, values in \
-                    six.iteritems(np.sctypes)
-    if key !="others"], [])
+_numeric_dtypes = None
+
+
+def get_numeric_dtypes():
+    """ Returns the list of numeric numpy scalar types. It is computed on
+        first use rather than at import time. """
+    global _numeric_dtypes
+    if _numeric_dtypes is None:
+        _numeric_dtypes = sum([values for key, values in \
+                            six.iteritems(np.sctypes)
+            if key !="others"], [])
+    return _numeric_dtypes
+
+
+def __getattr__(name):
+    # numeric_dtypes used to be a module level list
+    if name == "numeric_dtypes":
+        return get_numeric_dtypes()
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    numeric_dtypes = get_numeric_dtypes()
 
 all_names = ['Numeric', 'Int', 'Int8', 'Int16', 'Int32', 'Int64', 'Float16', 'Float32', 'Float64',
            'Float128', 'Uint8', 'Uint16', 'Uint32', 'Uint64', 'Complex64',
@@ -13,22 +36,135 @@ all_names = ['Numeric', 'Int', 'Int8', 'Int16', 'Int32', 'Int64', 'Float16', 'Fl
 
 __all__ = all_names
 
+
+class NumberFormat(object):
+    """ A parsing profile for numbers written as text, e.g. in a European
+        locale:
+
+        Float64(number_format=NumberFormat(decimal=",", thousands=".",
+                                           currency=["EUR"], percent=True))
+
+        accepts "1.234,56", " 42 ", "12 EUR" and "12%" (as 0.12). Thousands
+        separators must group the digits by three. Texts which do not look
+        like such a number are converted as they are, e.g. "nan", unless
+        they contain the thousands separator, or a "." where the decimal
+        separator is something else; those are not convertible.
+
+        ``strip`` removes surrounding whitespace, ``currency`` is a list of
+        symbols allowed before or after the number, and with ``percent`` a
+        trailing "%" divides the number by 100, which needs a floating point
+        dtype. """
+
+    def __init__(self, decimal=".", thousands=None, strip=True, currency=(),
+                 percent=False):
+        if not decimal or decimal == thousands:
+            raise ValueError("The decimal separator must be given and differ "
+                             "from the thousands separator.")
+        self.decimal = decimal
+        self.thousands = thousands
+        self.strip = strip
+        self.currency = list(currency)
+        self.percent = percent
+
+        integer = r"\d+"
+        if thousands:
+            integer = r"\d{1,3}(?:%s\d{3})+|\d+" % (re.escape(thousands),)
+        space = r"\s*" if strip else ""
+        symbols = "|".join(re.escape(symbol) for symbol in self.currency)
+        prefix = suffix = ""
+        if self.currency:
+            prefix = r"(?:(?:%s)\s*)?" % (symbols,)
+            suffix = r"(?:\s*(?:%s))?" % (symbols,)
+        self.number_regex = re.compile(
+            r"^%s%s(?P<sign>[+-]?)(?P<integer>%s)(?:%s(?P<fraction>\d*))?"
+            r"(?P<exponent>[eE][+-]?\d+)?%s(?P<percent>%s)?%s$"
+            % (space, prefix, integer, re.escape(decimal), suffix,
+               r"\s*%" if percent else "(?!)", space))
+
+    def __repr__(self):
+        return "NumberFormat(decimal=%r, thousands=%r, strip=%r, " \
+               "currency=%r, percent=%r)" % (self.decimal, self.thousands,
+                                             self.strip, self.currency,
+                                             self.percent)
+
+    def rejects(self, text):
+        """ Whether a text which is not a number of this format has to be
+            rejected instead of being converted as it is. """
+        return (bool(self.thousands) and self.thousands in text) or \
+               (self.decimal != "." and ("." in text or self.decimal in text))
+
+    def canonical(self, sign, integer, fraction, exponent):
+        if self.thousands:
+            integer = integer.replace(self.thousands, "")
+        return sign + integer + ("" if fraction is None else "." + fraction) \
+            + (exponent or "")
+
+    def parse(self, text):
+        """ Returns the text of a number in Python syntax, or None if text
+            is not convertible, and whether it was a percentage. """
+        match = self.number_regex.search(text)
+        if match is None:
+            if self.strip:
+                text = text.strip()
+            return (None if self.rejects(text) else text), False
+        return self.canonical(*match.group("sign", "integer", "fraction",
+                                           "exponent")), \
+            match.group("percent") is not None
+
+    def parse_column(self, texts, dtype):
+        """ Converts the numbers of this format among a Series of texts to
+            dtype at once, with the same results as parse. Returns a boolean
+            mask of these texts and their values as an int64 or float64
+            array. Other texts, like "nan", are left to parse. Every
+            distinct text is only parsed once. """
+        codes, uniques = texts.factorize()
+        texts = type(texts)(np.asarray(uniques, dtype=object), dtype=object)
+        parts = texts.str.extract(self.number_regex)
+        integer = parts["integer"]
+        matched = integer.notna().values
+        fraction = parts["fraction"]
+        exponent = parts["exponent"]
+        integral = issubclass(dtype, np.integer)
+        if integral:
+            matched &= (fraction.isna() & exponent.isna()).values
+        if self.thousands:
+            integer = integer.str.replace(self.thousands, "", regex=False)
+        canonical = parts["sign"] + integer + \
+            ("." + fraction).where(fraction.notna(), "") + \
+            exponent.fillna("")
+        numbers = np.zeros(len(texts), dtype=np.int64 if integral
+                           else np.float64)
+        try:
+            numbers[matched] = canonical.values[matched].astype(numbers.dtype)
+        except (ValueError, TypeError, OverflowError):
+            # E.g. integers beyond int64, left to parse
+            return np.zeros(len(codes), dtype=bool), numbers[:0]
+        if not integral:
+            numbers[parts["percent"].notna().values & matched] /= 100.0
+        matched = matched[codes]
+        return matched, numbers[codes][matched]
+
+
 class Numeric(Validator):
     """ Validates numeric values. This is a base class which should not be
         instantiated on its own. Every subclass needs to override the dtype
         property which controls how values are validated and the dtype of the
-        validated value."""
+        validated value.
+
+        With a NumberFormat as ``number_format``, texts are parsed according
+        to it, e.g. with a decimal comma. """
 
     dtype = None
+    number_format = None
 
-    def __init__(self, min_value=None, max_value=None):
+    def __init__(self, min_value=None, max_value=None, number_format=None):
         if self.dtype is None:
             raise ValueError("dtype property needs to be set to a particular"+
                              "numpy dtype. Probably you tried to use the"+
                              "Numeric abstract baseclass instead of one of"+
                              "its specific subclasses.")
 
-        if not (self.dtype in numeric_dtypes):
+        if not (self.dtype in get_numeric_dtypes()):
             raise ValueError("dtype property must be set to numeric dtype. "+
                              "%s is not considered to be a numeric dtype."\
                                        % (repr(self.dtype),))
@@ -38,32 +174,144 @@ class Numeric(Validator):
 
         self.min_value = min_value
         self.max_value = max_value
+        if number_format is not None:
+            self.number_format = number_format
+        if self.number_format is not None and self.number_format.percent \
+                and not issubclass(self.dtype, np.floating):
+            raise ValueError("Percentages need a floating point dtype.")
+
+    def parse(self, obj):
+        """ Parses texts with the number format, if there is one. Raises
+            ValueError if obj is not a number of the format. """
+        if self.number_format is None or \
+                not isinstance(obj, six.string_types):
+            return obj
+        text, percent = self.number_format.parse(obj)
+        if text is None:
+            raise ValueError
+        if percent:
+            return float(text) / 100.0
+        return text
+
+    def convert(self, obj):
+        """ Converts obj to dtype. Raises ValueError or TypeError if that is
+            not possible, and OverflowError if obj is out of the range of
+            dtype, instead of silently wrapping around or becoming inf. """
+        if issubclass(self.dtype, np.integer):
+            number = int(obj)
+            info = np.iinfo(self.dtype)
+            if not (info.min <= number <= info.max):
+                raise OverflowError
+        with np.errstate(over="ignore"):
+            value = self.dtype(obj)
+        if issubclass(self.dtype, np.floating) and np.isinf(value) and \
+                not np.isinf(float(obj)):
+            raise OverflowError
+        return value
+
+    def not_convertible(self, obj):
+        return Verdict(obj, False, "invalid %s" % (self.dtype.__name__,),\
+                "%s cannot be converted to %s" % \
+                    (repr(obj), self.dtype.__name__) )
+
+    def out_of_range(self, obj):
+        return Verdict(obj, False, "invalid %s" % (self.dtype.__name__,),\
+                "%s is out of the range of %s" % \
+                    (repr(obj), self.dtype.__name__) )
+
+    def too_low(self, value):
+        return Verdict(value, False, "value too low",
+                       "%s is lower than %s" % (value, self.min_value))
+
+    def too_high(self, value):
+        return Verdict(value, False, "value too high",
+                       "%s is higher than %s" % (value, self.max_value))
 
     def validate(self, obj):
         try:
-            value = self.dtype(obj)
+            value = self.convert(self.parse(obj))
         except (ValueError, TypeError):
-            yield Verdict(obj, False, "invalid %s" % (self.dtype.__name__,),\
-                    "%s cannot be converted to %s" % \
-                        (repr(obj), self.dtype.__name__) )
+            yield self.not_convertible(obj)
+            return
+        except OverflowError:
+            yield self.out_of_range(obj)
             return
-
-        valid = True
 
         if (self.min_value is not None) and (value < self.min_value):
-            yield Verdict(value, False, "value too low",
-                            "%i is lower than %i" % (value, self.min_value))
-            valid = False
+            yield self.too_low(value)
+            return
         elif (self.max_value is not None) and (value > self.max_value):
-                yield Verdict(value, False, "value too high",
-                              "%i is higher than %i" % (value, self.max_value))
-                valid = False
-
-        if not valid:
+            yield self.too_high(value)
             return
 
         yield Verdict(value, True)
 
+    def validate_column(self, column):
+        """ Columns of a numeric dtype are converted and range checked in a
+            single pass by kernels.numeric_codes, compiled with Numba if it
+            is installed. With a number format, the texts of object columns
+            are parsed at once by NumberFormat.parse_column first. Other
+            columns are validated cell by cell. """
+        values = column.values
+        if self.number_format is not None and \
+                type(self).validate is Numeric.validate and \
+                isinstance(values, np.ndarray) and values.dtype.kind == "O" \
+                and issubclass(self.dtype, (np.integer, np.floating)) and \
+                np.dtype(self.dtype).itemsize <= 8:
+            return self.validate_texts(column)
+        if type(self).validate is not Numeric.validate or \
+                not isinstance(values, np.ndarray) or \
+                values.dtype.kind not in "biuf" or \
+                not issubclass(self.dtype, (np.integer, np.floating)):
+            return ColumnVerdicts.from_cells(self, values)
+
+        converted, codes = kernels.numeric_codes(values, self.dtype,
+                                                 self.min_value,
+                                                 self.max_value)
+        valid = codes == kernels.VALID
+        reasons = np.empty(len(values), dtype=object)
+        descriptions = np.empty(len(values), dtype=object)
+        for i in np.flatnonzero(~valid):
+            code = codes[i]
+            if code == kernels.NOT_CONVERTIBLE:
+                verdict = self.not_convertible(values[i])
+            elif code == kernels.OUT_OF_RANGE:
+                verdict = self.out_of_range(values[i])
+            elif code == kernels.TOO_LOW:
+                verdict = self.too_low(converted[i])
+            else:
+                verdict = self.too_high(converted[i])
+            reasons[i] = verdict.reason
+            descriptions[i] = verdict.description
+        return ColumnVerdicts.one_per_cell(converted, valid, reasons,
+                                           descriptions)
+
+    def validate_texts(self, column):
+        """ Validates an object column with a number format: the numbers
+            among its texts are converted in bulk and range checked by
+            validate_column, everything else is validated cell by cell. """
+        series = type(column)
+        values = column.values
+        texts = np.flatnonzero([isinstance(value, six.string_types)
+                                for value in values])
+        matched, numbers = self.number_format.parse_column(
+                series(values[texts], dtype=object), self.dtype)
+        bulk = texts[matched]
+        parts = []
+        if len(bulk):
+            result = self.validate_column(series(numbers))
+            # Describe failures by the original texts
+            for i in np.flatnonzero(~result.verdict_valid):
+                cell = result.positions[i]
+                result.descriptions[i] = \
+                        next(self.validate(values[bulk[cell]])).description
+            parts.append((bulk, result))
+        rest = np.setdiff1d(np.arange(len(values)), bulk)
+        if len(rest):
+            parts.append((rest, ColumnVerdicts.from_cells(self,
+                                                          values[rest])))
+        return ColumnVerdicts.combine(len(values), parts)
+
 
 class Int(Numeric):
     dtype = np.int32
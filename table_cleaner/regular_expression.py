@@ -2,8 +2,11 @@ from __future__ import unicode_literals
 import six
 
 import re
+from collections import OrderedDict
 
-from .validator import Verdict
+import numpy as np
+
+from .validator import Verdict, ColumnVerdicts
 from .string import String
 from .utils import force_text
 
@@ -48,3 +51,83 @@ class Regex(String):
             yield Verdict(obj, False, self.code, self.message)
         else:
             yield Verdict(value, True)
+
+
+class RegexSet(Regex):
+    """ Classifies strings against several named regular expressions in a
+        single pass.
+
+        The patterns are combined into one alternation of named groups, so
+        every cell is searched once no matter how many patterns there are. In
+        column mode, cells with the same text share one search.
+        ``patterns`` is a dict (or list of pairs) mapping names to regular
+        expression strings. If several patterns match a string, the one whose
+        match starts first wins, and of those the one listed first. Patterns
+        must not refer to their own groups by number, as the numbers change
+        when the patterns are combined.
+
+        Strings matching none of the patterns are invalid. In column mode, the
+        name of the matching pattern is reported in an additional output
+        column, named after the field plus ``pattern_column_suffix``. """
+
+    message = "Doesn't match any pattern."
+    code = 'regex_set_no_match'
+    pattern_column_suffix = '_pattern'
+
+    def __init__(self, patterns, message=None, code=None, flags=None,
+                 pattern_column_suffix=None, min_length=0, max_length=-1):
+        if isinstance(patterns, dict):
+            patterns = list(patterns.items())
+        if len(patterns) == 0:
+            raise ValueError("'patterns' argument needs at least one element.")
+
+        for name, pattern in patterns:
+            if not isinstance(pattern, six.string_types):
+                raise TypeError("The patterns of a RegexSet must be regular "
+                                "expression strings.")
+
+        if pattern_column_suffix is not None:
+            self.pattern_column_suffix = pattern_column_suffix
+
+        self.patterns = OrderedDict(patterns)
+        self.names = list(self.patterns.keys())
+        self.group_names = OrderedDict(("_p%i" % (i,), name) for i, name in
+                                        enumerate(self.names))
+        regex = "|".join("(?P<_p%i>%s)" % (i, pattern)
+                         for i, pattern in enumerate(self.patterns.values()))
+
+        super(RegexSet, self).__init__(regex=regex, message=message,
+                                       code=code, flags=flags,
+                                       min_length=min_length,
+                                       max_length=max_length)
+
+    def classify(self, obj):
+        """ Returns the name of the pattern matching obj, or None. """
+        match = self.regex.search(force_text(obj))
+        if match is None:
+            return None
+        return self.group_names[match.lastgroup]
+
+    def validate_column(self, column):
+        """ Searches every distinct text once, with Series.str.extract, and
+            tells the matching pattern by the one of the named groups _pN
+            that took part in the match. """
+        original = np.asarray(column.values, dtype=object)
+        values = np.empty(len(original), dtype=object)
+        values[:] = [force_text(obj) for obj in original]
+
+        # Index of the matching pattern for every cell, -1 for no match.
+        series = type(column)
+        codes, uniques = series(values, dtype=object).factorize()
+        texts = series(np.asarray(uniques, dtype=object), dtype=object)
+        groups = texts.str.extract(self.regex, expand=True)
+        matched = groups[list(self.group_names)].notna().values
+        group_ids = np.where(matched.any(axis=1), matched.argmax(axis=1), -1)
+        group_ids = group_ids.astype(np.intp)[codes]
+        valid = group_ids >= 0
+        values[~valid] = original[~valid]
+
+        names = np.array(self.names + [None], dtype=object)[group_ids]
+        extra = OrderedDict([(self.pattern_column_suffix, names)])
+        return ColumnVerdicts.one_per_cell(values, valid, self.code,
+                                           self.message, extra=extra)
@@ -0,0 +1,517 @@
+""" Validation of database tables inside the database.
+
+    The validators of a Cleaner class are translated into SQL expressions,
+    so the database finds the invalid rows itself:
+
+    validation = OrderCleaner.from_sql(sqlite3.connect("orders.db"), "orders")
+    validation.invalid_rows        # counted in the database
+    validation.verdicts            # validates only the invalid rows in Python
+    for batch in validation.iter_cleaned(batchsize=10000):
+        ...                        # valid rows, converted in the database
+
+    Supported are the range and conversion checks of Numeric subclasses, the
+    length checks of String, the vocabularies of Bool, Choice sets, and
+    Regex, which calls a regular expression function registered with the
+    database. Other validators raise a ValueError.
+
+    Values are converted by the database, following its typing rules, so
+    edge cases can differ from validating in Python. SqliteDialect works with
+    the sqlite3 module; other DB-API drivers need a Dialect subclass. """
+from __future__ import unicode_literals
+import six
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .numeric import Numeric
+from .string import String
+from .bool import Bool
+from .choice import Choice
+from .regular_expression import Regex
+
+__all__ = ["Dialect", "SqliteDialect", "SqlValidation", "translate"]
+
+
+class Fragment(object):
+    """ A piece of SQL with the parameters of its placeholders. """
+
+    def __init__(self, sql, params=()):
+        self.sql = sql
+        self.params = list(params)
+
+    @classmethod
+    def join(cls, template, *fragments):
+        """ Fills the %s slots of template with fragments, in order. """
+        params = []
+        for fragment in fragments:
+            params.extend(fragment.params)
+        return cls(template % tuple(fragment.sql for fragment in fragments),
+                   params)
+
+    def __repr__(self):
+        return "Fragment(%s, %s)" % (repr(self.sql), repr(self.params))
+
+
+class Dialect(object):
+    """ Generates the SQL for a database. Methods raising
+        NotImplementedError have no portable SQL equivalent and must be
+        provided by a subclass for the database at hand. """
+
+    placeholder = "?"
+    # Expression identifying a row, used if no index column is given
+    row_id = None
+
+    def quote(self, name):
+        """ The quoted identifier. It may contain '%', so it goes into
+            queries as a Fragment, see identifier, not into templates. """
+        return '"%s"' % (name.replace('"', '""'),)
+
+    def identifier(self, name):
+        return Fragment(self.quote(name))
+
+    def value(self, value):
+        return Fragment(self.placeholder, [value])
+
+    def values(self, values):
+        return Fragment(", ".join([self.placeholder] * len(values)),
+                        list(values))
+
+    def register_functions(self, connection):
+        pass
+
+    def text(self, column):
+        """ The value as text, like force_text, which turns None into
+            'None'. """
+        return Fragment.join("COALESCE(CAST(%s AS TEXT), 'None')", column)
+
+    def length(self, text):
+        return Fragment.join("LENGTH(%s)", text)
+
+    def integer(self, column):
+        """ The value as number, parsing text like int(), or NULL. """
+        raise NotImplementedError()
+
+    def real(self, column):
+        """ The value as number, parsing text like float(), or NULL. NaN
+            is NULL as well. """
+        raise NotImplementedError()
+
+    def is_real(self, column):
+        """ Whether the value can be converted like float(), or is NULL,
+            which becomes NaN. Tells parse failures apart from NaN. """
+        raise NotImplementedError()
+
+    def is_integer(self, number):
+        """ Whether a number is stored as integer rather than real. """
+        raise NotImplementedError()
+
+    def truncate(self, number):
+        return Fragment.join("CAST(%s AS INTEGER)", number)
+
+    def regex_search(self, text, regex):
+        """ Whether regex, a compiled pattern, matches somewhere in text. """
+        raise NotImplementedError()
+
+
+class SqliteDialect(Dialect):
+    """ Dialect for the sqlite3 module. Text is parsed and regular
+        expressions are matched by Python functions registered with the
+        connection. """
+
+    placeholder = "?"
+    row_id = "rowid"
+
+    def register_functions(self, connection):
+        connection.create_function("tc_int", 1, _parse_int)
+        connection.create_function("tc_real", 1, _parse_real)
+        connection.create_function("tc_is_real", 1, _is_real)
+        connection.create_function("tc_regexp", 3, _regex_search)
+
+    def _number(self, column, parse):
+        return Fragment.join("(CASE typeof(%%s) WHEN 'integer' THEN %%s "
+                             "WHEN 'real' THEN %%s WHEN 'text' THEN %s(%%s) "
+                             "END)" % (parse,),
+                             column, column, column, column)
+
+    def integer(self, column):
+        return self._number(column, "tc_int")
+
+    def real(self, column):
+        return self._number(column, "tc_real")
+
+    def is_real(self, column):
+        return Fragment.join("(CASE typeof(%s) WHEN 'text' THEN "
+                             "tc_is_real(%s) WHEN 'blob' THEN 0 ELSE 1 END)",
+                             column, column)
+
+    def is_integer(self, number):
+        return Fragment.join("(typeof(%s) = 'integer')", number)
+
+    def regex_search(self, text, regex):
+        return Fragment.join("tc_regexp(%s, %s, %s)",
+                             self.value(regex.pattern),
+                             self.value(regex.flags), text)
+
+
+def _parse_int(text):
+    try:
+        number = int(text)
+    except ValueError:
+        return None
+    if not (-2**63 <= number < 2**63):
+        # Too large for SQLite integers, out of range for every dtype
+        return float(number)
+    return number
+
+
+def _parse_real(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _is_real(text):
+    return _parse_real(text) is not None
+
+
+def _regex_search(pattern, flags, text):
+    return re.search(pattern, text, flags) is not None
+
+
+class FieldPlan(object):
+    """ The SQL translation of a validator for one column: the expression
+        of the validated value, and the conditions under which a value is
+        invalid, as (reason, condition) pairs checked in order. ``convert``
+        turns the fetched values into those the validator produces. """
+
+    def __init__(self, value, conditions, convert=None):
+        self.value = value
+        self.conditions = conditions
+        self.convert = convert
+
+    def invalid(self):
+        """ Condition true for invalid values. Unknown (NULL) results count
+            as invalid. """
+        if not self.conditions:
+            return Fragment("0")
+        return Fragment.join(" OR ".join(["COALESCE(%s, 1)"] *
+                                         len(self.conditions)),
+                             *[condition for reason, condition
+                               in self.conditions])
+
+    def reason(self, dialect):
+        """ Expression of the reason of the first failing condition, NULL
+            for valid values. """
+        if not self.conditions:
+            return Fragment("NULL")
+        parts = [Fragment.join("WHEN COALESCE(%s, 1) THEN %s", condition,
+                               dialect.value(reason))
+                 for reason, condition in self.conditions]
+        template = "(CASE %s END)" % (" ".join(["%s"] * len(parts)),)
+        return Fragment.join(template, *parts)
+
+
+def _translate_numeric(validator, column, dialect):
+    if validator.number_format is not None:
+        raise ValueError("Numbers with a number format cannot be validated "
+                         "in SQL.")
+    dtype = validator.dtype
+    code = "invalid %s" % (dtype.__name__,)
+    if issubclass(dtype, np.integer):
+        number = dialect.integer(column)
+        not_convertible = Fragment.join("(%s IS NULL)", number)
+        info = np.iinfo(dtype)
+        # Database integers have 64 bits at most.
+        out_of_range = Fragment.join(
+                "(CASE WHEN %s THEN (%s < %s OR %s > %s) "
+                "ELSE (%s <= %s OR %s >= %s) END)",
+                dialect.is_integer(number),
+                number, dialect.value(max(int(info.min), -2**63)),
+                number, dialect.value(min(int(info.max), 2**63 - 1)),
+                number, dialect.value(float(info.min) - 1.0),
+                number, dialect.value(float(info.max) + 1.0))
+        value = dialect.truncate(number)
+    elif issubclass(dtype, np.floating):
+        number = dialect.real(column)
+        # NULL and NaN are valid NaN, which passes all further checks.
+        not_convertible = Fragment.join("(NOT %s)", dialect.is_real(column))
+        value = number
+        maximum = np.finfo(dtype).max
+        if float(maximum) < np.finfo(np.float64).max:
+            # Numbers rounding to infinity in dtype
+            ulp = float(maximum) - float(np.nextafter(maximum, dtype(0)))
+            limit = float(maximum) + ulp / 2
+            out_of_range = Fragment.join("(ABS(%s) >= %s AND ABS(%s) < %s)",
+                                         number, dialect.value(limit),
+                                         number, dialect.value(float("inf")))
+        else:
+            out_of_range = None
+    else:
+        raise ValueError("%s cannot be validated in SQL."
+                         % (type(validator).__name__,))
+
+    checks = []
+    if out_of_range is not None:
+        checks.append((code, out_of_range))
+    if validator.min_value is not None:
+        checks.append(("value too low", Fragment.join(
+                "(%s < %s)", value, dialect.value(validator.min_value))))
+    if validator.max_value is not None:
+        checks.append(("value too high", Fragment.join(
+                "(%s > %s)", value, dialect.value(validator.max_value))))
+    conditions = [(code, not_convertible)] + \
+        [(reason, Fragment.join("COALESCE(%s, 0)", condition))
+         for reason, condition in checks]
+    return FieldPlan(value, conditions,
+                     convert=lambda values: values.astype(dtype))
+
+
+def _translate_string(validator, column, dialect):
+    text = dialect.text(column)
+    conditions = []
+    if validator.min_length > 0:
+        conditions.append(("too short", Fragment.join(
+                "(%s < %s)", dialect.length(text),
+                dialect.value(validator.min_length))))
+    if validator.max_length > 0:
+        conditions.append(("too long", Fragment.join(
+                "(%s > %s)", dialect.length(text),
+                dialect.value(validator.max_length))))
+    return FieldPlan(text, conditions)
+
+
+def _translate_regex(validator, column, dialect):
+    text = dialect.text(column)
+    match = dialect.regex_search(text, validator.regex)
+    if validator.inverse_match:
+        condition = match
+    else:
+        condition = Fragment.join("(NOT %s)", match)
+    return FieldPlan(text, [(validator.code, condition)])
+
+
+def _sql_values(values):
+    """ Values which can be compared in SQL; None and NaN never match. """
+    result = []
+    for value in values:
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        result.append(int(value) if isinstance(value, bool) else value)
+    return result
+
+
+def _translate_bool(validator, column, dialect):
+    value = Fragment.join("(CASE WHEN %s IN (%s) THEN 1 "
+                          "WHEN %s IN (%s) THEN 0 END)",
+                          column, dialect.values(_sql_values(
+                              validator.true_values)),
+                          column, dialect.values(_sql_values(
+                              validator.false_values)))
+    conditions = []
+    if not validator.allow_nan:
+        conditions.append(("bool_nan_not_allowed",
+                           Fragment.join("(%s IS NULL)", value)))
+
+    def convert(values):
+        return values.map({1: True, 0: False}).astype(object)\
+                     .where(values.notnull(), np.nan)
+    return FieldPlan(value, conditions, convert=convert)
+
+
+def _translate_choice(validator, column, dialect):
+    choices = _sql_values(validator.choices)
+    accepts_none = any(choice is None for choice in validator.choices)
+    condition = Fragment.join("(%s NOT IN (%s))", column,
+                              dialect.values(choices))
+    if accepts_none:
+        condition = Fragment.join("(%s IS NOT NULL AND %s)", column,
+                                  condition)
+    else:
+        condition = Fragment.join("(%s IS NULL OR %s)", column, condition)
+    return FieldPlan(column, [("invalid choice", condition)])
+
+
+# Checked in order, so subclasses come before their base classes.
+translators = [(Regex, _translate_regex),
+               (Numeric, _translate_numeric),
+               (String, _translate_string),
+               (Bool, _translate_bool),
+               (Choice, _translate_choice)]
+
+
+def translate(validator, column, dialect):
+    """ Returns the FieldPlan of a validator for the column expression
+        column. Subclasses overriding validate cannot be translated. """
+    for base, translator in translators:
+        if isinstance(validator, base):
+            if type(validator).validate is not base.validate:
+                break
+            return translator(validator, column, dialect)
+    raise ValueError("%s cannot be validated in SQL."
+                     % (type(validator).__name__,))
+
+
+def _apply_null_policy(plan, column, policy, dialect):
+    if policy is None:
+        return plan
+    if policy == "allow":
+        return FieldPlan(plan.value,
+                         [(reason, Fragment.join("(%s IS NOT NULL AND %s)",
+                                                 column, condition))
+                          for reason, condition in plan.conditions],
+                         plan.convert)
+    if policy == "reject":
+        return FieldPlan(plan.value,
+                         [("missing value",
+                           Fragment.join("(%s IS NULL)", column))]
+                         + plan.conditions, plan.convert)
+    raise ValueError("Only the null policies 'allow' and 'reject' can be "
+                     "applied in SQL.")
+
+
+class SqlValidation(object):
+    """ Validates the table ``table`` of a DB-API connection with the
+        validators of cleaner_class inside the database.
+
+        Rows are identified by ``index_column``, or by the row id of the
+        dialect. Only the invalid rows are fetched to build the verdicts,
+        which are produced by validating them with cleaner_class in Python;
+        their counters therefore only count the verdicts of invalid rows.
+        Valid rows are streamed in batches with their values converted by
+        the database. A class level null policy of "allow" or "reject" is
+        applied in SQL as well. """
+
+    def __init__(self, cleaner_class, connection, table, dialect=None,
+                 index_column=None, batchsize=10000):
+        if dialect is None:
+            dialect = SqliteDialect()
+        self.cleaner_class = cleaner_class
+        self.connection = connection
+        self.table = table
+        self.dialect = dialect
+        self.batchsize = batchsize
+        # Identifiers are Fragments filled into templates, never templates
+        # themselves, so names containing '%' are safe.
+        self.table_name = dialect.identifier(table)
+        if index_column is not None:
+            self.index = dialect.identifier(index_column)
+        elif dialect.row_id is not None:
+            self.index = Fragment(dialect.row_id)
+        else:
+            raise ValueError("%s has no row id, an index_column is needed."
+                             % (type(dialect).__name__,))
+        dialect.register_functions(connection)
+
+        null_policy = cleaner_class.null_policy
+        self.plans = OrderedDict()
+        for key, validator in six.iteritems(cleaner_class._fields):
+            column = dialect.identifier(key)
+            policy = null_policy.get(key) if isinstance(null_policy, dict) \
+                     else null_policy
+            plan = translate(validator, column, dialect)
+            self.plans[key] = _apply_null_policy(plan, column, policy,
+                                                 dialect)
+
+        cursor = self.execute(Fragment.join("SELECT * FROM %s WHERE 1 = 0",
+                                            self.table_name))
+        self.columns = [description[0] for description in cursor.description]
+        cursor.close()
+
+    def execute(self, fragment):
+        cursor = self.connection.cursor()
+        cursor.execute(fragment.sql, fragment.params)
+        return cursor
+
+    def invalid(self):
+        """ Condition true for rows with at least one invalid value. """
+        plans = list(self.plans.values())
+        if not plans:
+            return Fragment("0")
+        return Fragment.join(" OR ".join(["%s"] * len(plans)),
+                             *[plan.invalid() for plan in plans])
+
+    @property
+    def invalid_rows(self):
+        """ Number of invalid rows, counted in the database. """
+        cursor = self.execute(Fragment.join(
+                "SELECT COUNT(*) FROM %s WHERE %s", self.table_name,
+                self.invalid()))
+        count = cursor.fetchone()[0]
+        cursor.close()
+        return int(count)
+
+    @property
+    def invalid_counts(self):
+        """ Number of failing rows per (column, reason), counted in the
+            database. A value counts for the first condition it fails. """
+        counts = OrderedDict()
+        for key, plan in six.iteritems(self.plans):
+            cursor = self.execute(Fragment.join(
+                    "SELECT reason, COUNT(*) FROM (SELECT %s AS reason "
+                    "FROM %s) AS reasons WHERE reason IS NOT NULL "
+                    "GROUP BY reason", plan.reason(self.dialect),
+                    self.table_name))
+            for reason, count in cursor.fetchall():
+                counts[(key, reason)] = int(count)
+            cursor.close()
+        return counts
+
+    def fetch_invalid(self):
+        """ Returns the invalid rows as a DataFrame indexed by row. """
+        cursor = self.execute(Fragment.join(
+                "SELECT %s, * FROM %s WHERE %s ORDER BY %s", self.index,
+                self.table_name, self.invalid(), self.index))
+        rows = cursor.fetchall()
+        cursor.close()
+        frame = pd.DataFrame([row[1:] for row in rows], columns=self.columns,
+                             index=[row[0] for row in rows])
+        return frame.astype(object).where(frame.notnull(), None) \
+                if len(frame) else frame
+
+    @property
+    def verdicts(self):
+        """ The verdicts of the invalid rows, validated with cleaner_class
+            in Python. """
+        return self.cleaner_class(self.fetch_invalid()).verdicts
+
+    def iter_cleaned(self, batchsize=None):
+        """ Yields the valid rows in DataFrames of at most batchsize rows,
+            with validated columns replaced by their validated values. """
+        if batchsize is None:
+            batchsize = self.batchsize
+        selected = []
+        for column in self.columns:
+            if column in self.plans:
+                selected.append(Fragment.join(
+                        "%s AS %s", self.plans[column].value,
+                        self.dialect.identifier(column)))
+            else:
+                selected.append(self.dialect.identifier(column))
+        query = Fragment.join(
+                "SELECT %s FROM %%s WHERE NOT (%%s) ORDER BY %%s"
+                % (", ".join(["%s"] * len(selected)),),
+                *(selected + [self.table_name, self.invalid(), self.index]))
+        cursor = self.execute(query)
+        try:
+            while True:
+                rows = cursor.fetchmany(batchsize)
+                if not rows:
+                    break
+                batch = pd.DataFrame(list(rows), columns=self.columns)
+                for key, plan in six.iteritems(self.plans):
+                    if plan.convert is not None:
+                        batch[key] = plan.convert(batch[key])
+                yield batch
+        finally:
+            cursor.close()
+
+    @property
+    def cleaned(self):
+        """ All valid rows in one DataFrame. """
+        batches = list(self.iter_cleaned())
+        if not batches:
+            return pd.DataFrame(columns=self.columns)
+        return pd.concat(batches, ignore_index=True)
@@ -0,0 +1,172 @@
+from __future__ import unicode_literals
+import six
+import os
+import shutil
+
+import pandas as pd
+
+from .table_markup import MarkupFrame
+
+__all__ = ["save_results", "load_cleaned", "load_verdicts", "load_report"]
+
+formats = ("parquet", "feather")
+
+# Columns of the verdicts frame which are stored dictionary encoded
+dictionary_columns = ["column", "reason", "description", "stage"]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Storing validation results requires pyarrow. "
+                          "Install it with 'pip install pyarrow'.")
+    return pyarrow
+
+
+def _check_format(format):
+    if format not in formats:
+        raise ValueError("format must be one of %s, not %s."
+                         % (", ".join(formats), repr(format)))
+
+
+def encode_verdicts(verdicts):
+    """ Prepares a verdicts DataFrame for columnar storage: the index becomes
+        the "index" column, and column, reason and description become
+        categoricals, which Arrow stores dictionary encoded. """
+    encoded = verdicts.copy()
+    for column in dictionary_columns:
+        if column in encoded:
+            encoded[column] = encoded[column].astype("category")
+    encoded.insert(0, "index", verdicts.index.values)
+    return encoded.reset_index(drop=True)
+
+
+def encode_cleaned(cleaned):
+    """ Object columns with values of mixed types cannot be stored in Arrow
+        columns; such columns are stored as strings. """
+    encoded = cleaned.copy()
+    for column in encoded.columns:
+        values = encoded[column]
+        if values.dtype == object and \
+                pd.api.types.infer_dtype(values, skipna=True).startswith("mixed"):
+            encoded[column] = values.map(lambda v: v if v is None
+                                         else six.text_type(v))
+    return encoded
+
+
+def save_results(cleaner, path, format="parquet", partition_by=None):
+    """ Writes the cleaned data and the verdicts of a Cleaner into the
+        directory path, as cleaned.<format> and verdicts.<format>.
+
+        Parquet verdicts can be partitioned by "column" or "reason"; they are
+        then written as a directory verdicts.parquet with one subdirectory per
+        value. Results saved before in the same directory are replaced. A
+        Cleaner with keep_verdicts set to False has no verdicts, so only the
+        cleaned data is written. """
+    pa = _require_pyarrow()
+    _check_format(format)
+    if partition_by is not None:
+        if format != "parquet":
+            raise ValueError("Only Parquet files can be partitioned.")
+        if partition_by not in ("column", "reason"):
+            raise ValueError("Verdicts can only be partitioned by 'column' or "
+                             "'reason', not %s." % (repr(partition_by),))
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    cleaned = cleaner.cleaned
+    if isinstance(cleaned, pd.DataFrame):
+        cleaned = pa.Table.from_pandas(encode_cleaned(cleaned),
+                                       preserve_index=False)
+    else:
+        # Cleaned rows written to an Arrow file are already encoded.
+        cleaned = cleaned.to_arrow()
+    cleaned_path = os.path.join(path, "cleaned." + format)
+    verdicts_path = os.path.join(path, "verdicts." + format)
+    # Partitioned datasets are appended to, and an older run may have been
+    # partitioned differently or not at all.
+    if os.path.isdir(verdicts_path):
+        shutil.rmtree(verdicts_path)
+    elif os.path.exists(verdicts_path):
+        os.remove(verdicts_path)
+
+    verdicts = cleaner.verdicts
+    if verdicts is not None:
+        if not isinstance(verdicts, pd.DataFrame):
+            # Verdicts spilled to disk are written in one piece.
+            verdicts = verdicts.to_frame()
+        verdicts = pa.Table.from_pandas(encode_verdicts(verdicts),
+                                        preserve_index=False)
+
+    if format == "feather":
+        import pyarrow.feather as feather
+        feather.write_feather(cleaned, cleaned_path)
+        if verdicts is not None:
+            feather.write_feather(verdicts, verdicts_path)
+        return
+
+    import pyarrow.parquet as pq
+    pq.write_table(cleaned, cleaned_path)
+    if verdicts is None:
+        return
+    if partition_by is None:
+        pq.write_table(verdicts, verdicts_path,
+                       use_dictionary=[column for column in dictionary_columns
+                                       if column in verdicts.column_names])
+    else:
+        pq.write_to_dataset(verdicts, verdicts_path,
+                            partition_cols=[partition_by])
+
+
+def _read(path, format, **kwargs):
+    _require_pyarrow()
+    _check_format(format)
+    if format == "feather":
+        import pyarrow.feather as feather
+        return feather.read_table(path, **kwargs)
+    import pyarrow.parquet as pq
+    return pq.read_table(path, **kwargs)
+
+
+def load_cleaned(path, format="parquet"):
+    """ Reads the cleaned data written by save_results. """
+    return _read(os.path.join(path, "cleaned." + format), format).to_pandas()
+
+
+def load_verdicts(path, format="parquet", columns=None, reasons=None):
+    """ Reads the verdicts written by save_results, optionally only those of
+        the given columns or reasons. Filters on the partitioning key only
+        read the matching partitions. """
+    filters = []
+    if columns is not None:
+        filters.append(("column", "in", list(columns)))
+    if reasons is not None:
+        filters.append(("reason", "in", list(reasons)))
+
+    kwargs = {}
+    if filters and format == "parquet":
+        kwargs["filters"] = filters
+    table = _read(os.path.join(path, "verdicts." + format), format, **kwargs)
+    verdicts = table.to_pandas()
+    if filters and format != "parquet":
+        for column, op, values in filters:
+            verdicts = verdicts[verdicts[column].isin(values)]
+
+    # Partitions are read one after the other, restore the verdict order.
+    verdicts = verdicts.sort_values("counter", kind="mergesort")
+    verdicts = verdicts.set_index("index")
+    verdicts.index.name = None
+    # Partition keys are appended at the end, restore the column order.
+    columns = ["valid", "reason", "description", "column", "counter"]
+    if "stage" in verdicts:
+        columns.append("stage")
+    return verdicts[columns]
+
+
+def load_report(path, original, format="parquet", reason_classes=False):
+    """ Rebuilds the MarkupFrame report of a stored validation run from its
+        verdicts and the original data, without validating again. """
+    verdicts = load_verdicts(path, format=format)
+    return MarkupFrame.from_validation(original, verdicts,
+                                       reason_classes=reason_classes)
@@ -0,0 +1,156 @@
+from __future__ import unicode_literals
+import six
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+class HeavyHitters(object):
+    """ Misra-Gries summary of the most frequent values in a stream.
+
+        At most ``k`` values are tracked. Their counts are lower bounds: the
+        true count of a value lies between its count and count + ``error``.
+        Every value occurring more than total / (k + 1) times is tracked. """
+
+    def __init__(self, k):
+        self.k = k
+        self.counts = {}
+        self.total = 0
+        self.error = 0
+
+    def update(self, values):
+        """ Adds a batch of values to the summary. """
+        self.total += len(values)
+        if self.k < 1 or len(values) == 0:
+            return
+        batch = pd.Series(np.asarray(values, dtype=object))\
+                  .value_counts(dropna=False)
+        counts = self.counts
+        for value, count in six.iteritems(batch):
+            counts[value] = counts.get(value, 0) + int(count)
+
+        if len(counts) > self.k:
+            # Merging two Misra-Gries summaries: decrement everything by the
+            # (k+1)-th largest count and drop what is no longer positive.
+            decrement = sorted(counts.values(), reverse=True)[self.k]
+            self.counts = dict((value, count - decrement)
+                               for value, count in six.iteritems(counts)
+                               if count > decrement)
+            self.error += decrement
+
+    def top(self, n=None):
+        """ Returns (value, count) pairs, most frequent first. """
+        items = sorted(six.iteritems(self.counts), key=lambda item: -item[1])
+        if n is not None:
+            items = items[:n]
+        return items
+
+
+class Reservoir(object):
+    """ Uniform random sample of at most ``size`` items from a stream
+        (reservoir sampling, algorithm R). """
+
+    def __init__(self, size, random_state=None):
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        self.size = size
+        self.random_state = random_state
+        self.items = []
+        self.seen = 0
+
+    def update(self, items):
+        """ Offers a batch of items to the reservoir. """
+        items = list(items)
+        free = max(min(self.size - len(self.items), len(items)), 0)
+        self.items.extend(items[:free])
+        self.seen += free
+        rest = items[free:]
+        if len(rest) == 0:
+            return
+        # Item number t (counting from 1) replaces a random slot with
+        # probability size / t.
+        t = self.seen + np.arange(1, len(rest) + 1)
+        slots = (self.random_state.random_sample(len(rest)) * t)\
+                .astype(np.int64)
+        for i in np.flatnonzero(slots < self.size):
+            self.items[slots[i]] = rest[i]
+        self.seen += len(rest)
+
+
+class ValidationSummary(object):
+    """ Summary of the failures of a validation run, maintained chunk by
+        chunk with memory independent of the size of the table.
+
+        For every (column, reason) it counts the failing rows, keeps the
+        ``top_k`` most frequent offending raw values in a HeavyHitters
+        summary, and a reservoir sample of ``examples`` failing cells. Setting
+        ``top_k`` or ``examples`` to zero turns the respective part off. """
+
+    def __init__(self, top_k=10, examples=5, random_state=None):
+        if not isinstance(random_state, np.random.RandomState):
+            random_state = np.random.RandomState(random_state)
+        self.top_k = top_k
+        self.examples = examples
+        self.random_state = random_state
+        self.counts = OrderedDict()
+        self.heavy_hitters = OrderedDict()
+        self.reservoirs = OrderedDict()
+
+    def update(self, data, key, result):
+        """ Adds the failures of one field in a chunk of data, given as the
+            field name and its ColumnVerdicts. """
+        invalid = ~result.verdict_valid
+        if not invalid.any():
+            return
+        failures = pd.DataFrame(dict(position=result.positions[invalid],
+                                     reason=result.reasons[invalid],
+                                     description=result.descriptions[invalid]),
+                                columns=["position", "reason", "description"])
+        # A cell may fail for the same reason more than once, count it once.
+        failures = failures.drop_duplicates(["position", "reason"])
+        raw = data[key].values
+        for reason, group in failures.groupby("reason", sort=False):
+            summary_key = (key, reason)
+            self.counts[summary_key] = \
+                    self.counts.get(summary_key, 0) + len(group)
+            positions = group["position"].values
+            if self.top_k > 0:
+                if summary_key not in self.heavy_hitters:
+                    self.heavy_hitters[summary_key] = HeavyHitters(self.top_k)
+                self.heavy_hitters[summary_key].update(raw[positions])
+            if self.examples > 0:
+                if summary_key not in self.reservoirs:
+                    self.reservoirs[summary_key] = \
+                            Reservoir(self.examples, self.random_state)
+                self.reservoirs[summary_key].update(
+                        zip(data.index[positions], raw[positions],
+                            group["description"].values))
+
+    def top_values(self, column, reason):
+        """ Returns a DataFrame of the most frequent offending values. The
+            true count of each value is at most ``max_error`` higher. """
+        hitters = self.heavy_hitters.get((column, reason))
+        if hitters is None:
+            return pd.DataFrame(columns=["value", "count", "max_error"])
+        frame = pd.DataFrame(hitters.top(), columns=["value", "count"])
+        frame["max_error"] = hitters.error
+        return frame
+
+    def example_failures(self, column, reason):
+        """ Returns a DataFrame with a random sample of failing cells. """
+        reservoir = self.reservoirs.get((column, reason))
+        items = [] if reservoir is None else reservoir.items
+        return pd.DataFrame(items, columns=["index", "value", "description"])
+
+    def to_frame(self):
+        """ Returns one row per (column, reason) with the number of failing
+            rows and the most frequent offending values. """
+        rows = []
+        for (column, reason), count in six.iteritems(self.counts):
+            hitters = self.heavy_hitters.get((column, reason))
+            top = [] if hitters is None else [v for v, c in hitters.top()]
+            rows.append(dict(column=column, reason=reason, invalid=count,
+                             top_values=top))
+        return pd.DataFrame(rows, columns=["column", "reason", "invalid",
+                                           "top_values"])
@@ -1,10 +1,31 @@
 from __future__ import unicode_literals
 import six
+import io
+import os
+import re
 
 from table_cleaner.utils import python_2_unicode_compatible
+import numpy as np
 import pandas as pd
 
 
+html_page_header = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>%(title)s</title></head><body>
+"""
+
+html_page_footer = """
+</body></html>
+"""
+
+
+def reason_class(reason):
+    """ Returns the CSS class for a verdict reason, e.g. "tc-reason-too-long"
+        for "too long". Runs of anything but letters and digits, underscores
+        included, become a single hyphen. """
+    slug = re.sub(r"[^0-9a-z]+", "-", "%s" % (reason,), flags=re.I)
+    return "tc-reason-" + slug.strip("-").lower()
+
+
 @python_2_unicode_compatible
 class MarkupCell(object):
     def __init__(self, classes=None, formatters=None):
@@ -17,6 +38,26 @@ class MarkupCell(object):
         self.formatters = formatters
         self.classes = classes
 
+    @classmethod
+    def intern(cls, interned, classes=(), formatters=()):
+        """ Returns the MarkupCell with the given classes and formatters
+            shared through the dict ``interned``, which a MarkupFrame keeps
+            for its own cells. Shared cells must not be modified in place;
+            the operators and add_classes return new cells and are safe to
+            use. """
+        key = (cls, tuple(classes), tuple(formatters))
+        cell = interned.get(key)
+        if cell is None:
+            cell = cls(classes=list(classes), formatters=list(formatters))
+            interned[key] = cell
+        return cell
+
+    def interned(self, interned):
+        return self.intern(interned, self.classes, self.formatters)
+
+    def is_empty(self):
+        return len(self.classes) == 0 and len(self.formatters) == 0
+
     def to_html(self, content):
         if len(self.classes)>0:
             classes = " class=\""+" ".join(self.classes) +"\""
@@ -58,7 +99,7 @@ class MarkupCell(object):
             c = self.copy()
             s = set(other.classes)
             c.classes = list([cls for cls in self.classes if cls not in s])
-            c.formatters = list([f for f in other.formatters \
+            c.formatters = list([f for f in self.formatters \
                     if f not in other.formatters])
             return c
 
@@ -69,45 +110,414 @@ class MarkupCell(object):
             return c
         raise TypeError("Unsupported Types encountered when trying to subtract MarkupCell classes from each other")
 
+    def discard(self, other):
+        """ Like subtraction, but ignores classes the cell doesn't have. """
+        if isinstance(other, six.string_types):
+            other = MarkupCell(classes=[other])
+        return self - other
 
-class MarkupFrame(pd.DataFrame):
-    _attributes_ = ['original_data', 'classes']
-    @classmethod
-    def from_dataframe(cls, data, classes=None):
-        instance = cls(dict([(k, [MarkupCell() for v in data[k]]) for k in data.columns]), index=data.index.copy())
-        instance.original_data = data
+
+class MarkupSelection(object):
+    """ A block of cells of a MarkupFrame, given as row positions and column
+        names. Adding or subtracting a class or MarkupCell applies it to every
+        selected cell. """
+
+    def __init__(self, frame, positions, columns):
+        self.frame = frame
+        self.positions = positions
+        self.columns = columns
+
+    def __iadd__(self, other):
+        for column in self.columns:
+            self.frame._update_cells(column, self.positions,
+                                     lambda cell: cell + other)
+        return self
+
+    def __isub__(self, other):
+        for column in self.columns:
+            self.frame._update_cells(column, self.positions,
+                                     lambda cell: cell.discard(other))
+        return self
+
+
+class MarkupColumn(object):
+    """ View of one column of a MarkupFrame. Adding a class or MarkupCell to
+        it marks up every cell of the column, subtracting removes the
+        markup from every cell again. Single cells are read and assigned by
+        index label. """
+
+    def __init__(self, frame, column):
+        self.frame = frame
+        self.column = column
+
+    def __iadd__(self, other):
+        self.frame._update_column(self.column, lambda cell: cell + other)
+        return self
+
+    def __isub__(self, other):
+        self.frame._update_column(self.column, lambda cell: cell.discard(other))
+        return self
+
+    def __getitem__(self, index):
+        return self.frame.cell(index, self.column)
+
+    def __setitem__(self, index, cell):
+        position = self.frame.original_data.index.get_loc(index)
+        self.frame._set_cell(self.column, position, cell)
+
+    def __len__(self):
+        return len(self.frame.original_data)
+
+
+class _MarkupIndexer(object):
+    """ Label based selection of cells, e.g. ``mdf.loc[0, :] += "tc-blue"``. """
+
+    def __init__(self, frame):
+        self.frame = frame
+
+    def __getitem__(self, key):
+        rows, columns = key
+        data = self.frame.original_data
+        positions = pd.Series(np.arange(len(data)), index=data.index)[rows]
+        columns = pd.Series(np.asarray(data.columns, dtype=object),
+                            index=data.columns)[columns]
+        return MarkupSelection(self.frame,
+                               np.atleast_1d(np.asarray(positions)),
+                               list(np.atleast_1d(np.asarray(columns,
+                                                             dtype=object))))
+
+    def __setitem__(self, key, value):
+        if not (isinstance(value, MarkupSelection) and
+                value.frame is self.frame):
+            raise TypeError("Only selections of the same MarkupFrame can be "
+                            "assigned.")
+
+
+class MarkupFrame(object):
+    """ HTML markup for the cells of a DataFrame.
+
+        Markup shared by a whole column is stored once for the column. Only
+        cells whose markup differs from their column's are stored, in one dict
+        per column mapping row positions to MarkupCells. All stored cells are
+        interned per frame, so cells of the frame with the same classes and
+        formatters share one MarkupCell object.
+
+        Columns are accessed as attributes or items and support ``+=`` and
+        ``-=``, as do blocks of cells selected with ``loc``.
+
+        Large tables can be streamed into a file with write_html, or split
+        into several files with write_html_pages. In notebooks only the
+        first and last ``repr_rows`` rows and up to ``repr_invalid_rows`` rows
+        with invalid cells are shown. """
+
+    repr_rows = 10
+    repr_invalid_rows = 50
+
+    def __init__(self, data, classes=None):
         if classes is None:
             classes = ["markup-table"]
-        instance.classes = classes
-        return instance
+        self.original_data = data
+        self.classes = classes
+        self._shape = data.shape
+        self._interned = {}
+        empty = MarkupCell.intern(self._interned)
+        self._column_markup = dict((k, empty) for k in data.columns)
+        self._cell_markup = dict((k, {}) for k in data.columns)
+
+    @classmethod
+    def from_dataframe(cls, data, classes=None):
+        return cls(data, classes=classes)
 
     @classmethod
-    def from_validation(cls, original, verdicts):
+    def from_validation(cls, original, verdicts, reason_classes=False):
+        """ Marks up the cells of original with invalid verdicts with the
+            "tc-cell-invalid" class, once per invalid verdict. With
+            reason_classes, every such cell also gets a class per reason, e.g.
+            "tc-reason-too-long".
+
+            verdicts may also be a verdict_store.SpilledVerdicts handle, whose
+            invalid verdicts are then read batch by batch. """
         mdf = cls.from_dataframe(original)
-        invalid = verdicts[~verdicts.valid]
-        for index, row in invalid.iterrows():
-             mdf.ix[index, row.column] += "tc-cell-invalid"
+        if isinstance(verdicts, pd.DataFrame):
+            batches = [verdicts[~np.asarray(verdicts.valid, dtype=bool)]]
+        else:
+            batches = verdicts.iter_batches(valid=False)
+        for invalid in batches:
+            mdf._mark_invalid(original, invalid, reason_classes)
         return mdf
 
-    def to_html(self, max_rows=-1, max_cols=-1, show_dimensions=True):
+    def _mark_invalid(self, original, invalid, reason_classes):
+        if original.index.is_unique:
+            positions = original.index.get_indexer(invalid.index)
+            invalid = pd.DataFrame(dict(position=positions,
+                                        column=invalid.column.values,
+                                        reason=invalid.reason.values))
+            invalid = invalid[invalid.position >= 0]
+        else:
+            labels = pd.DataFrame(dict(position=np.arange(len(original))),
+                                  index=original.index)
+            invalid = invalid[["column", "reason"]].join(labels, how="inner")
+
+        for (column, reason), group in invalid.groupby(["column", "reason"],
+                                                       sort=False):
+            extra = [reason_class(reason)] if reason_classes else []
+
+            def mark(cell, extra=extra):
+                return cell.add_classes("tc-cell-invalid",
+                                        *[c for c in extra
+                                          if c not in cell.classes])
+            self._update_cells(column, group.position.values, mark)
+
+    @property
+    def columns(self):
+        return self.original_data.columns
+
+    @property
+    def index(self):
+        return self.original_data.index
+
+    @property
+    def shape(self):
+        return self._shape
+
+    @property
+    def loc(self):
+        return _MarkupIndexer(self)
+
+    def __getitem__(self, column):
+        if column not in self._column_markup:
+            raise KeyError(column)
+        return MarkupColumn(self, column)
+
+    def __setitem__(self, column, value):
+        if not isinstance(value, MarkupColumn):
+            raise TypeError("Only MarkupColumns can be assigned to the "
+                            "columns of a MarkupFrame.")
+        if column not in self._column_markup:
+            raise KeyError(column)
+        if value.frame is self and value.column == column:
+            return
+        self._column_markup[column] = self._intern(
+                value.frame._column_markup[value.column])
+        self._cell_markup[column] = dict(
+                (position, self._intern(cell)) for position, cell
+                in six.iteritems(value.frame._cell_markup[value.column]))
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("_column_markup", {})
+        if name in columns:
+            return MarkupColumn(self, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if isinstance(value, MarkupColumn):
+            self[name] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    def _intern(self, cell):
+        return cell.interned(self._interned)
+
+    def _set_cell(self, column, position, cell):
+        cell = self._intern(cell)
+        if cell is self._column_markup[column]:
+            self._cell_markup[column].pop(position, None)
+        else:
+            self._cell_markup[column][position] = cell
+
+    def _update_cells(self, column, positions, update):
+        """ Replaces the markup of the cells at positions by update(markup),
+            calling update only once per distinct markup. """
+        updated = {}
+        cells = self._cell_markup[column]
+        default = self._column_markup[column]
+        positions = np.asarray(positions).tolist()
+        if len(cells) == 0 and len(set(positions)) == len(positions):
+            # All cells share the column's markup, update them in one go.
+            new = self._intern(update(default))
+            if new is not default:
+                cells.update(dict.fromkeys(positions, new))
+            return
+        for position in positions:
+            cell = cells.get(position, default)
+            new = updated.get(id(cell))
+            if new is None:
+                new = updated[id(cell)] = self._intern(update(cell))
+            if new is default:
+                cells.pop(position, None)
+            else:
+                cells[position] = new
+
+    def _update_column(self, column, update):
+        """ Applies update to the markup of the column and of every cell
+            that differs from it. """
+        cells = self._cell_markup[column]
+        updated = dict((id(cell), self._intern(update(cell)))
+                       for cell in set(cells.values()))
+        self._column_markup[column] = self._intern(
+                update(self._column_markup[column]))
+        default = self._column_markup[column]
+        self._cell_markup[column] = dict(
+                (position, updated[id(cell)])
+                for position, cell in six.iteritems(cells)
+                if updated[id(cell)] is not default)
+
+    def cell_at(self, position, column):
+        """ Returns the markup of the cell at a row position. """
+        return self._cell_markup[column].get(position,
+                                             self._column_markup[column])
+
+    def cell(self, index, column):
+        """ Returns the markup of the cell at an index label. """
+        return self.cell_at(self.original_data.index.get_loc(index), column)
+
+    def add_classes(self, index, column, *classes):
+        """ Adds classes to the cell at an index label. """
+        position = self.original_data.index.get_loc(index)
+        self._set_cell(column, position,
+                       self.cell_at(position, column).add_classes(*classes))
+
+    def to_dataframe(self):
+        """ Returns a DataFrame with a MarkupCell for every cell. """
+        return pd.DataFrame(dict((k, [self.cell_at(i, k) for i in
+                                      range(len(self.original_data))])
+                                 for k in self.columns),
+                            index=self.index, columns=self.columns)
+
+    def check_shape(self):
         if self.shape != self.original_data.shape:
             raise ValueError("Markup DataFrame and original DataFrame do not share the same shape."\
                              "Did you modify the original DataFrame object?")
-        html = "<table class=\"%s\">" % (" ".join(self.classes))
-        html += "<thead>"
-        html += "<th></th>"
+
+    def invalid_positions(self):
+        """ Returns the sorted positions of rows with a "tc-cell-invalid"
+            cell, looking only at the stored markup. """
+        for column, cell in six.iteritems(self._column_markup):
+            if "tc-cell-invalid" in cell.classes:
+                return np.arange(len(self.original_data))
+        positions = set()
+        for column, cells in six.iteritems(self._cell_markup):
+            positions.update(position for position, cell in six.iteritems(cells)
+                             if "tc-cell-invalid" in cell.classes)
+        return np.array(sorted(positions), dtype=np.intp)
+
+    def iter_html(self, positions=None, chunksize=1000):
+        """ Yields the HTML table in pieces, rendering chunksize rows at a
+            time. Only the rows at positions are rendered if given; a gap
+            between two of them is shown as a row with an ellipsis. """
+        self.check_shape()
+        if positions is None:
+            positions = np.arange(len(self.original_data))
+        positions = np.asarray(positions, dtype=np.intp)
+
+        header = ["<table class=\"%s\">" % (" ".join(self.classes))]
+        header.append("<thead>")
+        header.append("<th></th>")
         for column in self.columns:
-            html += "<th>%s</th>" % column
-        html += "</thead>"
-        html += "<tbody>"
-        for index, row in self.iterrows():
-            html += "<tr>"
-            html += "<th>%s</th>" % index
-            for column in self.columns:
-                html += row[column].to_html(self.original_data.ix[index, column])
-            html += "</tr>"
-
-        html += "</tbody>"
-        html += "</table>"
-        return html
+            header.append("<th>%s</th>" % column)
+        header.append("</thead>")
+        header.append("<tbody>")
+        yield "".join(header)
+
+        gap = "<tr><th>...</th><td colspan=\"%i\">...</td></tr>" \
+                % (len(self.columns),)
+        previous = -1
+        for start in range(0, len(positions), chunksize):
+            chunk_positions = positions[start:start + chunksize]
+            chunk = self.original_data.iloc[chunk_positions]
+            values = [chunk.iloc[:, i].values
+                      for i in range(len(self.columns))]
+            html = []
+            for i, (position, index) in enumerate(zip(chunk_positions,
+                                                      chunk.index)):
+                if previous >= 0 and position > previous + 1:
+                    html.append(gap)
+                previous = position
+                html.append("<tr>")
+                html.append("<th>%s</th>" % index)
+                for column, column_values in zip(self.columns, values):
+                    html.append(self.cell_at(position, column)\
+                                    .to_html(column_values[i]))
+                html.append("</tr>")
+            yield "".join(html)
 
+        yield "</tbody></table>"
+
+    def to_html(self, max_rows=-1, max_cols=-1, show_dimensions=True):
+        return "".join(self.iter_html())
+
+    def write_html(self, f, positions=None, chunksize=1000):
+        """ Streams the HTML table into a file-like object or, if f is a
+            string, into the file of that name. """
+        if isinstance(f, six.string_types):
+            with io.open(f, "w", encoding="utf-8") as f:
+                return self.write_html(f, positions=positions,
+                                       chunksize=chunksize)
+        for piece in self.iter_html(positions=positions, chunksize=chunksize):
+            f.write(piece)
+
+    def write_html_pages(self, directory, rows_per_page=10000,
+                         prefix="page", chunksize=1000):
+        """ Writes the table into HTML files of rows_per_page rows each,
+            plus an index.html listing the pages and their invalid rows.
+            Returns the list of file names. """
+        invalid = self.invalid_positions()
+        n = len(self.original_data)
+        pages = []
+        for number, start in enumerate(range(0, max(n, 1), rows_per_page)):
+            stop = min(start + rows_per_page, n)
+            pages.append(("%s-%04i.html" % (prefix, number + 1), start, stop))
+
+        def navigation(number):
+            links = ["<a href=\"index.html\">Index</a>"]
+            if number > 0:
+                links.append("<a href=\"%s\">Previous</a>"
+                             % (pages[number - 1][0],))
+            if number + 1 < len(pages):
+                links.append("<a href=\"%s\">Next</a>"
+                             % (pages[number + 1][0],))
+            return "<p>%s</p>" % (" | ".join(links),)
+
+        for number, (name, start, stop) in enumerate(pages):
+            path = os.path.join(directory, name)
+            with io.open(path, "w", encoding="utf-8") as f:
+                f.write(html_page_header % dict(title="Rows %i to %i"
+                                                % (start, stop - 1)))
+                f.write(navigation(number))
+                self.write_html(f, positions=np.arange(start, stop),
+                                chunksize=chunksize)
+                f.write(navigation(number))
+                f.write(html_page_footer)
+
+        with io.open(os.path.join(directory, "index.html"), "w",
+                     encoding="utf-8") as f:
+            f.write(html_page_header % dict(title="Index"))
+            f.write("<table><thead><th>Page</th><th>Rows</th>"
+                    "<th>Invalid rows</th></thead><tbody>")
+            for name, start, stop in pages:
+                count = np.searchsorted(invalid, stop) - \
+                        np.searchsorted(invalid, start)
+                f.write("<tr><td><a href=\"%s\">%s</a></td>"
+                        "<td>%i to %i</td><td>%i</td></tr>"
+                        % (name, name, start, stop - 1, count))
+            f.write("</tbody></table>")
+            f.write(html_page_footer)
+        return ["index.html"] + [name for name, start, stop in pages]
+
+    def repr_positions(self):
+        """ Positions of the rows shown in notebooks: the first and last
+            repr_rows rows and up to repr_invalid_rows rows with invalid
+            cells. """
+        n = len(self.original_data)
+        if n <= 2 * self.repr_rows:
+            return np.arange(n)
+        invalid = self.invalid_positions()[:self.repr_invalid_rows]
+        return np.unique(np.concatenate([np.arange(self.repr_rows), invalid,
+                                         np.arange(n - self.repr_rows, n)]))
+
+    def _repr_html_(self):
+        positions = self.repr_positions()
+        html = "".join(self.iter_html(positions=positions))
+        if len(positions) < len(self.original_data):
+            html += "<p>%i rows x %i columns</p>" % self.shape
+        return html
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 import six
+import math
 
 
 def python_2_unicode_compatible(klass):
@@ -40,3 +41,29 @@ def force_text(s, encoding='utf-8', strings_only=False, errors='strict'):
     else:
         s = s.decode(encoding, errors)
     return s
+
+
+def normal_quantile(p):
+    """ Inverse of the standard normal distribution function, found by
+        bisection on math.erf. """
+    low, high = -40.0, 40.0
+    for i in range(100):
+        middle = (low + high) / 2
+        if 0.5 * (1 + math.erf(middle / math.sqrt(2))) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def wilson_interval(successes, n, confidence=0.95):
+    """ Wilson score interval for a proportion of successes out of n
+        trials. """
+    if n == 0:
+        return (0.0, 1.0)
+    z = normal_quantile(0.5 + confidence / 2)
+    p = float(successes) / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return (max(center - margin, 0.0), min(center + margin, 1.0))
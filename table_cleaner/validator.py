@@ -1,4 +1,8 @@
 from __future__ import unicode_literals
+from collections import OrderedDict
+
+import numpy as np
+
 from table_cleaner.utils import python_2_unicode_compatible
 
 
@@ -6,6 +10,10 @@ from table_cleaner.utils import python_2_unicode_compatible
 class Verdict(object):
     """ Base class for "Verdicts". A verdict is returned by validators
         to signal what happened to a particular cell."""
+
+    # Name of the stage of a combined validator which produced the verdict
+    stage = None
+
     def __init__(self, value, valid, reason="undefined", description="undefined verdict",
                  html_description=None, json_description=None):
         self.value = value
@@ -28,6 +36,146 @@ class Verdict(object):
                     )
 
 
+class ColumnVerdicts(object):
+    """ Column-wise counterpart of Verdict, returned by
+        Validator.validate_column.
+
+        ``values`` holds the validated value of every cell and ``valid`` marks
+        the cells without invalid verdicts. The verdicts themselves are stored
+        as parallel arrays: the position of the cell a verdict refers to, its
+        validity, reason and description. Verdicts of the same cell keep the
+        order in which the validator produced them.
+
+        ``extra`` maps suffixes to additional output columns, e.g. the name of
+        the pattern that matched. The Cleaner appends the suffix to the field
+        name to name the column in its output.
+
+        ``stages`` optionally names, for every verdict, the stage of a
+        combined validator (see table_cleaner.combinators) which produced
+        it. It is None for plain validators. """
+
+    def __init__(self, values, valid, positions, verdict_valid, reasons,
+                 descriptions, extra=None, stages=None):
+        self.values = values
+        self.valid = np.asarray(valid, dtype=bool)
+        self.positions = np.asarray(positions, dtype=np.intp)
+        self.verdict_valid = np.asarray(verdict_valid, dtype=bool)
+        self.reasons = np.asarray(reasons, dtype=object)
+        self.descriptions = np.asarray(descriptions, dtype=object)
+        if extra is None:
+            extra = OrderedDict()
+        self.extra = extra
+        if stages is not None:
+            stages = np.asarray(stages, dtype=object)
+        self.stages = stages
+
+    def __len__(self):
+        return len(self.valid)
+
+    def take(self, cells):
+        """ Returns the verdicts of the cells at the given sorted positions,
+            renumbered from zero. """
+        cells = np.asarray(cells, dtype=np.intp)
+        renumbered = np.full(len(self), -1, dtype=np.intp)
+        renumbered[cells] = np.arange(len(cells))
+        new_positions = renumbered[self.positions]
+        keep = new_positions >= 0
+        return ColumnVerdicts(np.asarray(self.values)[cells],
+                              self.valid[cells], new_positions[keep],
+                              self.verdict_valid[keep], self.reasons[keep],
+                              self.descriptions[keep],
+                              OrderedDict((suffix, np.asarray(values)[cells])
+                                          for suffix, values
+                                          in self.extra.items()),
+                              None if self.stages is None
+                              else self.stages[keep])
+
+    def verdicts_only(self):
+        """ Returns the verdicts without the values, validity and extra
+            columns of the cells, sharing their arrays. """
+        return ColumnVerdicts(None, (), self.positions, self.verdict_valid,
+                              self.reasons, self.descriptions,
+                              stages=self.stages)
+
+    @classmethod
+    def from_cells(cls, validator, cells):
+        """ Collects the verdicts of validator.validate for every cell. """
+        n = len(cells)
+        values = np.empty(n, dtype=object)
+        valid = np.ones(n, dtype=bool)
+        positions = []
+        verdict_valid = []
+        reasons = []
+        descriptions = []
+        stages = []
+        for i, obj in enumerate(cells):
+            for verdict in validator.validate(obj):
+                positions.append(i)
+                stages.append(verdict.stage)
+                verdict_valid.append(bool(verdict.valid))
+                reasons.append(verdict.reason)
+                descriptions.append(verdict.description)
+                values[i] = verdict.value
+                valid[i] &= bool(verdict.valid)
+        if all(stage is None for stage in stages):
+            stages = None
+        return cls(values, valid, positions, verdict_valid, reasons,
+                   descriptions, stages=stages)
+
+    @classmethod
+    def combine(cls, length, parts):
+        """ Combines the verdicts of disjoint subsets of a column of length
+            cells. ``parts`` is a list of (cell positions, ColumnVerdicts of
+            those cells) pairs. Extra columns missing from a part are None
+            there. """
+        values = np.empty(length, dtype=object)
+        valid = np.ones(length, dtype=bool)
+        extra = OrderedDict()
+        for cells, part in parts:
+            values[cells] = part.values
+            valid[cells] = part.valid
+            for suffix, column in part.extra.items():
+                if suffix not in extra:
+                    extra[suffix] = np.full(length, None, dtype=object)
+                extra[suffix][cells] = column
+        parts = [(np.asarray(cells, dtype=np.intp), part)
+                 for cells, part in parts]
+        positions = np.concatenate([np.zeros(0, dtype=np.intp)] +
+                                   [cells[part.positions]
+                                    for cells, part in parts])
+        # A stable sort keeps the verdicts of each cell in order.
+        order = np.argsort(positions, kind="mergesort")
+
+        def concatenate(attribute, dtype):
+            return np.concatenate([np.zeros(0, dtype=dtype)] +
+                                  [getattr(part, attribute)
+                                   for cells, part in parts])[order]
+
+        stages = None
+        if any(part.stages is not None for cells, part in parts):
+            stages = np.concatenate([np.zeros(0, dtype=object)] + [
+                np.full(len(part.positions), None, dtype=object)
+                if part.stages is None else part.stages
+                for cells, part in parts])[order]
+        return cls(values, valid, positions[order],
+                   concatenate("verdict_valid", bool),
+                   concatenate("reasons", object),
+                   concatenate("descriptions", object), extra=extra,
+                   stages=stages)
+
+    @classmethod
+    def one_per_cell(cls, values, valid, reason, description, extra=None):
+        """ Builds the verdicts of a validator which produces exactly one
+            verdict per cell. ``reason`` and ``description`` apply to the
+            invalid cells and may be scalars or arrays. """
+        valid = np.asarray(valid, dtype=bool)
+        undefined = Verdict(None, True)
+        return cls(values, valid, np.arange(len(valid)), valid,
+                   np.where(valid, undefined.reason, reason),
+                   np.where(valid, undefined.description, description),
+                   extra=extra)
+
+
 class Validator(object):
     """ Abstract base class for Validators."""
     def __init__(self, *args, **kwargs):
@@ -36,4 +184,11 @@ class Validator(object):
     def validate(self, obj):
         yield Verdict(obj, True)
 
+    def validate_column(self, column):
+        """ Validates a whole column (a pandas Series) and returns
+            ColumnVerdicts. This calls validate for every cell; subclasses
+            may override it with a vectorized implementation, which must
+            produce the same verdicts. """
+        return ColumnVerdicts.from_cells(self, column.values)
+
 
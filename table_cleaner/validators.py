@@ -1,17 +1,20 @@
 from __future__ import unicode_literals
 import six
-from .validator import Validator, Verdict
+from .validator import Validator, Verdict, ColumnVerdicts
 import table_cleaner.numeric
 from table_cleaner.numeric import *
 from .bool import *
 from .string import String
-from .regular_expression import Regex
+from .regular_expression import Regex, RegexSet
 from .email import Email
+from .choice import Choice
+from .combinators import Chain, All, Any
 
 
-all_names = ["Verdict", "Validator", "String"]\
+all_names = ["Verdict", "Validator", "ColumnVerdicts", "String"]\
           + table_cleaner.numeric.all_names \
-          + ["Bool", "Regex", "Email"]
+          + ["Bool", "Regex", "RegexSet", "Email", "Choice", "Chain", "All",
+             "Any"]
 
 __all__ = all_names
 
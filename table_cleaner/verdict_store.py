@@ -0,0 +1,180 @@
+""" Verdicts spilled to disk.
+
+    A Cleaner with a ``verdict_memory_budget`` collects the verdicts of its
+    chunks in memory until they take more than the budget, then moves them
+    into a SQLite database in a temporary directory and appends every
+    further chunk there. ``Cleaner.verdicts`` is then a SpilledVerdicts
+    handle, which reads verdicts back in batches, filtered by column, reason
+    or validity, instead of holding all of them in memory.
+
+    The store keeps the position of the row of every verdict rather than its
+    label, and looks the labels up in the index of the validated rows when
+    reading, so any kind of index (a MultiIndex, datetimes, ...) comes back
+    as it was. """
+from __future__ import unicode_literals
+import os
+import shutil
+import sqlite3
+import tempfile
+
+import pandas as pd
+
+__all__ = ["SpilledVerdicts", "VerdictAccumulator"]
+
+table_name = "verdicts"
+
+
+class SpilledVerdicts(object):
+    """ Handle to verdicts stored in a SQLite database. The verdicts are read
+        in the order they were written, with the same columns as the verdicts
+        DataFrame of a Cleaner. They are indexed by the labels of ``index``
+        at the positions they were written with, or by the positions if no
+        index is given. """
+
+    def __init__(self, directory=None, index=None):
+        self.own_directory = directory is None
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix="table-cleaner-")
+        self.directory = directory
+        self.path = os.path.join(directory, "verdicts.sqlite")
+        self.connection = sqlite3.connect(self.path)
+        self.index = index
+        self.columns = None
+        self.indexed = False
+
+    def append(self, verdicts):
+        """ Writes a verdicts DataFrame indexed by row positions to the
+            store. """
+        if self.columns is None:
+            self.columns = list(verdicts.columns)
+        verdicts.to_sql(table_name, self.connection, if_exists="append",
+                        index=True, index_label="position")
+        self.connection.commit()
+
+    def finish(self):
+        """ Indexes the stored verdicts for filtering; called once all
+            verdicts have been written. """
+        if self.indexed or self.columns is None:
+            return
+        for column in ("column", "reason"):
+            self.connection.execute('CREATE INDEX "by_%s" ON %s ("%s")'
+                                    % (column, table_name, column))
+        self.connection.commit()
+        self.indexed = True
+
+    def _where(self, columns=None, reasons=None, valid=None):
+        conditions = []
+        params = []
+        for name, values in (("column", columns), ("reason", reasons)):
+            if values is not None:
+                values = list(values)
+                conditions.append('"%s" IN (%s)'
+                                  % (name, ", ".join("?" * len(values))))
+                params.extend(values)
+        if valid is not None:
+            conditions.append('"valid" = ?')
+            params.append(int(bool(valid)))
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
+
+    def _frame(self, frame):
+        frame["valid"] = frame["valid"].astype(bool)
+        positions = frame["position"].values
+        frame = frame[self.columns]
+        frame.index = positions if self.index is None \
+            else self.index.take(positions)
+        return frame
+
+    def __len__(self):
+        return self.count()
+
+    def count(self, columns=None, reasons=None, valid=None):
+        """ Number of stored verdicts matching the filters. """
+        if self.columns is None:
+            return 0
+        where, params = self._where(columns, reasons, valid)
+        return self.connection.execute("SELECT COUNT(*) FROM %s%s"
+                                       % (table_name, where),
+                                       params).fetchone()[0]
+
+    def iter_batches(self, batchsize=10000, columns=None, reasons=None,
+                     valid=None):
+        """ Yields the verdicts matching the filters in DataFrames of at
+            most batchsize verdicts. ``columns`` and ``reasons`` are lists of
+            values to keep, ``valid`` keeps only valid or invalid verdicts. """
+        if self.columns is None:
+            return
+        where, params = self._where(columns, reasons, valid)
+        query = "SELECT * FROM %s%s ORDER BY rowid" % (table_name, where)
+        for frame in pd.read_sql_query(query, self.connection, params=params,
+                                       chunksize=batchsize):
+            yield self._frame(frame)
+
+    def __iter__(self):
+        return self.iter_batches()
+
+    def query(self, columns=None, reasons=None, valid=None):
+        """ Returns the verdicts matching the filters as one DataFrame. """
+        frames = list(self.iter_batches(columns=columns, reasons=reasons,
+                                        valid=valid))
+        if not frames:
+            return pd.DataFrame(columns=self.columns or [])
+        return pd.concat(frames)
+
+    def to_frame(self):
+        """ Loads all verdicts into memory. """
+        return self.query()
+
+    def close(self):
+        """ Closes the database and removes its temporary directory. """
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+            if self.own_directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class VerdictAccumulator(object):
+    """ Collects verdict DataFrames in memory until they take more than
+        ``budget`` bytes, and in a SpilledVerdicts store from then on. The
+        frames are indexed by the positions of their rows, which are turned
+        into the labels of ``index`` in the result. """
+
+    def __init__(self, budget=None, index=None):
+        self.budget = budget
+        self.index = index
+        self.frames = []
+        self.size = 0
+        self.store = None
+
+    def append(self, verdicts):
+        if self.store is not None:
+            self.store.append(verdicts)
+            return
+        self.frames.append(verdicts)
+        if self.budget is None:
+            return
+        self.size += int(verdicts.memory_usage(deep=True).sum())
+        if self.size > self.budget:
+            self.store = SpilledVerdicts(index=self.index)
+            for frame in self.frames:
+                self.store.append(frame)
+            self.frames = []
+
+    def result(self):
+        """ The verdicts as one DataFrame, or the SpilledVerdicts handle if
+            they were spilled. """
+        if self.store is not None:
+            self.store.finish()
+            return self.store
+        verdicts = pd.concat(self.frames)
+        if self.index is not None:
+            verdicts.index = self.index.take(verdicts.index.values)
+        return verdicts
@@ -1,10 +1,16 @@
 from __future__ import unicode_literals
 import six
 
+import subprocess
+import sys
 import unittest
+import numpy as np
 import pandas as pd
 
-from table_cleaner.cleaner import Cleaner, Int
+from table_cleaner.cleaner import Cleaner, Int, Email, RegexSet, String, \
+        NullDefault, Chain, Validator, Verdict, Int8, Int16, Float32
+from table_cleaner.summary import HeavyHitters, Reservoir
+from table_cleaner.utils import wilson_interval
 
 
 class TestCleaner(unittest.TestCase):
@@ -25,3 +31,478 @@ class TestCleaner(unittest.TestCase):
 
 
         cleaner = MyCleaner2(initial_df)
+
+    def test_verdicts(self):
+        initial_df = pd.DataFrame(dict(email=["alice@example.com", "blub",
+                                              "andy k@example .com"],
+                                       x=[0, "hello", 3]),
+                                  index=[10, 20, 30])
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+            email = Email()
+
+        cleaner = MyCleaner(initial_df, verdict_counter=5)
+        verdicts = cleaner.verdicts
+        self.assertEqual(list(verdicts.index), [10, 10, 20, 20, 30, 30, 30])
+        self.assertEqual(list(verdicts.column),
+                         ["x", "email", "x", "email", "x", "email", "email"])
+        self.assertEqual(list(verdicts.counter), list(range(5, 12)))
+        self.assertEqual(list(verdicts.reason),
+                         ["undefined", "undefined", "invalid int32",
+                          "email_without_at", "undefined",
+                          "email_domain_name_invalid",
+                          "email_user_name_invalid"])
+        self.assertEqual(list(cleaner.cleaned.email), ["alice@example.com"])
+
+    def test_regex_set(self):
+        initial_df = pd.DataFrame(dict(id=["SAP-123456", "C12", "X"]))
+
+        class MyCleaner(Cleaner):
+            id = RegexSet(dict(sap=r"^SAP-\d{6}$", crm=r"^C\d+$"))
+
+        cleaner = MyCleaner(initial_df)
+        self.assertEqual(list(cleaner.cleaned.id_pattern), ["sap", "crm"])
+        self.assertEqual(list(cleaner.verdicts.valid), [True, True, False])
+
+    def test_stages(self):
+        class MyCleaner(Cleaner):
+            x = Int()
+            email = Chain(String(max_length=20), Email(),
+                          names=["length", "address"])
+        initial_df = pd.DataFrame(dict(
+                x=[1, 2, 3],
+                email=["a@example.com", "averyveryverylong@example.com",
+                       "broken"]))
+        cleaner = MyCleaner(initial_df)
+        verdicts = cleaner.verdicts[cleaner.verdicts["column"] == "email"]
+        self.assertEqual(list(verdicts["stage"]),
+                         ["address", "length", "address"])
+        self.assertEqual(list(verdicts["valid"]), [True, False, False])
+        self.assertTrue(cleaner.verdicts[cleaner.verdicts["column"] == "x"]
+                        ["stage"].isnull().all())
+        self.assertFalse("stage" in Cleaner(initial_df).verdicts)
+
+    def test_cleaned_dtypes(self):
+        class MyCleaner(Cleaner):
+            x = Int8()
+            y = Float32()
+            z = Int16()
+        initial_df = pd.DataFrame(dict(x=[1, 2, 300], y=[0.5, 1.5, 2.5],
+                                       z=["1", "2", "3"]))
+        cleaned = MyCleaner(initial_df).cleaned
+        self.assertEqual(list(cleaned.dtypes),
+                         [np.int8, np.float32, np.int16])
+        self.assertEqual(list(cleaned.x), [1, 2])
+
+    def test_option_names(self):
+        class MyCleaner(Cleaner):
+            sample = String(max_length=2)
+            threads = Int(min_value=0)
+            valid = Int(min_value=0)
+            validate = Int()
+            x = Int()
+        self.assertEqual(sorted(MyCleaner._fields),
+                         ["sample", "threads", "valid", "validate", "x"])
+        self.assertIsNone(MyCleaner.sample)
+        self.assertEqual(MyCleaner.threads, 1)
+        self.assertIs(MyCleaner.x, MyCleaner._fields["x"])
+
+        initial_df = pd.DataFrame(dict(sample=["a", "abc", "b"],
+                                       threads=[1, 2, -3], valid=[1, -1, 1],
+                                       validate=[1, 2, 3], x=[1, 2, 3]))
+        cleaner = MyCleaner(initial_df, chunksize=2)
+        self.assertEqual(list(cleaner.valid), [True, False, False])
+        self.assertEqual(len(cleaner.cleaned), 1)
+        self.assertEqual(cleaner.invalid_counts,
+                         {("sample", "too long"): 1,
+                          ("valid", "value too low"): 1,
+                          ("threads", "value too low"): 1})
+
+
+class TestFailFast(unittest.TestCase):
+    def setUp(self):
+        # Every fourth row is invalid
+        self.initial_df = pd.DataFrame(dict(x=[i if i % 4 else -i
+                                               for i in range(1, 101)]))
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+        self.cleaner_class = MyCleaner
+
+    def test_complete(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=10)
+        self.assertFalse(cleaner.stopped_early)
+        self.assertEqual(cleaner.rows_validated, 100)
+        self.assertEqual(cleaner.invalid_rows, 25)
+        self.assertEqual(len(cleaner.cleaned), 75)
+        self.assertEqual(list(cleaner.verdicts.counter), list(range(100)))
+        self.assertEqual(cleaner.invalid_counts, {("x", "value too low"): 25})
+
+    def test_max_invalid_rows(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=10,
+                                     max_invalid_rows=5)
+        self.assertTrue(cleaner.stopped_early)
+        self.assertEqual(cleaner.rows_validated, 20)
+        self.assertEqual(cleaner.invalid_rows, 5)
+        self.assertEqual(len(cleaner.verdicts), 20)
+
+    def test_max_error_rate(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=10,
+                                     max_error_rate=0.5)
+        self.assertFalse(cleaner.stopped_early)
+
+        cleaner = self.cleaner_class(self.initial_df, chunksize=10,
+                                     max_error_rate=0.2)
+        self.assertTrue(cleaner.stopped_early)
+        self.assertEqual(cleaner.rows_validated, 20)
+
+
+class CountingInt(Validator):
+    """ Int validator counting the cells it validates. """
+    def __init__(self):
+        self.int = Int(min_value=0)
+        self.seen = 0
+
+    def validate(self, obj):
+        self.seen += 1
+        return self.int.validate(obj)
+
+
+class TestLazyResults(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(x=[1, -2, 3, -4, 5]))
+
+        class MyCleaner(Cleaner):
+            x = CountingInt()
+        self.cleaner_class = MyCleaner
+        self.validator = MyCleaner._fields["x"]
+
+    def test_gating(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=2)
+        self.assertEqual(self.validator.seen, 0)
+        self.assertEqual(cleaner.invalid_rows, 2)
+        self.assertEqual(self.validator.seen, 5)
+        self.assertFalse("cleaned" in cleaner.__dict__)
+        self.assertFalse("verdicts" in cleaner.__dict__)
+        self.assertEqual(list(cleaner.valid),
+                         [True, False, True, False, True])
+
+    def test_shared_pass(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=2)
+        self.assertEqual(list(cleaner.cleaned["x"]), [1, 3, 5])
+        self.assertEqual(list(cleaner.verdicts["counter"]), list(range(5)))
+        self.assertEqual(cleaner.rows_validated, 5)
+        # Both results were built from the same validation pass
+        self.assertEqual(self.validator.seen, 5)
+        self.assertIsNone(cleaner._cleaned_parts)
+        self.assertIsNone(cleaner._verdict_parts)
+
+    def test_retained_parts(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=2)
+        cleaner.validate()
+        # Only the values of valid rows are kept for cleaned
+        self.assertEqual([len(values) for chunk, valid, columns
+                          in cleaner._cleaned_parts
+                          for column, values in columns], [1, 1, 1])
+        for results, counter, offset in cleaner._verdict_parts:
+            for key, result in results:
+                self.assertIsNone(result.values)
+                self.assertEqual(len(result.valid), 0)
+        self.assertEqual(len(cleaner.cleaned), 3)
+        self.assertIsNone(cleaner._cleaned_parts)
+        self.assertEqual(len(cleaner._verdict_parts), 3)
+        self.assertEqual(list(cleaner.verdicts.index), list(range(5)))
+        self.assertIsNone(cleaner._verdict_parts)
+
+        cleaner = self.cleaner_class(self.initial_df, keep_verdicts=False)
+        cleaner.validate()
+        self.assertEqual(cleaner._verdict_parts, [])
+        self.assertEqual(len(cleaner.cleaned), 3)
+        self.assertIsNone(cleaner._cleaned_parts)
+
+    def test_keep_results(self):
+        cleaner = self.cleaner_class(self.initial_df, chunksize=2,
+                                     keep_results=False)
+        self.assertEqual(cleaner.invalid_rows, 2)
+        self.assertEqual(list(cleaner.valid),
+                         [True, False, True, False, True])
+        self.assertIsNone(cleaner._cleaned_parts)
+        self.assertIsNone(cleaner._verdict_parts)
+        self.assertRaises(ValueError, getattr, cleaner, "cleaned")
+        self.assertRaises(ValueError, getattr, cleaner, "verdicts")
+        # Streaming runs build nothing either
+        cleaner = self.cleaner_class(self.initial_df, keep_results=False,
+                                     verdict_memory_budget=1)
+        self.assertEqual(cleaner.invalid_rows, 2)
+        self.assertFalse("verdicts" in cleaner.__dict__)
+        self.assertRaises(ValueError, getattr, cleaner, "verdicts")
+
+    def test_assignment(self):
+        cleaner = self.cleaner_class(self.initial_df)
+        cleaner.verdicts = None
+        self.assertIsNone(cleaner.verdicts)
+        self.assertEqual(len(cleaner.cleaned), 3)
+        self.assertIsNone(cleaner._verdict_parts)
+        self.assertRaises(AttributeError, getattr, cleaner, "missing")
+
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+            y = Int(max_value=10)
+            email = Email()
+        self.cleaner_class = MyCleaner
+        self.initial_df = pd.DataFrame(dict(
+                x=[i if i % 4 else -i for i in range(1, 101)],
+                y=[i % 13 for i in range(100)],
+                email=["a%i@example.com" % i if i % 7 else "broken"
+                       for i in range(100)]))
+
+    def test_same_results(self):
+        expected = self.cleaner_class(self.initial_df, chunksize=30)
+        cleaner = self.cleaner_class(self.initial_df, chunksize=30,
+                                     threads=3)
+        pd.testing.assert_frame_equal(cleaner.verdicts, expected.verdicts)
+        pd.testing.assert_frame_equal(cleaner.cleaned, expected.cleaned)
+        self.assertEqual(cleaner.invalid_counts, expected.invalid_counts)
+
+    def test_class_attribute(self):
+        class ThreadedCleaner(self.cleaner_class):
+            threads = 2
+        cleaner = ThreadedCleaner(self.initial_df)
+        self.assertEqual(cleaner.threads, 2)
+        self.assertEqual(len(cleaner.cleaned),
+                         len(self.cleaner_class(self.initial_df).cleaned))
+
+
+class TestNullPolicy(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(
+                x=[1, None, -3, np.nan, 5],
+                name=["Alice", None, "Bob", "Mary", np.nan]),
+            columns=["x", "name"])
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+            name = String()
+        self.cleaner_class = MyCleaner
+
+    def test_no_policy(self):
+        cleaner = self.cleaner_class(self.initial_df)
+        # String turns missing values into text
+        self.assertEqual(list(cleaner.cleaned["name"]), ["Alice", "nan"])
+
+    def test_allow(self):
+        cleaner = self.cleaner_class(self.initial_df, null_policy="allow")
+        self.assertEqual(len(cleaner.cleaned), 4)
+        self.assertEqual(list(cleaner.cleaned["name"][:3]),
+                         ["Alice", None, "Mary"])
+        self.assertTrue(np.isnan(cleaner.cleaned["x"][1]))
+        self.assertEqual(len(cleaner.verdicts), 10)
+
+    def test_reject(self):
+        cleaner = self.cleaner_class(self.initial_df,
+                                     null_policy=dict(name="reject"))
+        verdicts = cleaner.verdicts[cleaner.verdicts["column"] == "name"]
+        self.assertEqual(list(verdicts["reason"]),
+                         ["undefined", "missing value", "undefined",
+                          "undefined", "missing value"])
+        self.assertEqual(list(verdicts.index), [0, 1, 2, 3, 4])
+        self.assertEqual(list(cleaner.cleaned["name"]), ["Alice"])
+
+    def test_default(self):
+        cleaner = self.cleaner_class(self.initial_df, null_policy=dict(
+                x=NullDefault(0), name=NullDefault("unknown")))
+        self.assertEqual(list(cleaner.cleaned["x"]), [1, 0, 0, 5])
+        self.assertEqual(list(cleaner.cleaned["name"]),
+                         ["Alice", "unknown", "Mary", "unknown"])
+
+        # An invalid default makes every missing cell invalid
+        cleaner = self.cleaner_class(self.initial_df,
+                                     null_policy=dict(x=NullDefault(-1)))
+        verdicts = cleaner.verdicts[cleaner.verdicts["column"] == "x"]
+        self.assertEqual(list(verdicts["reason"]),
+                         ["undefined", "value too low", "value too low",
+                          "value too low", "undefined"])
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, self.cleaner_class, self.initial_df,
+                          null_policy="ignore")
+        self.assertRaises(ValueError, self.cleaner_class, self.initial_df,
+                          null_policy=dict(x="skip"))
+
+
+class TestSampling(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(x=[i if i % 4 else -i
+                                               for i in range(1, 1001)],
+                                            group=["a"] * 900 + ["b"] * 100))
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+        self.cleaner_class = MyCleaner
+
+    def test_sample(self):
+        cleaner = self.cleaner_class(self.initial_df, sample=200,
+                                     random_state=0)
+        self.assertEqual(cleaner.rows_validated, 200)
+        self.assertTrue(cleaner.verdicts.index.is_monotonic_increasing)
+        estimates = cleaner.estimates
+        self.assertEqual(list(estimates.column), ["x"])
+        self.assertEqual(list(estimates.reason), ["value too low"])
+        self.assertTrue(estimates.lower[0] < 0.25 < estimates.upper[0])
+
+    def test_stratified(self):
+        cleaner = self.cleaner_class(self.initial_df, sample=0.1,
+                                     sample_by="group", random_state=0)
+        self.assertEqual(cleaner.rows_validated, 100)
+        sampled = self.initial_df.loc[cleaner.verdicts.index]
+        self.assertEqual(list(sampled.group.value_counts()), [90, 10])
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, self.cleaner_class, self.initial_df,
+                          sample=1.5)
+        self.assertRaises(ValueError, self.cleaner_class, self.initial_df,
+                          sample=0)
+
+    def test_wilson_interval(self):
+        lower, upper = wilson_interval(10, 100)
+        self.assertAlmostEqual(lower, 0.0552, places=4)
+        self.assertAlmostEqual(upper, 0.1744, places=4)
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+
+class TestSummary(unittest.TestCase):
+    def test_heavy_hitters(self):
+        hitters = HeavyHitters(2)
+        hitters.update(["a"] * 50 + ["b"] * 30 + list("cdefghij"))
+        hitters.update(["a"] * 10 + ["k"] * 3)
+        self.assertEqual([v for v, c in hitters.top()], ["a", "b"])
+        self.assertEqual(hitters.total, 101)
+        for value, true_count in [("a", 60), ("b", 30)]:
+            self.assertTrue(hitters.counts[value] <= true_count <=
+                            hitters.counts[value] + hitters.error)
+
+    def test_reservoir(self):
+        reservoir = Reservoir(5, random_state=0)
+        reservoir.update(range(3))
+        self.assertEqual(reservoir.items, [0, 1, 2])
+        for start in range(3, 1000, 100):
+            reservoir.update(range(start, start + 100))
+        self.assertEqual(reservoir.seen, 1003)
+        self.assertEqual(len(reservoir.items), 5)
+        self.assertEqual(len(set(reservoir.items)), 5)
+
+    def test_cleaner(self):
+        initial_df = pd.DataFrame(dict(x=["a", "b", "a", 1, "a", -5, "b"] * 10))
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+
+        cleaner = MyCleaner(initial_df, chunksize=7, top_k=2, examples=3,
+                            keep_verdicts=False, random_state=0)
+        self.assertTrue(cleaner.verdicts is None)
+        self.assertEqual(len(cleaner.cleaned), 10)
+        summary = cleaner.summary
+        self.assertEqual(summary.counts, {("x", "invalid int32"): 50,
+                                          ("x", "value too low"): 10})
+        top = summary.top_values("x", "invalid int32")
+        self.assertEqual(list(top.value), ["a", "b"])
+        self.assertEqual(list(top["count"]), [30, 20])
+        examples = summary.example_failures("x", "value too low")
+        self.assertEqual(len(examples), 3)
+        self.assertEqual(set(examples.value), set([-5]))
+        self.assertEqual(list(summary.to_frame().invalid), [50, 10])
+
+
+class TestImports(unittest.TestCase):
+    def imported_modules(self, statement):
+        output = subprocess.check_output([sys.executable, "-c",
+            statement + "; import sys; print(' '.join(sys.modules))"])
+        return output.decode("utf-8").split()
+
+    def test_lazy_imports(self):
+        modules = self.imported_modules("import table_cleaner")
+        self.assertFalse("pandas" in modules)
+        self.assertFalse("numpy" in modules)
+        self.assertFalse("table_cleaner.validators" in modules)
+
+        modules = self.imported_modules("from table_cleaner import Email")
+        self.assertFalse("pandas" in modules)
+        self.assertFalse("table_cleaner.table_markup" in modules)
+
+    def test_names(self):
+        import table_cleaner
+        import table_cleaner.validators
+        self.assertEqual(table_cleaner._validator_names,
+                         table_cleaner.validators.all_names)
+        for name in table_cleaner.__all__:
+            self.assertTrue(getattr(table_cleaner, name) is not None)
+
+
+try:
+    import dask
+    import dask.dataframe as dd
+except ImportError:
+    dask = None
+
+
+class DaskCleaner(Cleaner):
+    x = Int(min_value=0)
+    email = Email()
+
+
+@unittest.skipIf(dask is None, "dask is not installed")
+class TestDask(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(
+            x=[i if i % 3 else -i for i in range(1, 41)],
+            email=["you@example.com", "blub", "a@b.com", "x@y@z"] * 10))
+        self.expected = DaskCleaner(self.initial_df)
+
+    def check(self, scheduler):
+        ddf = dd.from_pandas(self.initial_df, npartitions=4)
+        cleaner = DaskCleaner(ddf, verdict_counter=3)
+        self.assertTrue(isinstance(cleaner.verdicts, dd.DataFrame))
+        cleaned, verdicts = dask.compute(cleaner.cleaned, cleaner.verdicts,
+                                         scheduler=scheduler)
+        expected = self.expected.verdicts
+        self.assertEqual(list(verdicts.index), list(expected.index))
+        self.assertEqual(list(verdicts.reason), list(expected.reason))
+        self.assertEqual(list(verdicts.counter), list(expected.counter + 3))
+        self.assertEqual(list(cleaned.x), list(self.expected.cleaned.x))
+        self.assertEqual(list(cleaner.verdicts.columns), list(expected.columns))
+        self.assertEqual(dict(cleaner.cleaned.dtypes), dict(cleaned.dtypes))
+        self.assertEqual(dict(cleaner.verdicts.dtypes),
+                         dict(verdicts.dtypes))
+        self.assertEqual(cleaned["x"].dtype, np.int32)
+
+    def test_meta(self):
+        # The first partition has no valid rows, the passthrough column
+        # holds integers as objects.
+        initial_df = pd.DataFrame(dict(x=[-1, -2, 3, 4], email=["a@b.com"] * 4,
+                                       other=pd.Series([1, 2, 3, 4],
+                                                       dtype=object)))
+        ddf = dd.from_pandas(initial_df, npartitions=2)
+        cleaner = DaskCleaner(ddf)
+        self.assertEqual(dict(cleaner.cleaned.dtypes),
+                         dict(x=np.int32, email=object, other=object))
+        partitions = [partition.compute() for partition
+                      in cleaner.cleaned.to_delayed()]
+        self.assertEqual(len(partitions[0]), 0)
+        for partition in partitions:
+            self.assertEqual(dict(partition.dtypes),
+                             dict(cleaner.cleaned.dtypes))
+        self.assertEqual(list(cleaner.cleaned.compute().x), [3, 4])
+
+    def test_threads(self):
+        self.check("threads")
+
+    def test_processes(self):
+        self.check("processes")
+
+    def test_invalid_args(self):
+        ddf = dd.from_pandas(self.initial_df, npartitions=2)
+        self.assertRaises(ValueError, DaskCleaner, ddf, sample=0.5)
@@ -0,0 +1,120 @@
+from __future__ import unicode_literals
+import six
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, Email
+from table_cleaner import cli
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ExampleCleaner(Cleaner):
+    x = Int(min_value=0)
+    email = Email()
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.directory, "out")
+        self.valid_df = pd.DataFrame(dict(x=range(25),
+                                          email=["you@example.com"] * 25))
+        self.invalid_df = pd.DataFrame(dict(x=[1, -1, "a"],
+                                            email=["you@example.com"] * 3))
+        self.valid_df.to_csv(os.path.join(self.directory, "valid.csv"),
+                             index=False)
+        self.invalid_df.to_csv(os.path.join(self.directory, "invalid.csv"),
+                               index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_cli(self, *args):
+        return cli.main(["tests.test_cli:ExampleCleaner"] + list(args) +
+                        ["-o", self.output_dir])
+
+    def read_output(self, name):
+        return pd.read_csv(os.path.join(self.output_dir, name))
+
+    def test_load_object(self):
+        self.assertTrue(cli.load_object("tests.test_cli:ExampleCleaner")
+                        is ExampleCleaner)
+        self.assertTrue(cli.load_object("tests.test_cli.ExampleCleaner")
+                        is ExampleCleaner)
+        self.assertRaises(ValueError, cli.load_object, "ExampleCleaner")
+
+    def test_valid(self):
+        path = os.path.join(self.directory, "valid.csv")
+        self.assertEqual(self.run_cli(path, "-j", "1", "--chunksize", "10"),
+                         0)
+        cleaned = self.read_output("valid.cleaned.csv")
+        self.assertEqual(list(cleaned.x), list(range(25)))
+        verdicts = self.read_output("valid.verdicts.csv")
+        self.assertEqual(list(verdicts.counter), list(range(50)))
+
+    def test_pool(self):
+        self.assertEqual(self.run_cli(self.directory, "-j", "2"), 1)
+        verdicts = self.read_output("invalid.verdicts.csv")
+        self.assertEqual(list(verdicts[~verdicts.valid].reason),
+                         ["value too low", "invalid int32"])
+        self.assertEqual(len(self.read_output("valid.cleaned.csv")), 25)
+
+    def test_same_names(self):
+        os.mkdir(os.path.join(self.directory, "b"))
+        self.invalid_df.to_csv(os.path.join(self.directory, "b",
+                                            "valid.csv"), index=False)
+        self.assertEqual(cli.output_names(["a/data.csv", "b/data.csv",
+                                           "data-1.csv", "data.parquet"]),
+                         ["data", "data-2", "data-1", "data-3"])
+        self.assertEqual(self.run_cli(self.directory,
+                                      os.path.join(self.directory, "b"),
+                                      "-j", "2"), 1)
+        self.assertEqual(len(self.read_output("valid.cleaned.csv")), 25)
+        self.assertEqual(len(self.read_output("valid-1.cleaned.csv")), 1)
+
+    def test_error(self):
+        path = os.path.join(self.directory, "missing.csv")
+        self.assertEqual(self.run_cli(path, "-j", "1"), 2)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        path = os.path.join(self.directory, "valid.parquet")
+        self.valid_df.astype(str).to_parquet(path)
+        self.assertEqual(self.run_cli(path, "-j", "1", "--chunksize", "10",
+                                      "--format", "parquet"), 0)
+        cleaned = pd.read_parquet(os.path.join(self.output_dir,
+                                               "valid.cleaned.parquet"))
+        self.assertEqual(list(cleaned.x), list(range(25)))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_empty_chunks(self):
+        path = os.path.join(self.directory, "negative.csv")
+        pd.DataFrame(dict(x=["-1", "-2", "3", "4"],
+                          email=["you@example.com"] * 4)).to_csv(
+                path, index=False)
+        self.assertEqual(self.run_cli(path, "-j", "1", "--chunksize", "2",
+                                      "--format", "parquet"), 1)
+        cleaned = pd.read_parquet(os.path.join(self.output_dir,
+                                               "negative.cleaned.parquet"))
+        self.assertEqual(list(cleaned.x), [3, 4])
+
+        path = os.path.join(self.directory, "all_negative.csv")
+        pd.DataFrame(dict(x=["-1"], email=["you@example.com"])).to_csv(
+                path, index=False)
+        self.assertEqual(self.run_cli(path, "-j", "1", "--format",
+                                      "parquet"), 1)
+        cleaned = pd.read_parquet(os.path.join(
+                self.output_dir, "all_negative.cleaned.parquet"))
+        self.assertEqual(len(cleaned), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
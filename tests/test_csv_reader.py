@@ -0,0 +1,118 @@
+from __future__ import unicode_literals
+import six
+
+import io
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int16, Uint8, Float32, String, \
+        Bool
+from table_cleaner.csv_reader import parse_dtypes, read_csv, convert_column
+
+
+class MyCleaner(Cleaner):
+    x = Int16(min_value=0)
+    u = Uint8()
+    f = Float32()
+    name = String(max_length=4)
+    flag = Bool(allow_nan=False)
+
+
+clean_csv = """x,u,f,name,flag,other,unused
+1,2,1.5,ab,yes,a,z
+300,3,2.5,abcdef,no,b,z
+-4,4,1e30,x,True,c,z
+4000,255,-1,y,0,d,z
+"""
+
+dirty_csv = clean_csv + "abc,1,1,z,maybe,e,z\n"
+
+# Values the CSV parser would accept as numbers but the validators do not,
+# and values out of the range of the validators.
+coerced_csv = """x,u,f,name,flag,other
+1.0,1,1e39,a,yes,a
+1e3,-0,1_0,b,no,b
+40000,256,inf,c,yes,c
+"""
+
+
+class TestCsvReader(unittest.TestCase):
+    def expected(self, text):
+        data = pd.read_csv(io.StringIO(text), dtype=object)
+        return MyCleaner(data[["x", "u", "f", "name", "flag", "other"]])
+
+    def assertSameResults(self, cleaner, expected):
+        self.assertEqual(list(cleaner.valid), list(expected.valid))
+        for column in ["valid", "reason", "description", "column"]:
+            self.assertEqual(list(cleaner.verdicts[column]),
+                             list(expected.verdicts[column]))
+        for column in expected.cleaned.columns:
+            self.assertEqual(list(cleaner.cleaned[column]),
+                             list(expected.cleaned[column]))
+
+    def test_parse_dtypes(self):
+        self.assertEqual(parse_dtypes(MyCleaner),
+                         dict(x=np.int64, u=np.uint64, f=np.float64,
+                              flag=bool))
+
+        class OtherBools(Cleaner):
+            a = Bool()
+            b = Bool(true_values=["ja"], false_values=["nein"])
+        self.assertEqual(parse_dtypes(OtherBools), dict(a=bool))
+
+    def test_convert_column(self):
+        validator = MyCleaner._fields["x"]
+        column = pd.Series(["1", "+2", "-3"], dtype=object)
+        self.assertEqual(list(convert_column(column, validator)), [1, 2, -3])
+        for text in ["1.0", "1e3", " 1", "40000", "99999999999999999999"]:
+            column = pd.Series(["1", text], dtype=object)
+            self.assertIs(convert_column(column, validator), column)
+        column = pd.Series(["1", np.nan], dtype=object)
+        self.assertIs(convert_column(column, validator), column)
+        column = pd.Series(["1.5", np.nan, ".5"], dtype=object)
+        self.assertEqual(convert_column(column, MyCleaner._fields["f"])
+                         .dtype, np.float64)
+
+    def test_typed(self):
+        data = read_csv(MyCleaner, io.StringIO(clean_csv),
+                        passthrough=["other"])
+        self.assertEqual(sorted(data.columns),
+                         sorted(["x", "u", "f", "name", "flag", "other"]))
+        self.assertEqual(data["x"].dtype, np.int64)
+        self.assertEqual(data["f"].dtype, np.float64)
+        self.assertEqual(data["flag"].dtype, bool)
+        self.assertEqual(data["other"].dtype, object)
+
+        cleaner = MyCleaner.read_csv(io.StringIO(clean_csv),
+                                     passthrough=["other"])
+        self.assertSameResults(cleaner, self.expected(clean_csv))
+
+    def test_fallback(self):
+        data = read_csv(MyCleaner, io.StringIO(dirty_csv))
+        self.assertEqual(data["x"].dtype, object)
+        self.assertEqual(data["u"].dtype, np.uint64)
+        self.assertEqual(data["flag"].dtype, object)
+        cleaner = MyCleaner.read_csv(io.StringIO(dirty_csv),
+                                     passthrough=["other"])
+        self.assertSameResults(cleaner, self.expected(dirty_csv))
+
+    def test_coerced(self):
+        data = read_csv(MyCleaner, io.StringIO(coerced_csv))
+        for column in ["x", "u", "f"]:
+            self.assertEqual(data[column].dtype, object)
+        cleaner = MyCleaner.read_csv(io.StringIO(coerced_csv),
+                                     passthrough=["other"])
+        self.assertSameResults(cleaner, self.expected(coerced_csv))
+        self.assertEqual(cleaner.invalid_rows, 3)
+
+    def test_options(self):
+        cleaner = MyCleaner.read_csv(io.StringIO(clean_csv),
+                                     read_options=dict(nrows=2),
+                                     chunksize=1)
+        self.assertEqual(cleaner.rows_validated, 2)
+        self.assertEqual(cleaner.invalid_rows, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+from __future__ import unicode_literals
+import six
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, String
+from table_cleaner.diff import compare_runs, failure_keys
+from table_cleaner.memory_map import NumpySource
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class MyCleaner(Cleaner):
+    x = Int(min_value=0)
+    name = String(max_length=3)
+
+
+class TestCompareRuns(unittest.TestCase):
+    def setUp(self):
+        self.yesterday = pd.DataFrame(dict(
+                id=[10, 11, 12, 13, 14],
+                x=[1, -2, 3, -4, 5],
+                name=["ab", "abcd", "ab", "x", "toolong"]),
+            columns=["id", "x", "name"])
+        # Rows moved, one failure fixed, one new
+        self.today = pd.DataFrame(dict(
+                id=[13, 10, 11, 12, 14],
+                x=[-4, 1, -2, 3, 9],
+                name=["x", "abcd", "abcd", "ab", "ok"]),
+            columns=["id", "x", "name"])
+
+    def summary(self, diff):
+        return dict(((row.column, row.reason),
+                     (row.before, row.after, row.new, row.resolved,
+                      row.persisting))
+                    for row in diff.summary.itertuples())
+
+    def test_content(self):
+        diff = compare_runs(MyCleaner(self.yesterday), MyCleaner(self.today))
+        # Today's "abcd" in row 1 failed yesterday as well, in another row
+        self.assertEqual(self.summary(diff),
+                         {("x", "value too low"): (2, 2, 0, 0, 2),
+                          ("name", "too long"): (2, 2, 0, 1, 2)})
+        self.assertEqual(len(diff.new), 0)
+        self.assertEqual(list(diff.resolved.index), [4])
+        self.assertEqual(list(diff.persisting.index), [0, 1, 2, 2])
+
+    def test_one_of_two_fixed(self):
+        today = self.yesterday.copy()
+        today.loc[1, "name"] = "ab"
+        diff = compare_runs(MyCleaner(self.yesterday), MyCleaner(today))
+        self.assertEqual(self.summary(diff),
+                         {("x", "value too low"): (2, 2, 0, 0, 2),
+                          ("name", "too long"): (2, 1, 0, 1, 1)})
+        self.assertEqual(list(diff.resolved.index), [1])
+        self.assertEqual(list(diff.resolved.column), ["name"])
+        diff = compare_runs(MyCleaner(self.yesterday), MyCleaner(today),
+                            by=["id"])
+        self.assertEqual(self.summary(diff)[("x", "value too low")],
+                         (2, 2, 0, 0, 2))
+
+    def test_key_columns(self):
+        diff = compare_runs(MyCleaner(self.yesterday), MyCleaner(self.today),
+                            by=["id"])
+        self.assertEqual(self.summary(diff),
+                         {("x", "value too low"): (2, 2, 0, 0, 2),
+                          ("name", "too long"): (2, 2, 1, 1, 1)})
+        self.assertEqual(list(diff.new.index), [1])
+        self.assertEqual(list(diff.new.column), ["name"])
+        self.assertRaises(ValueError, compare_runs, MyCleaner(self.yesterday),
+                          MyCleaner(self.today), by=["missing"])
+        self.assertRaises(ValueError, compare_runs, MyCleaner(self.yesterday),
+                          MyCleaner(self.today), by=[])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_windowed(self):
+        def source(frame):
+            return NumpySource([(column, frame[column].values)
+                                for column in frame.columns])
+        expected = compare_runs(MyCleaner(self.yesterday),
+                                MyCleaner(self.today))
+        diff = compare_runs(MyCleaner(source(self.yesterday), chunksize=2),
+                            MyCleaner(source(self.today), chunksize=2))
+        pd.testing.assert_frame_equal(diff.summary, expected.summary)
+        diff = compare_runs(MyCleaner(source(self.yesterday), chunksize=2,
+                                      verdict_memory_budget=1),
+                            MyCleaner(source(self.today)), by=["id"])
+        self.assertEqual(list(diff.summary.new), [0, 1])
+
+    def test_sampled(self):
+        self.assertRaises(ValueError, compare_runs,
+                          MyCleaner(self.yesterday, sample=3),
+                          MyCleaner(self.today))
+
+    def test_index(self):
+        yesterday = MyCleaner(self.yesterday).verdicts
+        today = MyCleaner(self.today).verdicts
+        diff = compare_runs(yesterday, today, by="index")
+        self.assertEqual(self.summary(diff),
+                         {("x", "value too low"): (2, 2, 2, 2, 0),
+                          ("name", "too long"): (2, 2, 1, 1, 1)})
+        # Verdict frames need their data to be compared by content
+        self.assertRaises(ValueError, compare_runs, yesterday, today)
+        diff = compare_runs(yesterday, today, self.yesterday, self.today)
+        self.assertEqual(list(diff.summary.new), [0, 0])
+        diff = compare_runs(yesterday, today, self.yesterday, self.today,
+                            by=["id"])
+        self.assertEqual(list(diff.summary.new), [0, 1])
+
+    def test_new_reason(self):
+        today = self.today.copy()
+        today.loc[4, "x"] = "a"
+        key = ("x", "invalid %s" % (np.dtype(Int.dtype).name,))
+        diff = compare_runs(MyCleaner(self.yesterday), MyCleaner(today))
+        self.assertEqual(self.summary(diff)[key], (0, 1, 1, 0, 0))
+        diff = compare_runs(MyCleaner(today), MyCleaner(self.yesterday))
+        self.assertEqual(self.summary(diff)[key], (1, 0, 0, 1, 0))
+
+    def test_keys(self):
+        verdicts = MyCleaner(self.yesterday).verdicts
+        hashes, columns, reasons = failure_keys(verdicts, self.yesterday)
+        self.assertEqual(hashes.dtype, np.uint64)
+        self.assertEqual(len(hashes), 4)
+        self.assertNotEqual(hashes[0], hashes[1])
+        self.assertEqual(list(columns), ["x", "name", "x", "name"])
+        # Both failures of a row share its key
+        hashes, columns, reasons = failure_keys(verdicts, self.yesterday,
+                                                by=["id"])
+        self.assertEqual(hashes[0], hashes[1])
+        self.assertNotEqual(hashes[1], hashes[2])
+        self.assertRaises(ValueError, failure_keys, verdicts,
+                          self.yesterday, by="label")
+        self.assertRaises(ValueError, failure_keys, verdicts,
+                          self.yesterday.iloc[:2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+from __future__ import unicode_literals
+import six
+
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, String
+from table_cleaner.failures import FailureMask
+from table_cleaner.validator import ColumnVerdicts
+
+
+class MyCleaner(Cleaner):
+    x = Int(min_value=0)
+    name = String(max_length=4)
+
+
+class TestFailureMask(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(
+                x=[1, -1, 3, "a", 5, -6],
+                name=["ab", "abc", "abcdef", "x", "toolong", "y"]),
+            columns=["x", "name"], index=np.arange(10, 16))
+
+    def test_cleaner(self):
+        cleaner = MyCleaner(self.initial_df, chunksize=4)
+        failures = cleaner.failures
+        self.assertEqual(failures.fields, list(MyCleaner._fields))
+        self.assertEqual(failures.bits.dtype, np.uint64)
+        self.assertEqual(failures.nbytes, 8 * len(self.initial_df))
+        self.assertEqual(list(failures.failed("x")),
+                         [False, True, False, True, False, True])
+        self.assertEqual(list(failures.failed("name")),
+                         [False, False, True, False, True, False])
+        self.assertEqual(list(failures.any_failed()), list(~cleaner.valid))
+        self.assertRaises(KeyError, failures.failed, "y")
+
+        self.assertEqual(list(failures.rows(any_of=["x", "name"])),
+                         [11, 12, 13, 14, 15])
+        self.assertEqual(list(failures.rows(all_of=["name"],
+                                            none_of=["x"])), [12, 14])
+        self.assertEqual(list(failures.filter(self.initial_df,
+                                              all_of=["x"]).x),
+                         [-1, "a", -6])
+        self.assertEqual(dict(failures.combinations()),
+                         {("x",): 3, ("name",): 2})
+        frame = failures.to_frame()
+        self.assertEqual(list(frame.index), [11, 12, 13, 14, 15])
+        self.assertEqual(list(frame.column),
+                         ["x", "name", "x", "name", "x"])
+
+    def test_expand(self):
+        cleaner = MyCleaner(self.initial_df, chunksize=4)
+        verdicts = cleaner.expand_failures(all_of=["name"])
+        expected = cleaner.verdicts.loc[[12, 14]]
+        self.assertEqual(list(verdicts.index), list(expected.index))
+        self.assertEqual(list(verdicts.reason), list(expected.reason))
+        self.assertEqual(list(verdicts.counter), list(range(len(expected))))
+        self.assertEqual(len(cleaner.expand_failures(all_of=["x", "name"])),
+                         0)
+
+    def test_wide(self):
+        n = 70
+        results = [("f%i" % i,
+                    ColumnVerdicts.one_per_cell(np.zeros(3),
+                                                np.arange(3) != i % 3,
+                                                "bad", "bad"))
+                   for i in range(n)]
+        mask = FailureMask.from_results(pd.Index([5, 6, 7]), results)
+        self.assertEqual(mask.bits.dtype, np.uint8)
+        self.assertEqual(mask.bits.shape, (3, 9))
+        matrix = mask.to_matrix()
+        self.assertEqual(matrix.shape, (3, n))
+        for i in range(n):
+            self.assertEqual(list(matrix[:, i]), list(np.arange(3) == i % 3))
+        self.assertEqual(list(mask.rows(all_of=["f0", "f69"])), [5])
+        combinations = mask.combinations()
+        self.assertEqual(list(combinations), [1, 1, 1])
+        self.assertEqual(sorted(len(fields) for fields in combinations.index),
+                         [23, 23, 24])
+
+        both = FailureMask.concat([mask, mask], mask.fields)
+        self.assertEqual(both.bits.shape, (6, 9))
+        self.assertEqual(list(both.index), [5, 6, 7, 5, 6, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+from __future__ import unicode_literals
+import six
+
+import io
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner
+from table_cleaner.inference import infer_schema, infer_validator
+
+
+class TestInference(unittest.TestCase):
+    def setUp(self):
+        n = 40
+        self.initial_df = pd.DataFrame({
+            "id": [str(i * 10) for i in range(n)],
+            "big": [i * 100000 for i in range(n)],
+            "price": ["1.5", "2.25", None, "-3"] * (n // 4),
+            "ratio": np.linspace(0.1, 0.9, n),
+            "flag": ["yes", "no", "Y", "n"] * (n // 4),
+            "mail": ["user%i@example.com" % i for i in range(n)],
+            "color": ["red", "green", "red", "blue"] * (n // 4),
+            "code": ["AB-%i" % (i * 37) for i in range(n)],
+            "first name": ["Name %i" % i if i % 2 else "x%i y" % i
+                           for i in range(n)]},
+            columns=["id", "big", "price", "ratio", "flag", "mail", "color",
+                     "code", "first name"])
+
+    def test_validators(self):
+        schema = infer_schema(self.initial_df)
+        self.assertEqual(schema.rows, 40)
+        self.assertEqual(dict((k, v[0]) for k, v in schema.fields.items()),
+                         {"id": "Int16", "big": "Int32", "price": "Float32",
+                          "ratio": "Float64", "flag": "Bool",
+                          "mail": "Email", "color": "Choice",
+                          "code": "Regex", "first name": "String"})
+        self.assertEqual(dict(schema.fields["id"][1]),
+                         dict(min_value=0, max_value=390))
+        self.assertEqual(schema.fields["color"][1]["choices"],
+                         ["blue", "green", "red"])
+        self.assertEqual(schema.fields["code"][1]["regex"],
+                         r"^[A-Z]{2}\-\d{1,4}$")
+        self.assertEqual(dict(schema.fields["first name"][1]),
+                         dict(min_length=4, max_length=7))
+        self.assertEqual(dict(schema.null_policy), {"price": "allow"})
+
+        self.assertEqual(infer_validator(pd.Series(["0", "1", "1"]))[0],
+                         "Int8")
+        self.assertEqual(infer_validator(pd.Series(["3.0", "2.5"]))[0],
+                         "Float32")
+        self.assertEqual(infer_validator(pd.Series([], dtype=object)),
+                         ("String", {}))
+        self.assertEqual(dict(infer_validator(pd.Series([1, 2]),
+                                              bounds=False)[1]), {})
+
+    def test_class(self):
+        schema = infer_schema(self.initial_df)
+        cleaner_class = schema.to_class("VendorCleaner")
+        self.assertTrue(issubclass(cleaner_class, Cleaner))
+        self.assertEqual(list(cleaner_class._fields),
+                         list(self.initial_df.columns))
+        cleaner = cleaner_class(self.initial_df)
+        self.assertEqual(cleaner.invalid_rows, 0)
+        self.assertEqual(cleaner.cleaned["id"].dtype, np.int16)
+
+    def test_source(self):
+        schema = infer_schema(self.initial_df)
+        source = schema.to_source("VendorCleaner")
+        self.assertIn("class VendorCleaner(Cleaner):", source)
+        self.assertIn("    id = Int16(min_value=0, max_value=390)", source)
+        namespace = {}
+        six.exec_(source, namespace)
+        cleaner_class = namespace["VendorCleaner"]
+        self.assertEqual(list(cleaner_class._fields),
+                         list(self.initial_df.columns))
+        self.assertEqual(cleaner_class(self.initial_df).invalid_rows, 0)
+
+    def test_option_names(self):
+        data = pd.DataFrame(dict(sample=["1", "2", "3"],
+                                 threads=["a", "bb", "ccc"],
+                                 valid=["x", None, "z"]))
+        schema = infer_schema(data)
+        source = schema.to_source("OptionCleaner")
+        self.assertIn("    sample = Int8(min_value=1, max_value=3)", source)
+        namespace = {}
+        six.exec_(source, namespace)
+        for cleaner_class in [namespace["OptionCleaner"], schema.to_class()]:
+            self.assertEqual(list(cleaner_class._fields),
+                             ["sample", "threads", "valid"])
+            cleaner = cleaner_class(data)
+            self.assertEqual(cleaner.invalid_rows, 0)
+            self.assertEqual(list(cleaner.valid), [True] * 3)
+
+        data["null_policy"] = ["a", "b", "c"]
+        schema = infer_schema(data)
+        self.assertRaises(ValueError, schema.to_source)
+        self.assertRaises(ValueError, schema.to_class)
+        schema = infer_schema(data.drop(columns=["valid"]))
+        self.assertEqual(list(schema.to_class()._fields),
+                         ["sample", "threads", "null_policy"])
+
+    def test_sample(self):
+        text = self.initial_df.to_csv(index=False)
+        schema = infer_schema(pd.read_csv(io.StringIO(text), dtype=object,
+                                          chunksize=7), sample_rows=10)
+        self.assertEqual(schema.rows, 10)
+        self.assertEqual(schema.fields["id"][0], "Int8")
+        schema = infer_schema(self.initial_df, sample_rows=10,
+                              random_state=0)
+        self.assertEqual(schema.rows, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
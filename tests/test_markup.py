@@ -1,6 +1,10 @@
 from __future__ import unicode_literals
 import six
 
+import io
+import os
+import shutil
+import tempfile
 import unittest
 import pandas as pd
 
@@ -45,6 +49,128 @@ class TestTableMarkup(unittest.TestCase):
         mdf.active += "red"
         mdf.to_html()
 
+    def test_sparse(self):
+        mdf = MarkupFrame.from_dataframe(self.initial_df)
+        mdf.add_classes(2, "x", "invalid")
+        mdf.add_classes(3, "x", "invalid")
+        mdf["x"] += "numeric"
+
+        self.assertEqual(len(mdf._cell_markup["x"]), 2)
+        self.assertEqual(len(mdf._cell_markup["y"]), 0)
+        self.assertEqual(mdf.cell(2, "x").classes, ["invalid", "numeric"])
+        self.assertTrue(mdf.cell(2, "x") is mdf.cell(3, "x"))
+        self.assertTrue(mdf.cell(0, "x") is
+                        MarkupCell.intern(mdf._interned, ["numeric"]))
+        self.assertEqual(mdf.cell(0, "y").classes, [])
+
+        # Cells are only shared within a frame
+        other = MarkupFrame.from_dataframe(self.initial_df)
+        other["x"] = mdf["x"]
+        other.add_classes(4, "y", "invalid", "numeric")
+        self.assertFalse(hasattr(MarkupCell, "_interned"))
+        self.assertTrue(other.cell(0, "x") is
+                        MarkupCell.intern(other._interned, ["numeric"]))
+        self.assertFalse(other.cell(0, "x") is mdf.cell(0, "x"))
+        self.assertTrue(other.cell(2, "x") is other.cell(4, "y"))
+
+        mdf.x -= "invalid"
+        self.assertEqual(len(mdf._cell_markup["x"]), 0)
+        self.assertEqual(mdf.x[2].classes, ["numeric"])
+
+        html = mdf.to_html()
+        self.assertEqual(html.count("<td class=\"numeric\">"), 6)
+        self.assertEqual(mdf.to_dataframe().shape, self.initial_df.shape)
+
+    def test_cells_and_rows(self):
+        mdf = MarkupFrame.from_dataframe(self.initial_df)
+        mdf.x[1] += "tc-highlight"
+        mdf.y += "tc-green"
+        mdf.loc[0, :] += "tc-blue"
+        self.assertEqual(mdf.x[1].classes, ["tc-highlight"])
+        self.assertEqual(mdf.y[0].classes, ["tc-green", "tc-blue"])
+        self.assertEqual(mdf.y[1].classes, ["tc-green"])
+        self.assertEqual(mdf.name[0].classes, ["tc-blue"])
+
+        mdf.loc[[0, 1], "y"] -= "tc-green"
+        self.assertEqual(mdf.y[0].classes, ["tc-blue"])
+        self.assertEqual(mdf.y[1].classes, [])
+        self.assertEqual(mdf.y[2].classes, ["tc-green"])
+
+    def test_from_validation(self):
+        verdicts = pd.DataFrame(dict(valid=[True, False, False, False, True],
+                                     column=["x", "x", "email", "email", "y"],
+                                     reason=["undefined", "value too low",
+                                             "email_domain_name_invalid",
+                                             "email_user_name_invalid",
+                                             "undefined"]),
+                                index=[0, 3, 5, 5, 5])
+        mdf = MarkupFrame.from_validation(self.initial_df, verdicts)
+        self.assertEqual(mdf.cell(3, "x").classes, ["tc-cell-invalid"])
+        self.assertEqual(mdf.cell(5, "email").classes,
+                         ["tc-cell-invalid", "tc-cell-invalid"])
+        self.assertEqual(mdf.cell(0, "x").classes, [])
+        self.assertEqual(mdf.cell(5, "y").classes, [])
+
+        mdf = MarkupFrame.from_validation(self.initial_df, verdicts,
+                                          reason_classes=True)
+        self.assertEqual(mdf.cell(3, "x").classes,
+                         ["tc-cell-invalid", "tc-reason-value-too-low"])
+        self.assertEqual(mdf.cell(5, "email").classes,
+                         ["tc-cell-invalid",
+                          "tc-reason-email-domain-name-invalid",
+                          "tc-cell-invalid",
+                          "tc-reason-email-user-name-invalid"])
+
+    def test_from_validation_duplicate_index(self):
+        df = pd.DataFrame(dict(x=[1, 2, 3]), index=[7, 7, 8])
+        verdicts = pd.DataFrame(dict(valid=[False], column=["x"],
+                                     reason=["value too low"]), index=[7])
+        mdf = MarkupFrame.from_validation(df, verdicts)
+        self.assertEqual([mdf.cell_at(i, "x").classes for i in range(3)],
+                         [["tc-cell-invalid"], ["tc-cell-invalid"], []])
+
+
+
+class TestHtmlOutput(unittest.TestCase):
+    def setUp(self):
+        self.df = pd.DataFrame(dict(x=range(100), y=range(100, 200)))
+        verdicts = pd.DataFrame(dict(valid=[False, False], column=["x", "y"],
+                                     reason=["too long", "too long"]),
+                                index=[42, 43])
+        self.mdf = MarkupFrame.from_validation(self.df, verdicts)
+
+    def test_write_html(self):
+        f = io.StringIO()
+        self.mdf.write_html(f, chunksize=7)
+        self.assertEqual(f.getvalue(), self.mdf.to_html())
+        self.assertEqual(f.getvalue().count("<tr>"), 100)
+
+    def test_pages(self):
+        directory = tempfile.mkdtemp()
+        try:
+            names = self.mdf.write_html_pages(directory, rows_per_page=30)
+            self.assertEqual(names, ["index.html", "page-0001.html",
+                                     "page-0002.html", "page-0003.html",
+                                     "page-0004.html"])
+            with io.open(os.path.join(directory, "page-0002.html"),
+                         encoding="utf-8") as f:
+                page = f.read()
+            self.assertEqual(page.count("<tr>"), 30)
+            self.assertEqual(page.count("tc-cell-invalid"), 2)
+            self.assertTrue("<th>30</th>" in page)
+            with io.open(os.path.join(directory, "index.html"),
+                         encoding="utf-8") as f:
+                self.assertTrue("<td>30 to 59</td><td>2</td>" in f.read())
+        finally:
+            shutil.rmtree(directory)
+
+    def test_repr_html(self):
+        html = self.mdf._repr_html_()
+        self.assertEqual(html.count("<tr>"), 24)
+        self.assertEqual(html.count("<th>...</th>"), 2)
+        self.assertTrue("<th>42</th>" in html)
+        self.assertTrue("<th>99</th>" in html)
+        self.assertTrue("<p>100 rows x 2 columns</p>" in html)
 
 
 if __name__ == '__main__':
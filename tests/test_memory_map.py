@@ -0,0 +1,166 @@
+from __future__ import unicode_literals
+import six
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner import cleaner as cleaner_module
+from table_cleaner.cleaner import Cleaner, Int, Float64, String
+from table_cleaner.memory_map import NumpySource, ArrowFileSource, \
+        ArrowFileWriter, open_source
+from table_cleaner.storage import save_results, load_cleaned
+from table_cleaner.verdict_store import SpilledVerdicts
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class MyCleaner(Cleaner):
+    x = Int(min_value=0)
+    y = Float64(max_value=100.0)
+
+
+class TestNumpySource(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.x = np.array([i if i % 4 else -i for i in range(1, 101)])
+        self.y = np.linspace(0, 150, 100)
+        np.save(os.path.join(self.directory, "x.npy"), self.x)
+        raw = np.memmap(os.path.join(self.directory, "y.f8"), mode="w+",
+                        dtype=np.float64, shape=(100,))
+        raw[:] = self.y
+        raw.flush()
+        self.expected = MyCleaner(pd.DataFrame(dict(x=self.x, y=self.y),
+                                               columns=["x", "y"]))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def open(self):
+        y = np.memmap(os.path.join(self.directory, "y.f8"), mode="r",
+                      dtype=np.float64)
+        return open_source([("x", os.path.join(self.directory, "x.npy")),
+                            ("y", y)])
+
+    def test_window(self):
+        source = self.open()
+        self.assertEqual(source.shape, (100, 2))
+        window = source.window(95, 110)
+        self.assertEqual(list(window.index), list(range(95, 100)))
+        self.assertEqual(list(window["x"]), list(self.x[95:]))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_cleaner(self):
+        cleaner = MyCleaner(self.open(), chunksize=30)
+        pd.testing.assert_frame_equal(cleaner.verdicts,
+                                      self.expected.verdicts)
+        # Cleaned rows go to a temporary file by default
+        cleaned = cleaner.cleaned
+        self.assertIsInstance(cleaned, ArrowFileSource)
+        pd.testing.assert_frame_equal(cleaned.to_pandas(),
+                                      self.expected.cleaned)
+        directory = os.path.dirname(cleaned.path)
+        self.assertTrue(os.path.exists(cleaned.path))
+        cleaned.close()
+        self.assertFalse(os.path.exists(directory))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_default_budget(self):
+        budget = cleaner_module.default_window_verdict_budget
+        cleaner_module.default_window_verdict_budget = 1
+        try:
+            cleaner = MyCleaner(self.open(), chunksize=30)
+            verdicts = cleaner.verdicts
+        finally:
+            cleaner_module.default_window_verdict_budget = budget
+        self.assertIsInstance(verdicts, SpilledVerdicts)
+        pd.testing.assert_frame_equal(verdicts.to_frame(),
+                                      self.expected.verdicts)
+        cleaner = MyCleaner(self.open(), chunksize=30,
+                            verdict_memory_budget=10 ** 9)
+        self.assertIsInstance(cleaner.verdicts, pd.DataFrame)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_save_results(self):
+        cleaner = MyCleaner(self.open(), chunksize=30)
+        path = os.path.join(self.directory, "results")
+        save_results(cleaner, path)
+        pd.testing.assert_frame_equal(load_cleaned(path),
+                                      self.expected.cleaned)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, NumpySource,
+                          [("x", np.zeros(3)), ("y", np.zeros(4))])
+        self.assertRaises(ValueError, NumpySource, [("x", np.zeros((3, 2)))])
+        self.assertRaises(ValueError, MyCleaner, self.open(), sample=10)
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestArrowFileSource(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.initial_df = pd.DataFrame(dict(
+                x=[i if i % 4 else -i for i in range(1, 101)],
+                y=np.linspace(0, 150, 100),
+                name=["row %i" % i for i in range(100)]),
+            columns=["x", "y", "name"])
+        # Several record batches of different sizes
+        self.path = os.path.join(self.directory, "input.arrow")
+        writer = ArrowFileWriter(self.path)
+        for start, stop in [(0, 7), (7, 50), (50, 51), (51, 100)]:
+            writer.write(self.initial_df.iloc[start:stop])
+        writer.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_window(self):
+        source = open_source(self.path)
+        self.assertEqual(len(source), 100)
+        self.assertEqual(source.columns, ["x", "y", "name"])
+        for start, stop in [(0, 100), (5, 8), (49, 52), (50, 51), (99, 120)]:
+            pd.testing.assert_frame_equal(
+                    source.window(start, stop),
+                    self.initial_df.iloc[start:stop])
+
+    def test_cleaner(self):
+        expected = MyCleaner(self.initial_df)
+        cleaned_path = os.path.join(self.directory, "cleaned.arrow")
+        cleaner = MyCleaner(ArrowFileSource(self.path), chunksize=30,
+                            cleaned_path=cleaned_path)
+        pd.testing.assert_frame_equal(cleaner.verdicts, expected.verdicts)
+        self.assertIsInstance(cleaner.cleaned, ArrowFileSource)
+        pd.testing.assert_frame_equal(cleaner.cleaned.to_pandas(),
+                                      expected.cleaned)
+
+    def test_empty_first_window(self):
+        class NameCleaner(Cleaner):
+            x = Int(min_value=0)
+            name = String(max_length=3)
+        cleaned_path = os.path.join(self.directory, "cleaned.arrow")
+        source = NumpySource([("x", np.array([-1, -2, 3, 4])),
+                              ("name", np.array(["a", "b", "c", "d"]))])
+        cleaner = NameCleaner(source, chunksize=2, cleaned_path=cleaned_path)
+        cleaned = cleaner.cleaned.to_pandas()
+        self.assertEqual(list(cleaned.x), [3, 4])
+        self.assertEqual(list(cleaned.name), ["c", "d"])
+
+        source = NumpySource([("x", np.array([-1])),
+                              ("name", np.array(["a"]))])
+        cleaner = NameCleaner(source, cleaned_path=cleaned_path)
+        self.assertEqual(len(cleaner.cleaned), 0)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, open_source, "input.csv")
+        self.assertRaises(ValueError, ArrowFileWriter, "output.csv",
+                          format="csv")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+import six
+
+import sys
+import tracemalloc
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, String
+from table_cleaner.memory_report import MemoryReport
+from table_cleaner.table_markup import MarkupFrame
+
+
+class MyCleaner(Cleaner):
+    x = Int(min_value=0)
+    name = String(max_length=3)
+
+
+class TestMemoryReport(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(x=np.arange(-500, 500),
+                                            name=["abcd", "ab"] * 500))
+
+    def test_off(self):
+        cleaner = MyCleaner(self.initial_df)
+        self.assertIsNone(cleaner.memory_report)
+        self.assertEqual(cleaner.invalid_rows, 750)
+
+    def test_stages(self):
+        cleaner = MyCleaner(self.initial_df, profile_memory=True,
+                            chunksize=300)
+        report = cleaner.memory_report
+        self.assertEqual(list(report.to_frame().stage), ["input"])
+        cleaner.cleaned
+        cleaner.verdicts
+        with report.track("markup"):
+            MarkupFrame.from_validation(self.initial_df, cleaner.verdicts)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.assertEqual(list(report.records),
+                         [("input", None), ("validation", None),
+                          ("validation", "x"), ("validation", "name"),
+                          ("cleaned", None), ("verdicts", None),
+                          ("markup", None)])
+        self.assertEqual(len(report.to_frame()), 7)
+        self.assertEqual(report.record("validation", "x").calls, 4)
+        self.assertEqual(report.record("input").bytes,
+                         self.initial_df.memory_usage(deep=True).sum())
+        self.assertEqual(report.record("verdicts").bytes,
+                         cleaner.verdicts.memory_usage(deep=True).sum())
+        self.assertGreater(report.record("validation").retained, 0)
+        if sys.version_info >= (3, 9):
+            self.assertGreaterEqual(report.record("validation").peak,
+                                    report.record("validation", "x").peak)
+            self.assertGreater(report.record("markup").peak, 0)
+
+    def test_streaming(self):
+        cleaner = MyCleaner(self.initial_df, profile_memory=True,
+                            verdict_memory_budget=10 ** 9)
+        cleaner.invalid_rows
+        stages = list(cleaner.memory_report.to_frame().stage)
+        self.assertEqual(stages[-2:], ["cleaned", "verdicts"])
+
+    def test_nested(self):
+        report = MemoryReport()
+        with report.track("outer"):
+            with report.track("inner"):
+                data = np.ones(100000)
+            del data
+        if sys.version_info >= (3, 9):
+            self.assertGreaterEqual(report.record("outer").peak, 800000)
+            self.assertGreaterEqual(report.record("inner").peak, 800000)
+        self.assertLess(report.record("outer").retained, 800000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+from __future__ import unicode_literals
+import six
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int8, Float32, Float64, String, \
+        Bool, Choice, Regex, Email
+from table_cleaner.sql import SqlValidation, Dialect
+
+
+class MyCleaner(Cleaner):
+    x = Int8(min_value=0)
+    name = String(min_length=2, max_length=5)
+    flag = Bool(allow_nan=False)
+    color = Choice(["red", "green"])
+    code = Regex(r"^[A-Z]{2}\d$")
+    f = Float32()
+
+
+class TestSqlValidation(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.initial_df = pd.DataFrame(dict(
+                x=[1, -1, 300, 3.7, None, "5", "a", 7],
+                name=["ab", "a", "abcdef", "abc", "xyz", "ok", "ok", "fine"],
+                flag=["yes", "no", "maybe", 1, 0, "true", None, "off"],
+                color=["red", "blue", "green", "red", "red", None, "green",
+                       "green"],
+                code=["AB1", "AB1", "x", "CD2", "EF3", "GH4", "IJ5", "KL6"],
+                f=[1.0, 1e39, 2.0, 3.0, 4.0, 5.0, 6.0, -7.5]),
+            columns=["x", "name", "flag", "color", "code", "f"])
+        self.connection = sqlite3.connect(os.path.join(self.directory,
+                                                       "test.db"))
+        self.connection.execute("CREATE TABLE data (x, name TEXT, flag, "
+                                "color TEXT, code TEXT, f REAL)")
+        self.connection.executemany(
+                "INSERT INTO data VALUES (?, ?, ?, ?, ?, ?)",
+                [tuple(None if isinstance(v, float) and np.isnan(v) else v
+                       for v in row)
+                 for row in self.initial_df.itertuples(index=False)])
+        self.expected = MyCleaner(self.initial_df)
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.directory)
+
+    def test_counts(self):
+        validation = MyCleaner.from_sql(self.connection, "data")
+        self.assertEqual(validation.invalid_rows, self.expected.invalid_rows)
+        self.assertEqual(dict(validation.invalid_counts),
+                         dict(self.expected.invalid_counts))
+
+    def test_verdicts(self):
+        validation = MyCleaner.from_sql(self.connection, "data")
+        verdicts = validation.verdicts
+        expected = self.expected.verdicts
+        # SQLite row ids start at 1
+        self.assertEqual(sorted(set(verdicts.index - 1)),
+                         sorted(set(expected.index[~expected["valid"]])))
+        invalid = verdicts[~verdicts["valid"]]
+        expected = expected[~expected["valid"]]
+        self.assertEqual(list(invalid["reason"]), list(expected["reason"]))
+        self.assertEqual(list(invalid["description"]),
+                         list(expected["description"]))
+
+    def test_cleaned(self):
+        validation = MyCleaner.from_sql(self.connection, "data")
+        batches = list(validation.iter_cleaned(batchsize=1))
+        self.assertEqual(len(batches), len(self.expected.cleaned))
+        cleaned = validation.cleaned
+        self.assertEqual(cleaned["x"].dtype, np.int8)
+        self.assertEqual(cleaned["f"].dtype, np.float32)
+        for column in cleaned.columns:
+            self.assertEqual(list(cleaned[column]),
+                             list(self.expected.cleaned[column]))
+
+    def test_null_policy(self):
+        class NullCleaner(Cleaner):
+            x = Int8()
+            null_policy = dict(x="allow")
+        validation = NullCleaner.from_sql(self.connection, "data")
+        expected = NullCleaner(self.initial_df)
+        self.assertEqual(validation.invalid_rows, expected.invalid_rows)
+
+    def test_missing_floats(self):
+        class FloatCleaner(Cleaner):
+            f = Float64(max_value=10)
+        values = ["1", "nan", None, "1_0", "2", "x", "11"]
+        self.connection.execute("CREATE TABLE floats (f)")
+        self.connection.executemany("INSERT INTO floats VALUES (?)",
+                                    [(value,) for value in values])
+        validation = FloatCleaner.from_sql(self.connection, "floats")
+        expected = FloatCleaner(pd.DataFrame(dict(f=values)))
+        self.assertEqual(validation.invalid_rows, 2)
+        self.assertEqual(dict(validation.invalid_counts),
+                         dict(expected.invalid_counts))
+        self.assertEqual(len(validation.cleaned), len(expected.cleaned))
+        self.assertEqual(int(validation.cleaned["f"].isnull().sum()), 2)
+
+    def test_percent_names(self):
+        PercentCleaner = type(str("PercentCleaner"), (Cleaner,),
+                              {str("a%d"): Int8(min_value=0),
+                               str("b%%s"): String(max_length=2)})
+        frame = pd.DataFrame({"a%d": [1, -1, 2], "b%%s": ["x", "y", "long"],
+                              "c%s": [1, 2, 3]},
+                             columns=["a%d", "b%%s", "c%s"])
+        self.connection.execute('CREATE TABLE "t%s" ("a%d", "b%%s", "c%s")')
+        self.connection.executemany('INSERT INTO "t%s" VALUES (?, ?, ?)',
+                                    frame.values.tolist())
+        validation = SqlValidation(PercentCleaner, self.connection, "t%s")
+        expected = PercentCleaner(frame)
+        self.assertEqual(validation.invalid_rows, 2)
+        self.assertEqual(dict(validation.invalid_counts),
+                         dict(expected.invalid_counts))
+        self.assertEqual(len(validation.fetch_invalid()), 2)
+        cleaned = validation.cleaned
+        self.assertEqual(list(cleaned.columns), ["a%d", "b%%s", "c%s"])
+        self.assertEqual(list(cleaned["c%s"]), [1])
+        validation = SqlValidation(PercentCleaner, self.connection, "t%s",
+                                   index_column="c%s")
+        self.assertEqual(list(validation.fetch_invalid().index), [2, 3])
+
+    def test_unsupported(self):
+        class EmailCleaner(Cleaner):
+            email = Email()
+        self.assertRaises(ValueError, EmailCleaner.from_sql,
+                          self.connection, "data")
+        self.assertRaises(ValueError, SqlValidation, MyCleaner,
+                          self.connection, "data", dialect=Dialect())
+
+
+if __name__ == '__main__':
+    unittest.main()
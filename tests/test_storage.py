@@ -0,0 +1,98 @@
+from __future__ import unicode_literals
+import six
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, Email
+from table_cleaner import storage
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(
+            name=["Alice", "Bob", "Wilhelm Alexander", 1, "Mary", "Andy"],
+            email=["alice@example.com", "bob@example.com", "blub", 4,
+                   "mary@example.com", "andy k@example .com"],
+            x=[0, 3.2, "5", "hello", -3, 11]), index=list("abcdef"))
+
+        class MyCleaner(Cleaner):
+            x = Int(min_value=0)
+            email = Email()
+
+        self.cleaner = MyCleaner(self.initial_df)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_verdicts_equal(self, verdicts, expected):
+        self.assertEqual(list(verdicts.index), list(expected.index))
+        for column in expected.columns:
+            self.assertEqual(list(verdicts[column]), list(expected[column]))
+
+    def test_parquet(self):
+        self.cleaner.to_parquet(self.directory)
+        verdicts = storage.load_verdicts(self.directory)
+        self.assert_verdicts_equal(verdicts, self.cleaner.verdicts)
+        self.assertEqual(verdicts.reason.dtype.name, "category")
+        cleaned = storage.load_cleaned(self.directory)
+        self.assertEqual(list(cleaned.email), list(self.cleaner.cleaned.email))
+
+    def test_feather(self):
+        self.cleaner.to_feather(self.directory)
+        verdicts = storage.load_verdicts(self.directory, format="feather",
+                                         columns=["email"])
+        expected = self.cleaner.verdicts
+        self.assert_verdicts_equal(verdicts, expected[expected.column == "email"])
+
+    def test_partitioned(self):
+        self.cleaner.to_parquet(self.directory, partition_by="column")
+        self.assertTrue(os.path.isdir(os.path.join(self.directory,
+                                                   "verdicts.parquet")))
+        self.assert_verdicts_equal(storage.load_verdicts(self.directory),
+                                   self.cleaner.verdicts)
+        verdicts = storage.load_verdicts(self.directory, columns=["x"])
+        self.assertEqual(set(verdicts.column), set(["x"]))
+
+    def test_overwrite(self):
+        for partition_by in ["column", "column", None, "reason"]:
+            self.cleaner.to_parquet(self.directory, partition_by=partition_by)
+            self.assert_verdicts_equal(storage.load_verdicts(self.directory),
+                                       self.cleaner.verdicts)
+
+    def test_without_verdicts(self):
+        self.cleaner.to_parquet(self.directory)
+        cleaner = type(self.cleaner)(self.initial_df, keep_verdicts=False)
+        for format in storage.formats:
+            storage.save_results(cleaner, self.directory, format=format)
+            cleaned = storage.load_cleaned(self.directory, format=format)
+            self.assertEqual(list(cleaned.email), list(cleaner.cleaned.email))
+            self.assertFalse(os.path.exists(os.path.join(
+                    self.directory, "verdicts." + format)))
+
+    def test_report(self):
+        self.cleaner.to_parquet(self.directory, partition_by="reason")
+        mdf = storage.load_report(self.directory, self.initial_df)
+        self.assertEqual(mdf.cell("c", "email").classes, ["tc-cell-invalid"])
+        self.assertEqual(mdf.cell("a", "email").classes, [])
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, storage.save_results, self.cleaner,
+                          self.directory, format="csv")
+        self.assertRaises(ValueError, storage.save_results, self.cleaner,
+                          self.directory, format="feather",
+                          partition_by="column")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,9 +4,14 @@ import six
 
 import unittest
 import numpy as np
+import pandas as pd
 import re
 
-from table_cleaner.validators import String, Int, Numeric, Bool, Regex, Email
+from table_cleaner.validators import String, Int, Numeric, Bool, Regex, \
+        RegexSet, Email, ColumnVerdicts, Int8, Uint8, Int64, Float16, \
+        Float32, Float64, Choice, Chain, All, Any, Validator, Verdict
+from table_cleaner import kernels
+from table_cleaner.numeric import NumberFormat
 
 
 class TestStringValidator(unittest.TestCase):
@@ -80,6 +85,24 @@ class TestNumericValidator(unittest.TestCase):
             dtype = None
         self.assertRaises(ValueError, TempClass)
 
+    def test_number_format(self):
+        european = NumberFormat(decimal=",", thousands=".", currency=["$"],
+                                percent=True)
+        validator = Float64(number_format=european)
+        for text, value in [("1.234,56", 1234.56), (" 42 ", 42.0),
+                            ("12%", 0.12), ("$ 3,5", 3.5), ("-1,5e2", -150.0),
+                            ("1.234.567", 1234567.0)]:
+            verdicts = list(validator.validate(text))
+            self.assertTrue(verdicts[0].valid)
+            self.assertEqual(verdicts[0].value, value)
+        for text in ["1.5", "12.34", "1,2,3", "1.2345,6"]:
+            self.assertFalse(next(validator.validate(text)).valid)
+        self.assertTrue(next(Int(number_format=NumberFormat(
+            thousands="'")).validate("1'000")).valid)
+        self.assertRaises(ValueError, Int, number_format=european)
+        self.assertRaises(ValueError, NumberFormat, decimal=".",
+                          thousands=".")
+
 
 class TestIntValidator(unittest.TestCase):
     def test_basic(self):
@@ -140,6 +163,15 @@ class TestIntValidator(unittest.TestCase):
     def test_invalid_args(self):
         self.assertRaises(ValueError, Int, min_value=10, max_value=-1)
 
+    def test_overflow(self):
+        for validator, v in [(Int8(), 300), (Int8(), "300"), (Uint8(), -1),
+                             (Int64(), 2**70), (Int(), float("inf")),
+                             (Float16(), 1e10)]:
+            verdicts = list(validator.validate(v))
+            self.assertEqual(len(verdicts), 1)
+            self.assertFalse(verdicts[0].valid)
+            self.assertIn("out of the range", verdicts[0].description)
+
 
 class TestBoolean(unittest.TestCase):
     def test_empty_arguments(self):
@@ -204,6 +236,61 @@ class TestRegex(unittest.TestCase):
                 flags=1)
 
 
+class TestRegexSet(unittest.TestCase):
+    def setUp(self):
+        self.validator = RegexSet([("sap", r"^SAP-\d{6}$"),
+                                   ("crm", r"^C\d+$"),
+                                   ("any_c", r"^C")])
+
+    def test_classify(self):
+        self.assertEqual(self.validator.classify("SAP-123456"), "sap")
+        self.assertEqual(self.validator.classify("C12"), "crm")
+        self.assertEqual(self.validator.classify("Cx"), "any_c")
+        self.assertEqual(self.validator.classify("SAP-1"), None)
+
+    def test_validate(self):
+        verdicts = list(self.validator.validate("C12"))
+        self.assertTrue(verdicts[0].valid)
+        verdicts = list(self.validator.validate(12))
+        self.assertFalse(verdicts[0].valid)
+        self.assertEqual(verdicts[0].reason, "regex_set_no_match")
+
+    def test_validate_column(self):
+        column = pd.Series(["SAP-123456", "C12", "Cx", 12, None, "SAP-1"],
+                           index=list("abcdef"))
+        result = self.validator.validate_column(column)
+        expected = ColumnVerdicts.from_cells(self.validator, column.values)
+        self.assertEqual(list(result.valid), list(expected.valid))
+        self.assertEqual(list(result.positions), list(expected.positions))
+        self.assertEqual(list(result.reasons), list(expected.reasons))
+        self.assertEqual(list(result.descriptions),
+                         list(expected.descriptions))
+        self.assertEqual(list(result.values), list(expected.values))
+        self.assertEqual(list(result.extra["_pattern"]),
+                         ["sap", "crm", "any_c", None, None, None])
+
+    def test_groups(self):
+        # Inner groups, an empty match and flags, with repeated texts
+        validator = RegexSet([("number", r"^(\d+)(?:\.(\d+))?$"),
+                              ("xy", r"(?P<inner>x)y"),
+                              ("empty", r"^$"),
+                              ("word", r"[a-z]+")], flags=re.I)
+        column = pd.Series(["12", "1.5", "XY", "", "abc", 3, "!!", "12",
+                            None, [1], "xy"], dtype=object)
+        result = validator.validate_column(column)
+        self.assertEqual(list(result.extra["_pattern"]),
+                         [validator.classify(value) for value in column])
+        self.assertEqual(list(result.values),
+                         ["12", "1.5", "XY", "", "abc", "3", "!!", "12",
+                          "None", [1], "xy"])
+        self.assertEqual(len(validator.validate_column(
+                pd.Series([], dtype=object)).valid), 0)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, RegexSet, [])
+        self.assertRaises(TypeError, RegexSet, [("a", re.compile("a"))])
+
+
 class TestEmail(unittest.TestCase):
     def test_valid(self):
         test_cases = ("you@example.com", "you@localhost",
@@ -222,6 +309,37 @@ class TestEmail(unittest.TestCase):
             verdicts = list(validator.validate(email))
             self.assertFalse(verdicts[0].valid)
 
+    def test_engines_agree(self):
+        test_cases = ("you@example.com", "you@localhost", "you@example",
+                "you.are.toast@example.com", "captain@sub.example.com",
+                "dsadf you@example.com", "you.are.toast@!example.com",
+                "captain@sub.example.+com", "a..b@example.com",
+                ".a@example.com", "a.@example.com", '"a b"@example.com',
+                '"a\\"b"@example.com', '"a\\"@example.com', '""@example.com',
+                "you@-example.com", "you@example-.com", "you@example.c",
+                "you@example.com-", "you@example.-com", "you@example..com",
+                "you@example.com.", "you@.example.com", "you@123.456",
+                "you@%s.com" % ("a" * 249,), "you@%s.com" % ("a" * 250,),
+                "you@", "@example.com", "you@@example.com", "no at sign")
+        regex = Email(engine="regex", max_length=-1)
+        scanner = Email(engine="scanner", max_length=-1)
+        for email in test_cases:
+            expected = [(v.valid, v.reason) for v in regex.validate(email)]
+            actual = [(v.valid, v.reason) for v in scanner.validate(email)]
+            self.assertEqual(actual, expected, email)
+
+    def test_too_long(self):
+        email = "you@%s.example.com" % ("a" * 240,)
+        for engine in Email.engines:
+            verdicts = list(Email(engine=engine).validate(email))
+            self.assertEqual(len(verdicts), 1)
+            self.assertEqual(verdicts[0].reason, "email_too_long")
+            self.assertTrue(list(Email(engine=engine, max_length=300)\
+                    .validate(email))[0].valid)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, Email, engine="dfa")
+
 
 class TestString(unittest.TestCase):
     def test_valid(self):
@@ -240,5 +358,195 @@ class TestString(unittest.TestCase):
             verdicts = list(validator.validate(s))
             self.assertFalse(verdicts[0].valid)
 
+
+class TestChoice(unittest.TestCase):
+    def test_validate(self):
+        validator = Choice(["red", "green", 3])
+        for v in ["red", 3]:
+            self.assertTrue(list(validator.validate(v))[0].valid)
+        for v in ["blue", None, [1]]:
+            verdicts = list(validator.validate(v))
+            self.assertFalse(verdicts[0].valid)
+            self.assertEqual(verdicts[0].reason, "invalid choice")
+
+    def test_validate_column(self):
+        validator = Choice(["red", "green", 3])
+        column = pd.Series(["red", "blue", 3, None, "green"])
+        result = validator.validate_column(column)
+        expected = ColumnVerdicts.from_cells(validator, column.values)
+        np.testing.assert_array_equal(result.valid, expected.valid)
+        np.testing.assert_array_equal(result.descriptions,
+                                      expected.descriptions)
+
+    def test_nan(self):
+        column = pd.Series(["red", np.nan, None, float("nan"),
+                            np.float32("nan")], dtype=object)
+        for choices, expected in [(["red"], [True] + [False] * 4),
+                                  (["red", np.nan], [True, True, False, True,
+                                                     True]),
+                                  (["red", None], [True, False, True, False,
+                                                   False])]:
+            validator = Choice(choices)
+            result = validator.validate_column(column)
+            self.assertEqual(list(result.valid), expected)
+            cells = ColumnVerdicts.from_cells(validator, column.values)
+            self.assertEqual(list(cells.valid), expected)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, Choice, [])
+
+
+class CountingValidator(Validator):
+    """ Accepts everything and counts the cells it has seen. """
+    def __init__(self):
+        self.seen = 0
+
+    def validate(self, obj):
+        self.seen += 1
+        yield Verdict(obj, True)
+
+
+class TestCombinators(unittest.TestCase):
+    def assertSameVerdicts(self, validator, column):
+        result = validator.validate_column(column)
+        expected = ColumnVerdicts.from_cells(validator, column.values)
+        np.testing.assert_array_equal(result.valid, expected.valid)
+        np.testing.assert_array_equal(result.positions, expected.positions)
+        np.testing.assert_array_equal(result.reasons, expected.reasons)
+        np.testing.assert_array_equal(result.descriptions,
+                                      expected.descriptions)
+        np.testing.assert_array_equal(result.stages, expected.stages)
+        valid = expected.valid
+        self.assertEqual(list(np.asarray(result.values)[valid]),
+                         list(expected.values[valid]))
+        return result
+
+    def test_chain(self):
+        validator = Chain(String(max_length=3), Int(min_value=0),
+                          Choice([1, 2, 3, 10]))
+        column = pd.Series(["1", "abcd", "x", "-5", 7, "10", " 3"])
+        result = self.assertSameVerdicts(validator, column)
+        self.assertEqual(list(result.valid),
+                         [True, False, False, False, False, True, True])
+        self.assertEqual(list(result.stages),
+                         ["Choice", "String", "Int", "Int", "Choice",
+                          "Choice", "Choice"])
+        self.assertEqual(result.values[6], 3)
+
+    def test_all(self):
+        validator = All(String(min_length=2), Regex(r"^[a-z]+$"),
+                        names=["length", "letters"])
+        column = pd.Series(["ab", "a", "a1", "xyz"])
+        result = self.assertSameVerdicts(validator, column)
+        self.assertEqual(list(result.valid), [True, False, False, True])
+        self.assertEqual(list(result.stages),
+                         ["letters", "length", "letters", "letters"])
+
+    def test_any(self):
+        validator = Any(Int(), Choice(["n/a", "unknown"]))
+        column = pd.Series(["1", "n/a", "x", 4])
+        result = self.assertSameVerdicts(validator, column)
+        self.assertEqual(list(result.valid), [True, True, False, True])
+        self.assertEqual(list(result.positions), [0, 1, 2, 2, 3])
+        self.assertEqual(list(result.reasons),
+                         ["undefined", "undefined", "invalid int32",
+                          "invalid choice", "undefined"])
+
+    def test_short_circuit(self):
+        counter = CountingValidator()
+        Chain(Int(min_value=0), counter).validate_column(
+                pd.Series([1, -1, 2, -2, "x"]))
+        self.assertEqual(counter.seen, 2)
+
+        counter = CountingValidator()
+        Any(Int(), counter).validate_column(pd.Series([1, "a", 2, "b"]))
+        self.assertEqual(counter.seen, 2)
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, Chain)
+        self.assertRaises(ValueError, Chain, Int(), names=["a", "b"])
+        self.assertRaises(TypeError, Any, Int(), stages=["a"])
+
+
+class TestColumnKernels(unittest.TestCase):
+    """ The vectorized validate_column of Numeric and String must produce
+        the same verdicts as validating cell by cell, with and without
+        Numba. """
+
+    def setUp(self):
+        self.use_numba = kernels.use_numba
+
+    def tearDown(self):
+        kernels.use_numba = self.use_numba
+
+    def assertSameVerdicts(self, validator, column):
+        expected = ColumnVerdicts.from_cells(validator, column.values)
+        for use_numba in sorted(set([False, self.use_numba])):
+            kernels.use_numba = use_numba
+            result = validator.validate_column(column)
+            np.testing.assert_array_equal(result.valid, expected.valid)
+            np.testing.assert_array_equal(result.positions,
+                                          expected.positions)
+            np.testing.assert_array_equal(result.reasons, expected.reasons)
+            np.testing.assert_array_equal(result.descriptions,
+                                          expected.descriptions)
+            valid = expected.valid
+            np.testing.assert_array_equal(
+                    np.array(list(result.values[valid])),
+                    np.array(list(expected.values[valid])))
+
+    def test_numeric(self):
+        columns = [
+            pd.Series([1.5, -128.9, -129.0, 127.9, 128.0, np.nan, np.inf,
+                       -np.inf, 3e10, 0.0]),
+            pd.Series([1, -200, 300, 2**40, 0, -5], dtype=np.int64),
+            pd.Series([1, 200, 255], dtype=np.uint8),
+            pd.Series([True, False, True]),
+            pd.Series([1.0, 7e4, -7e4], dtype=np.float32),
+        ]
+        validators = [Int8(), Int8(min_value=-100, max_value=100), Uint8(),
+                      Int(min_value=0), Int64(max_value=10), Float16(),
+                      Float32(min_value=-1e9, max_value=1e9), Float64()]
+        for validator in validators:
+            for column in columns:
+                self.assertSameVerdicts(validator, column)
+
+    def test_numeric_object_column(self):
+        column = pd.Series(["1", "x", 300, None, 5.5], dtype=object)
+        self.assertSameVerdicts(Int8(min_value=0), column)
+
+    def test_number_format(self):
+        column = pd.Series(["1.234,56", " 42 ", "12%", "12 \u20ac", "EUR 3,5",
+                            "1.5", "1,2,3", "nan", "abc", 7, None, "-3",
+                            "1.234.567", "12.34", "1e3", "1,5e2", "300",
+                            "99999999999999999999", "1,", "+7"], dtype=object)
+        european = NumberFormat(decimal=",", thousands=".",
+                                currency=["\u20ac", "EUR"], percent=True)
+        for validator in [Float64(number_format=european),
+                          Float32(min_value=0, number_format=european),
+                          Int8(number_format=NumberFormat(
+                              decimal=",", thousands=".")),
+                          Int64(number_format=NumberFormat(thousands=","))]:
+            self.assertSameVerdicts(validator, column)
+
+    def test_string(self):
+        column = pd.Series(["", "a", "abc", "abcdefgh", 12345,
+                            u"Überforderung".encode("latin-1")],
+                           dtype=object)
+        for validator in [String(), String(min_length=2),
+                          String(max_length=4),
+                          String(min_length=1, max_length=3)]:
+            self.assertSameVerdicts(validator, column)
+
+    def test_subclass_validate(self):
+        class Upper(String):
+            def validate(self, obj):
+                for verdict in super(Upper, self).validate(obj):
+                    verdict.value = verdict.value.upper()
+                    yield verdict
+        result = Upper().validate_column(pd.Series(["a", "b"]))
+        self.assertEqual(list(result.values), ["A", "B"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,101 @@
+from __future__ import unicode_literals
+import six
+
+import os
+import unittest
+import numpy as np
+import pandas as pd
+
+from table_cleaner.cleaner import Cleaner, Int, String
+from table_cleaner.table_markup import MarkupFrame
+from table_cleaner.verdict_store import SpilledVerdicts
+
+
+class MyCleaner(Cleaner):
+    x = Int(min_value=0)
+    name = String(max_length=4)
+
+
+class TestSpilledVerdicts(unittest.TestCase):
+    def setUp(self):
+        self.initial_df = pd.DataFrame(dict(
+                x=[1, -1, 3, "a", 5, -6, 7, 8],
+                name=["ab", "abc", "abcdef", "x", "toolong", "y", "z", "w"]),
+            columns=["x", "name"], index=np.arange(10, 18))
+        self.expected = MyCleaner(self.initial_df).verdicts
+
+    def test_below_budget(self):
+        cleaner = MyCleaner(self.initial_df, verdict_memory_budget=10 ** 9)
+        self.assertIsInstance(cleaner.verdicts, pd.DataFrame)
+        pd.testing.assert_frame_equal(cleaner.verdicts, self.expected)
+
+    def test_spilled(self):
+        cleaner = MyCleaner(self.initial_df, chunksize=3,
+                            verdict_memory_budget=1)
+        verdicts = cleaner.verdicts
+        self.assertIsInstance(verdicts, SpilledVerdicts)
+        self.assertTrue(os.path.exists(verdicts.path))
+        self.assertEqual(len(verdicts), len(self.expected))
+        self.assertEqual(cleaner.invalid_rows, 5)
+        self.assertEqual(len(cleaner.cleaned), 3)
+
+        frame = verdicts.to_frame()
+        self.assertEqual(list(frame.columns), list(self.expected.columns))
+        self.assertEqual(list(frame.index), list(self.expected.index))
+        for column in frame.columns:
+            self.assertEqual(list(frame[column]), list(self.expected[column]))
+
+        batches = list(verdicts.iter_batches(batchsize=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 4, 4])
+        self.assertEqual(list(pd.concat(batches)["counter"]),
+                         list(frame["counter"]))
+        self.assertEqual(len(list(verdicts)), 1)
+
+        path = verdicts.directory
+        verdicts.close()
+        self.assertFalse(os.path.exists(path))
+
+    def test_query(self):
+        verdicts = MyCleaner(self.initial_df, verdict_memory_budget=1).verdicts
+        expected = self.expected
+        invalid = verdicts.query(valid=False)
+        self.assertEqual(list(invalid["counter"]),
+                         list(expected[~expected["valid"]]["counter"]))
+        too_long = verdicts.query(columns=["name"], reasons=["too long"])
+        self.assertEqual(list(too_long.index), [12, 14])
+        self.assertEqual(verdicts.count(columns=["x"], valid=False), 3)
+        self.assertEqual(len(verdicts.query(reasons=["no such reason"])), 0)
+
+    def test_index_types(self):
+        indexes = [pd.MultiIndex.from_arrays([list("aabbccdd"),
+                                              list(range(8))]),
+                   pd.date_range("2020-01-01", periods=8, freq="H",
+                                 tz="Europe/Berlin")]
+        for index in indexes:
+            data = self.initial_df.set_axis(index, axis=0)
+            expected = MyCleaner(data).verdicts
+            for chunksize in [None, 3]:
+                verdicts = MyCleaner(data, chunksize=chunksize,
+                                     verdict_memory_budget=1).verdicts
+                self.assertIsInstance(verdicts, SpilledVerdicts)
+                frame = verdicts.to_frame()
+                self.assertTrue(frame.index.equals(expected.index))
+                self.assertEqual(list(frame["counter"]),
+                                 list(expected["counter"]))
+                self.assertTrue(verdicts.query(valid=False).index.equals(
+                        expected[~expected["valid"]].index))
+
+    def test_markup(self):
+        cleaner = MyCleaner(self.initial_df, verdict_memory_budget=1)
+        mdf = MarkupFrame.from_validation(self.initial_df, cleaner.verdicts,
+                                          reason_classes=True)
+        expected = MarkupFrame.from_validation(self.initial_df, self.expected,
+                                               reason_classes=True)
+        for label in self.initial_df.index:
+            for column in self.initial_df.columns:
+                self.assertEqual(mdf.cell(label, column).classes,
+                                 expected.cell(label, column).classes)
+
+
+if __name__ == '__main__':
+    unittest.main()